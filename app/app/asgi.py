@@ -9,8 +9,10 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
+# Django's handler plus streaming of AsyncStreamingHttpResponse, which
+# the appointment export uses under ASGI.
+from core.async_views import get_asgi_application  # noqa: E402
+
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -81,14 +83,114 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db_pool',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Per-process connection pool, see core/db_pool. Connections idle
+        # for CHECK_INTERVAL seconds are pinged before reuse; ones older
+        # than MAX_LIFETIME or idle past MAX_IDLE are closed. TIMEOUT is
+        # the longest a request waits for a connection when all are busy.
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': float(
+                os.environ.get('DB_POOL_MAX_LIFETIME', 1800)
+            ),
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'CHECK_INTERVAL': float(
+                os.environ.get('DB_POOL_CHECK_INTERVAL', 5)
+            ),
+        },
+    }
+}
+
+# Read replicas, as comma separated [name@]host[:port] entries that
+# default to the primary's name and port, e.g. DB_REPLICAS=db-replica-1,
+# db-replica-2. Locally, a second database on the same server stands in
+# for a replica: DB_REPLICAS=replica@localhost. Under test they mirror
+# the primary's test database; set DB_REPLICAS when running
+# core.tests.test_db_router to exercise routing against them. Connecting
+# to a replica gives up after DB_REPLICA_CONNECT_TIMEOUT seconds.
+DATABASE_REPLICAS = []
+for number, entry in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')),
+    start=1,
+):
+    name, _, address = entry.strip().rpartition('@')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port,
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'connect_timeout': int(
+                os.environ.get('DB_REPLICA_CONNECT_TIMEOUT', 2)
+            ),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Reads stay on the primary for STICKY_SECONDS after a client writes,
+# and after any change to data that is cached or compared against ETags;
+# the marks are kept in the CACHE alias. Replicas are health checked in
+# the background every CHECK_INTERVAL seconds and skipped while down or
+# more than MAX_LAG seconds behind, so the window is never shorter than
+# MAX_LAG + CHECK_INTERVAL.
+REPLICA_ROUTING = {
+    'STICKY_SECONDS': float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)),
+    'CACHE': 'default',
+    'CHECK_INTERVAL': float(
+        os.environ.get('DB_REPLICA_CHECK_INTERVAL', 5)
+    ),
+    'MAX_LAG': float(os.environ.get('DB_REPLICA_MAX_LAG', 30)),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+#
+# The local-memory cache is per process. Run more than one process
+# against a shared backend (Memcached, Redis) so that list cache
+# invalidation reaches every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'app',
     }
 }
 
+# Seconds a cached appointment or language list may be served.
+APPOINTMENT_LIST_CACHE_TIMEOUT = 300
+
+# Build the appointment list from .values() rows instead of model
+# instances and a ModelSerializer. The output is identical.
+APPOINTMENT_FAST_LIST = os.environ.get('APPOINTMENT_FAST_LIST') == '1'
+
+# Route the appointment and language endpoints to coroutine viewsets,
+# for deployments served under ASGI. See core/async_views.py.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
+# Threads that run the async viewsets' database work, and so the most
+# database connections they hold at once.
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))
+
+# Rows fetched from the server-side cursor per batch when streaming an
+# appointment export.
+APPOINTMENT_EXPORT_CHUNK_SIZE = 2000
+
+# Validated rows sent to the staging table per COPY when importing
+# appointments.
+APPOINTMENT_IMPORT_CHUNK_SIZE = 5000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -109,6 +211,25 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# The first hasher hashes new passwords; the others only verify existing
+# hashes, which are upgraded to the first on their owner's next login.
+# Hashers needing a library that requirements.txt lacks (argon2-cffi,
+# bcrypt) are left out, as they would fail on the first hash they meet.
+PASSWORD_HASHERS = os.environ.get('PASSWORD_HASHERS', ','.join([
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+])).split(',')
+
+# Work factor of core.hashers.PBKDF2PasswordHasher. Changing it rehashes
+# each password on the next successful login.
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 260000))
+
+# Threads that run token logins, and so password hashing, under ASGI.
+PASSWORD_HASH_THREADS = int(
+    os.environ.get('PASSWORD_HASH_THREADS', os.cpu_count() or 1)
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -137,4 +258,72 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'TEST_REQUEST_RENDERER_CLASSES': [
+        'rest_framework.renderers.MultiPartRenderer',
+        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.MessagePackRenderer',
+    ],
+    # Token-bucket sizes for core.throttling, refilled over the period.
+    'DEFAULT_THROTTLE_RATES': {
+        'token': os.environ.get('THROTTLE_RATE_TOKEN', '1200/min'),
+        'ip': os.environ.get('THROTTLE_RATE_IP', '3000/min'),
+    },
+    # Proxies in front of the app that append to X-Forwarded-For; the
+    # 'ip' throttle trusts only the address the last of them saw, or
+    # REMOTE_ADDR when there are none.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Default and largest page size for the cursor-paginated list endpoints.
+# Clients pick a size with ?page_size=.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# In-process cache of token to user lookups for CachedTokenAuthentication.
+# SHARED_CACHE optionally names a CACHES alias used as a second tier.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+    'SHARED_CACHE': None,
+}
+
+# In-process cache of recently verified logins, so a repeated token
+# request with the same credentials skips password hashing.
+LOGIN_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+}
+
+# Throttle buckets are kept in-process, up to MAX_SIZE clients per scope,
+# unless SHARED_CACHE names a CACHES alias to share them between
+# processes.
+THROTTLE = {
+    'MAX_SIZE': 100000,
+    'SHARED_CACHE': os.environ.get('THROTTLE_SHARED_CACHE') or None,
+}
+
+# Rendered OpenAPI schemas are kept in memory and under DIR, one
+# subdirectory per code VERSION. Set VERSION (e.g. to the commit hash) in
+# builds; left unset, it is a hash of the project's sources.
+OPENAPI_SCHEMA_CACHE = {
+    'DIR': os.environ.get(
+        'OPENAPI_SCHEMA_DIR',
+        os.path.join(tempfile.gettempdir(), 'app-openapi-schema'),
+    ),
+    'VERSION': os.environ.get('CODE_VERSION') or None,
 }
+
+# Raise on views running more queries than their declared budget instead of
+# logging a warning. See core/query_budget.py.
+QUERY_BUDGET_STRICT = DEBUG
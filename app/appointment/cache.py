@@ -0,0 +1,94 @@
+"""
+Per-user response cache for the appointment list endpoints.
+
+Cached lists are keyed on a per-user data version. Any write to a
+user's appointments or languages bumps the version, so entries written
+before the change are never read again and simply expire. The version
+is stored on the user's row, in the writing transaction, and copied
+into the cache for reads.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from rest_framework.response import Response
+
+from core.db_router import pin_if_written_since, use_primary
+
+
+def _version_key(user_id):
+    return f'appointment:data-version:{user_id}'
+
+
+def get_data_version(user_id):
+    """Return the version of the user's appointment and language data.
+
+    The cached copy is used when there is one. Writes with If-Match
+    check the stored version instead, as another process's cache may
+    lag it. Reads for the rest of the request go to the primary while
+    replicas may not have caught up with the version yet.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, get_stored_data_version(user_id), None)
+        version = cache.get(key)
+    pin_if_written_since(version)
+
+    return version
+
+
+def get_stored_data_version(user_id):
+    """Return the version stored on the user's row, on the primary."""
+    with use_primary():
+        return get_user_model().objects.values_list(
+            'data_version',
+            flat=True,
+        ).get(pk=user_id)
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached list of the user.
+
+    The new version is stored on the user's row in the current
+    transaction. The cached copy is dropped now and replaced on commit,
+    so until then other requests keep reading, and caching, the
+    committed version along with the committed data.
+    """
+    version = time.time_ns()
+    get_user_model().objects.filter(pk=user_id).update(data_version=version)
+    cache.delete(_version_key(user_id))
+    transaction.on_commit(
+        lambda: cache.set(_version_key(user_id), version, None),
+    )
+
+
+class CachedListMixin:
+    """Serve a viewset's list action from a per-user read-through cache."""
+    list_cache_prefix = None
+
+    def get_list_cache_key(self, request):
+        """Return the cache key for this user, data version and URL."""
+        user_id = request.user.id
+        url = f'{request.get_host()}{request.get_full_path()}'
+        digest = hashlib.md5(
+            f'{request.accepted_media_type}|{url}'.encode(),
+        ).hexdigest()
+        prefix = self.list_cache_prefix or self.basename
+        version = get_data_version(user_id)
+
+        return f'appointment:list:{prefix}:{user_id}:{version}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.APPOINTMENT_LIST_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,158 @@
+"""
+Conditional request support for the appointment endpoints.
+
+ETags and Last-Modified dates come from the per-user data version kept
+by appointment.cache, so a request can be answered with 304 or 412
+before any appointment query or serialization runs.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from appointment.cache import get_data_version
+
+
+class NotModified(Exception):
+    """Raised to answer a conditional GET with 304 Not Modified."""
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource was modified since it was fetched.')
+    default_code = 'precondition_failed'
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+class ConditionalRequestMixin:
+    """Answer If-None-Match, If-Modified-Since and If-Match on a viewset.
+
+    Reads (list, retrieve) get ETag and Last-Modified headers and a 304
+    when the client's copy is current. Writes (update, partial_update)
+    with an If-Match that no longer matches are refused with 412; the
+    check and the write run in one transaction holding a lock on the
+    user, so of two writes sent with the same ETag only one succeeds.
+    """
+    conditional_read_actions = ('list', 'retrieve')
+    conditional_write_actions = ('update', 'partial_update')
+
+    def get_etag(self, version, renderer_format=None):
+        """Return the ETag for the user's data at version, as rendered
+        in renderer_format or the request's negotiated format.
+        """
+        if renderer_format is None:
+            renderer_format = self.request.accepted_renderer.format
+        user_id = self.request.user.id
+        return quote_etag(f'{user_id}-{version}.{renderer_format}')
+
+    def get_last_modified(self, version):
+        """Return the Last-Modified timestamp for version."""
+        return version // 10 ** 9
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.data_version = None
+        if self.action in self.conditional_read_actions:
+            self.data_version = get_data_version(request.user.id)
+            if self._client_copy_is_current(request):
+                raise NotModified()
+
+    def update(self, request, *args, **kwargs):
+        if_match = request.headers.get('If-Match')
+        if if_match is None:
+            return super().update(request, *args, **kwargs)
+
+        with transaction.atomic():
+            # Every If-Match write of the user waits here until the one
+            # before it commits, and then sees the version it stored.
+            version = get_user_model().objects.select_for_update().values_list(
+                'data_version',
+                flat=True,
+            ).get(pk=request.user.pk)
+            if not self._etag_matches(
+                parse_etags(if_match),
+                version,
+                weak=False,
+                any_format=True,
+            ):
+                raise PreconditionFailed()
+            return super().update(request, *args, **kwargs)
+
+    def _etag_matches(self, etags, version, weak, any_format=False):
+        if '*' in etags:
+            return True
+        if any_format:
+            # Every representation of a version is the same resource.
+            current = {
+                self.get_etag(version, renderer.format)
+                for renderer in self.get_renderers()
+            }
+        else:
+            current = {self.get_etag(version)}
+        if weak:
+            etags = [_strip_weak(tag) for tag in etags]
+        return not current.isdisjoint(etags)
+
+    def _client_copy_is_current(self, request):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return self._etag_matches(
+                parse_etags(if_none_match),
+                self.data_version,
+                weak=True,
+            )
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since', ''),
+        )
+        return (
+            if_modified_since is not None
+            and self.get_last_modified(self.data_version) <= if_modified_since
+        )
+
+    def _set_validators(self, response, version):
+        response['ETag'] = self.get_etag(version)
+        last_modified = self.get_last_modified(version)
+        # A date in the current second could be reused by a later change
+        # in the same second, so it is only sent once that second is over.
+        if last_modified < int(time.time()):
+            response['Last-Modified'] = http_date(last_modified)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            self._set_validators(response, self.data_version)
+            return response
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs,
+        )
+        action = getattr(self, 'action', None)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if action in self.conditional_read_actions:
+            self._set_validators(response, self.data_version)
+        elif action in self.conditional_write_actions:
+            self._set_validators(response, get_data_version(request.user.id))
+
+        return response
@@ -0,0 +1,51 @@
+"""
+Streaming export of a user's appointments.
+
+Rows come from a server-side cursor and are serialized a chunk at a
+time, with one languages query per chunk, so memory use stays flat no
+matter how many appointments are exported.
+"""
+from itertools import islice
+
+from appointment.serializers import AppointmentDetailSerializer
+from appointment.values import AppointmentValuesSerializer
+
+
+class AppointmentExportSerializer(AppointmentValuesSerializer):
+    """Serialize .values() rows like AppointmentDetailSerializer.
+
+    With language_names set, languages are a list of names instead of
+    id and name objects, which suits flat formats like CSV.
+    """
+    serializer_class = AppointmentDetailSerializer
+
+    def __init__(self, rows, language_names=False):
+        super().__init__(rows)
+        self.language_names = language_names
+
+    @classmethod
+    def field_names(cls):
+        """Return the output fields in order."""
+        return list(cls.serializer_class.Meta.fields)
+
+    @property
+    def data(self):
+        rows = super().data
+        if self.language_names:
+            for row in rows:
+                row['languages'] = [lang['name'] for lang in row['languages']]
+
+        return rows
+
+
+def iter_export_chunks(queryset, chunk_size, language_names=False):
+    """Yield serialized lists of at most chunk_size appointments."""
+    serializer_class = AppointmentExportSerializer
+    rows = queryset.prefetch_related(None).values(
+        *serializer_class.value_fields(),
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield serializer_class(chunk, language_names=language_names).data
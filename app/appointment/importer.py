@@ -0,0 +1,300 @@
+"""
+Bulk import of appointments from CSV or NDJSON files.
+
+Rows are read and validated a chunk at a time, streamed into a temporary
+staging table with PostgreSQL COPY and then merged into the appointment,
+language and appointment-language tables with a few set-based
+statements. Only one chunk is held in memory, so memory use does not
+grow with the file size.
+"""
+import csv
+import io
+import json
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+
+from core.models import Appointment, Language
+from appointment.cache import bump_data_version
+from appointment.serializers import AppointmentDetailSerializer
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+STAGING_TABLE = 'appointment_import_staging'
+STAGING_COLUMNS = [
+    'line',
+    'title',
+    'description',
+    'time_minutes',
+    'price',
+    'link',
+    'languages',
+]
+
+
+def detect_format(name):
+    """Return the import format implied by a file name, or None."""
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def _pg_array(values):
+    """Return values as a PostgreSQL text[] literal."""
+    items = (
+        '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        for value in values
+    )
+    return '{' + ','.join(items) + '}'
+
+
+def _decode_lines(stream, invalid_lines):
+    """Yield the lines of a binary UTF-8 stream as text.
+
+    Lines that do not decode are added, by number, to invalid_lines and
+    yielded with replacement characters, so later lines still parse.
+    """
+    for line, raw in enumerate(stream, start=1):
+        encoding = 'utf-8-sig' if line == 1 else 'utf-8'
+        try:
+            yield raw.decode(encoding)
+        except UnicodeDecodeError:
+            invalid_lines.add(line)
+            yield raw.decode(encoding, errors='replace')
+
+
+class AppointmentImportSerializer(serializers.Serializer):
+    """Serializer for an uploaded appointment file."""
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+
+    def validate(self, attrs):
+        """Fall back to the file extension when no format is given."""
+        if 'format' not in attrs:
+            attrs['format'] = detect_format(attrs['file'].name)
+            if attrs['format'] is None:
+                raise serializers.ValidationError({'format': [_(
+                    'Could not tell the format from the file name.'
+                )]})
+
+        return attrs
+
+
+class AppointmentImporter:
+    """Import a user's appointments from a CSV or NDJSON file.
+
+    CSV files need a header row naming the appointment fields, with
+    languages given as semicolon separated names. NDJSON rows use the
+    same shape as the API. Valid rows are imported and invalid ones are
+    reported by line number; at most max_errors of them are kept.
+    """
+    serializer_class = AppointmentDetailSerializer
+
+    def __init__(self, user, chunk_size=None, max_errors=1000,
+                 using='default'):
+        self.user = user
+        self.chunk_size = chunk_size or settings.APPOINTMENT_IMPORT_CHUNK_SIZE
+        self.max_errors = max_errors
+        self.using = using
+        self.serializer = self.serializer_class()
+
+    def read_csv(self, stream):
+        """Yield (line, data) pairs from a binary CSV stream.
+
+        Rows on lines that are not UTF-8 are reported as invalid; a
+        header that is not, or a file csv cannot parse, is refused.
+        """
+        invalid_lines = set()
+        reader = csv.DictReader(_decode_lines(stream, invalid_lines))
+        try:
+            if reader.fieldnames is not None and invalid_lines:
+                raise serializers.ValidationError({'file': [
+                    _('The header row is not valid UTF-8.'),
+                ]})
+            first = reader.line_num + 1
+            for row in reader:
+                line = reader.line_num
+                if not invalid_lines.isdisjoint(range(first, line + 1)):
+                    row = serializers.ValidationError({'non_field_errors': [
+                        _('The row is not valid UTF-8.'),
+                    ]})
+                else:
+                    languages = row.get('languages')
+                    if languages is not None:
+                        row['languages'] = [
+                            {'name': name.strip()}
+                            for name in languages.split(';') if name.strip()
+                        ]
+                yield line, row
+                first = line + 1
+        except csv.Error as exc:
+            raise serializers.ValidationError({'file': [
+                _('Line %(line)s is not valid CSV: %(error)s') % {
+                    'line': reader.line_num,
+                    'error': exc,
+                },
+            ]})
+
+    def read_ndjson(self, stream):
+        """Yield (line, data) pairs from a binary NDJSON stream."""
+        for line, raw in enumerate(stream, start=1):
+            if not raw.strip():
+                continue
+            try:
+                yield line, json.loads(raw)
+            except ValueError as exc:
+                yield line, serializers.ValidationError(
+                    {'non_field_errors': [_('Invalid JSON: %s') % exc]},
+                )
+
+    def validate(self, data):
+        """Return validated data for one row, or raise ValidationError."""
+        if isinstance(data, serializers.ValidationError):
+            raise data
+        if not isinstance(data, dict):
+            raise serializers.ValidationError(
+                {'non_field_errors': [_('Expected an object.')]},
+            )
+        return self.serializer.run_validation(data)
+
+    def to_copy_row(self, line, data):
+        """Return the staging table values for a validated row."""
+        names = sorted({
+            language['name'] for language in data.get('languages', [])
+        })
+        return [
+            line,
+            data['title'],
+            data.get('description', ''),
+            data['time_minutes'],
+            data['price'],
+            data.get('link', ''),
+            _pg_array(names),
+        ]
+
+    def iter_chunks(self, rows):
+        """Yield CSV buffers of validated rows ready for COPY."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        count = 0
+        for line, data in rows:
+            self.rows += 1
+            try:
+                validated = self.validate(data)
+            except serializers.ValidationError as exc:
+                self.error_count += 1
+                if len(self.errors) < self.max_errors:
+                    self.errors.append({'line': line, 'errors': exc.detail})
+                continue
+            writer.writerow(self.to_copy_row(line, validated))
+            count += 1
+            if count == self.chunk_size:
+                buffer.seek(0)
+                yield buffer
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+                count = 0
+        if count:
+            buffer.seek(0)
+            yield buffer
+
+    def create_staging_table(self, cursor):
+        """Create the temporary table rows are copied into."""
+        appointment_table = Appointment._meta.db_table
+        cursor.execute(
+            'SELECT pg_get_serial_sequence(%s, %s)',
+            [appointment_table, 'id'],
+        )
+        sequence = cursor.fetchone()[0]
+        # Ids are drawn from the appointment sequence as rows are copied,
+        # so languages can be linked without reading the new rows back.
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {STAGING_TABLE} ('
+            ' id bigint NOT NULL DEFAULT nextval(%s::regclass),'
+            ' line integer NOT NULL,'
+            ' title varchar(255) NOT NULL,'
+            ' description text NOT NULL,'
+            ' time_minutes integer NOT NULL,'
+            ' price numeric(5, 2) NOT NULL,'
+            ' link varchar(255) NOT NULL,'
+            ' languages text[] NOT NULL'
+            ') ON COMMIT DROP',
+            [sequence],
+        )
+
+    def merge(self, cursor, connection):
+        """Move the staged rows into the real tables."""
+        quote = connection.ops.quote_name
+        appointments = quote(Appointment._meta.db_table)
+        languages = quote(Language._meta.db_table)
+        through = quote(Appointment.languages.through._meta.db_table)
+        cursor.execute(
+            f'INSERT INTO {appointments}'
+            ' (id, user_id, title, description, time_minutes, price, link)'
+            ' SELECT id, %s, title, description, time_minutes, price, link'
+            f' FROM {STAGING_TABLE} ORDER BY line',
+            [self.user.id],
+        )
+        imported = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {languages} (user_id, name)'
+            ' SELECT DISTINCT %s, lang.name'
+            f' FROM {STAGING_TABLE}'
+            ' CROSS JOIN LATERAL unnest(languages) AS lang(name)'
+            ' ON CONFLICT (user_id, name) DO NOTHING',
+            [self.user.id],
+        )
+        cursor.execute(
+            f'INSERT INTO {through} (appointment_id, language_id)'
+            ' SELECT staging.id, language.id'
+            f' FROM {STAGING_TABLE} AS staging'
+            ' CROSS JOIN LATERAL unnest(staging.languages) AS lang(name)'
+            f' JOIN {languages} AS language'
+            ' ON language.user_id = %s AND language.name = lang.name',
+            [self.user.id],
+        )
+        cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+        return imported
+
+    def run(self, stream, format):
+        """Import every row of a binary stream and return a report."""
+        if format not in IMPORT_FORMATS:
+            raise ValueError(f'Unknown import format {format!r}.')
+
+        self.rows = 0
+        self.error_count = 0
+        self.errors = []
+        start = time.perf_counter()
+        rows = getattr(self, f'read_{format}')(stream)
+        connection = connections[self.using]
+        with transaction.atomic(using=self.using):
+            with connection.cursor() as cursor:
+                self.create_staging_table(cursor)
+                for buffer in self.iter_chunks(rows):
+                    cursor.copy_expert(
+                        f'COPY {STAGING_TABLE} ({", ".join(STAGING_COLUMNS)})'
+                        ' FROM STDIN WITH (FORMAT csv)',
+                        buffer,
+                    )
+                imported = self.merge(cursor, connection)
+            # Raw SQL sends no model signals, so cached lists are
+            # invalidated here.
+            if imported:
+                bump_data_version(self.user.id)
+
+        seconds = time.perf_counter() - start
+        return {
+            'rows': self.rows,
+            'imported': imported,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(self.rows / seconds) if seconds else 0,
+        }
@@ -0,0 +1,97 @@
+"""
+Pagination for the Appointment APIs.
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination with a client-selectable page size.
+
+    Pages are fetched with a WHERE on the ordering key rather than an
+    OFFSET, and no COUNT(*) is run, so every page costs the same.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class AppointmentPagination(KeysetPagination):
+    """Paginate appointments newest first."""
+    ordering = '-id'
+
+
+class LanguagePagination(KeysetPagination):
+    """Paginate languages by name, descending."""
+    ordering = ('-name', '-id')
+
+
+class RankedPagination(PageNumberPagination):
+    """Page through results ordered by relevance.
+
+    A relevance score is no keyset, so pages are taken with an OFFSET.
+    One extra row is read to know whether a next page exists, so no
+    COUNT(*) is run, and responses have the same next, previous and
+    results keys as KeysetPagination.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1),
+            )
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params[self.page_query_param],
+                message='',
+            ))
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        del schema['properties']['count']
+        return schema
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1,
+        )
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url,
+            self.page_query_param,
+            self.page_number - 1,
+        )
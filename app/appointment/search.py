@@ -0,0 +1,50 @@
+"""
+Full-text search for the appointment list.
+
+Appointment.search_vector holds the title (weight A) and description
+(weight B) lexemes and is kept up to date by a database trigger, so a
+search is a GIN index lookup plus ranking of the matching rows.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+from rest_framework.filters import BaseFilterBackend
+
+# Must match the configuration used by the search_vector trigger.
+SEARCH_CONFIG = 'english'
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Filter appointments by ?search= terms, best matches first.
+
+    Terms use web search syntax: quoted phrases, "or" and a leading "-"
+    to exclude a word.
+    """
+    search_param = 'search'
+
+    def get_search_terms(self, request):
+        """Return the search terms of the request, or ''."""
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = SearchQuery(
+            terms,
+            config=SEARCH_CONFIG,
+            search_type='websearch',
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+        ).order_by('-rank', '-id')
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Words to search titles and descriptions for.',
+            'schema': {'type': 'string'},
+        }]
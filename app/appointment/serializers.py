@@ -1,9 +1,16 @@
 """
 Serializer for Appointment APIs
 """
-from rest_framework import serializers
+from decimal import ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers, status
 
 from core.models import Appointment, Language
+from core.serializers import UpdateChangedFieldsMixin
+from appointment.cache import bump_data_version
 
 
 class LanguageSerializer(serializers.ModelSerializer):
@@ -15,7 +22,10 @@ class LanguageSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(
+    UpdateChangedFieldsMixin,
+    serializers.ModelSerializer,
+):
     """Serializer for appointments."""
     languages = LanguageSerializer(many=True, required=False)
 
@@ -27,14 +37,29 @@ class AppointmentSerializer(serializers.ModelSerializer):
     def _get_or_create_languages(self, languages, appointment):
         """Handle getting or creating Languages as needed."""
         auth_user = self.context['request'].user
-        for language in languages:
-            language_obj, created = Language.objects.get_or_create(
-                user=auth_user,
-                **language,
-            )
-            appointment.languages.add(language_obj)
-
+        language_objs = Language.objects.get_or_create_many(
+            auth_user,
+            [language['name'] for language in languages],
+        )
+        appointment.languages.add(*language_objs.values())
 
+    def _set_languages(self, languages, appointment):
+        """Change appointment languages, touching only rows that differ."""
+        auth_user = self.context['request'].user
+        current = {
+            language.name: language
+            for language in appointment.languages.all()
+        }
+        names = {language['name'] for language in languages}
+        added = Language.objects.get_or_create_many(
+            auth_user,
+            names - current.keys(),
+        )
+        appointment.languages.remove(*(
+            language for name, language in current.items()
+            if name not in names
+        ))
+        appointment.languages.add(*added.values())
 
     def create(self, validated_data):
         """Create an appointment."""
@@ -48,14 +73,10 @@ class AppointmentSerializer(serializers.ModelSerializer):
         """Update Appointment"""
         languages = validated_data.pop('languages', None)
         if languages is not None:
-            instance.languages.clear()
-            self._get_or_create_languages(languages, instance)
+            self._set_languages(languages, instance)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+        return self.save_changed(instance, validated_data)
 
-        instance.save()
-        return instance
 
 class AppointmentDetailSerializer(AppointmentSerializer):
     """Serializer for appointment details view."""
@@ -63,3 +84,238 @@ class AppointmentDetailSerializer(AppointmentSerializer):
     class Meta(AppointmentSerializer.Meta):
         fields = AppointmentSerializer.Meta.fields + ['description']
 
+
+class AppointmentBulkItemSerializer(serializers.Serializer):
+    """One create, update or delete in a bulk appointment request."""
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    action = serializers.ChoiceField(choices=[CREATE, UPDATE, DELETE])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        """Require the appointment id for updates and deletes."""
+        if attrs['action'] != self.CREATE and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': _('This field is required.')}
+            )
+
+        return attrs
+
+
+class AppointmentBulkSerializer(serializers.Serializer):
+    """Create, update and delete many appointments in one transaction.
+
+    Every item is validated with AppointmentDetailSerializer first; if
+    any item fails, nothing is written and the errors are returned
+    aligned with the items.
+    """
+    max_items = 1000
+
+    items = AppointmentBulkItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        """Limit the number of items in one request."""
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(
+                _('Ensure there are no more than {max_items} items.').format(
+                    max_items=self.max_items,
+                )
+            )
+
+        return items
+
+    def validate(self, attrs):
+        """Validate each item against the appointment serializer."""
+        user = self.context['request'].user
+        items = attrs['items']
+        ids = [item['id'] for item in items if 'id' in item]
+        appointments = Appointment.objects.filter(
+            user=user,
+            id__in=ids,
+        ).in_bulk()
+
+        errors = []
+        seen = set()
+        for item in items:
+            action, pk = item['action'], item.get('id')
+            if pk is not None and pk in seen:
+                errors.append({'id': [_('Appointment is listed twice.')]})
+                continue
+            seen.add(pk)
+
+            if action != AppointmentBulkItemSerializer.CREATE:
+                item['instance'] = appointments.get(pk)
+                if item['instance'] is None:
+                    errors.append({'id': [_('Appointment not found.')]})
+                    continue
+            if action == AppointmentBulkItemSerializer.DELETE:
+                errors.append({})
+                continue
+
+            serializer = AppointmentDetailSerializer(
+                item.get('instance'),
+                data=item['data'],
+                partial=action == AppointmentBulkItemSerializer.UPDATE,
+                context=self.context,
+            )
+            serializer.is_valid()
+            item['validated_data'] = serializer.validated_data
+            errors.append(serializer.errors)
+
+        if any(errors):
+            raise serializers.ValidationError({'items': errors})
+
+        return attrs
+
+    def _set_languages(self, user, appointment_languages):
+        """Replace languages of many appointments with set-based writes."""
+        if not appointment_languages:
+            return
+
+        Through = Appointment.languages.through
+        names = {
+            language['name']
+            for _appointment, languages in appointment_languages
+            for language in languages
+        }
+        language_ids = {
+            name: language.id
+            for name, language in Language.objects.get_or_create_many(
+                user, names,
+            ).items()
+        }
+        wanted = {
+            (appointment.id, language_ids[language['name']])
+            for appointment, languages in appointment_languages
+            for language in languages
+        }
+        current = {
+            (row.appointment_id, row.language_id): row.id
+            for row in Through.objects.filter(appointment__in=[
+                appointment.id for appointment, _languages in
+                appointment_languages
+            ])
+        }
+
+        stale = [pk for pair, pk in current.items() if pair not in wanted]
+        if stale:
+            Through.objects.filter(id__in=stale).delete()
+        Through.objects.bulk_create([
+            Through(appointment_id=appointment_id, language_id=language_id)
+            for appointment_id, language_id in wanted - current.keys()
+        ])
+
+    def _lock(self, user, items):
+        """Lock and return the appointments items change, by id, or fail
+        if any is gone.
+        """
+        ids = [
+            item['id'] for item in items
+            if item['action'] != AppointmentBulkItemSerializer.CREATE
+        ]
+        if not ids:
+            return {}
+        locked = (
+            Appointment.objects.select_for_update()
+            .filter(user=user, id__in=ids)
+            .in_bulk()
+        )
+        if len(locked) < len(ids):
+            raise serializers.ValidationError({'items': [
+                {'id': [_('Appointment not found.')]}
+                if item.get('id') in ids and item['id'] not in locked else {}
+                for item in items
+            ]})
+        return locked
+
+    def create(self, validated_data):
+        """Apply the validated items and return per-item results."""
+        user = self.context['request'].user
+        items = validated_data['items']
+        created, updated, deleted = [], [], []
+        appointment_languages = []
+        update_fields = set()
+
+        with transaction.atomic():
+            locked = self._lock(user, items)
+            for item in items:
+                action = item['action']
+                if action == AppointmentBulkItemSerializer.DELETE:
+                    deleted.append(item['id'])
+                    continue
+
+                data = dict(item['validated_data'])
+                languages = data.pop('languages', None)
+                if action == AppointmentBulkItemSerializer.CREATE:
+                    appointment = Appointment(user=user, **data)
+                    created.append(appointment)
+                else:
+                    # Changes go onto the row read under the lock, so the
+                    # fields an item leaves alone are written back as
+                    # they are now.
+                    appointment = locked[item['id']]
+                    for attr, value in data.items():
+                        setattr(appointment, attr, value)
+                    update_fields.update(data)
+                    updated.append(appointment)
+                item['instance'] = appointment
+                if languages is not None:
+                    appointment_languages.append((appointment, languages))
+
+            if deleted:
+                Appointment.objects.filter(user=user, id__in=deleted).delete()
+            Appointment.objects.bulk_create(created)
+            if updated and update_fields:
+                Appointment.objects.bulk_update(updated, sorted(update_fields))
+            self._set_languages(user, appointment_languages)
+            bump_data_version(user.id)
+
+        saved = Appointment.objects.filter(
+            id__in=[appointment.id for appointment in created + updated],
+        ).prefetch_related('languages').in_bulk()
+
+        statuses = {
+            AppointmentBulkItemSerializer.CREATE: status.HTTP_201_CREATED,
+            AppointmentBulkItemSerializer.UPDATE: status.HTTP_200_OK,
+            AppointmentBulkItemSerializer.DELETE: status.HTTP_204_NO_CONTENT,
+        }
+        results = []
+        for index, item in enumerate(items):
+            result = {
+                'index': index,
+                'action': item['action'],
+                'status': statuses[item['action']],
+            }
+            if item['action'] == AppointmentBulkItemSerializer.DELETE:
+                result['id'] = item['id']
+            else:
+                appointment = saved[item['instance'].id]
+                result['id'] = appointment.id
+                result['data'] = AppointmentDetailSerializer(appointment).data
+            results.append(result)
+
+        return results
+
+
+class LanguageStatsSerializer(serializers.Serializer):
+    """Serializer for the appointment count of a language."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    appointment_count = serializers.IntegerField()
+
+
+class AppointmentStatsSerializer(serializers.Serializer):
+    """Serializer for a user's appointment statistics."""
+    appointment_count = serializers.IntegerField()
+    total_price = serializers.DecimalField(max_digits=20, decimal_places=2)
+    average_price = serializers.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        rounding=ROUND_HALF_UP,
+        allow_null=True,
+    )
+    total_minutes = serializers.IntegerField()
+    languages = LanguageStatsSerializer(many=True)
@@ -0,0 +1,24 @@
+"""
+Signal receivers for the appointment app.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Appointment, Language
+from appointment.cache import bump_data_version
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_on_write(sender, instance, **kwargs):
+    """Invalidate the owner's cached lists after a write."""
+    bump_data_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Appointment.languages.through)
+def invalidate_on_languages_changed(sender, instance, action, **kwargs):
+    """Invalidate the owner's cached lists when languages change."""
+    if action.startswith('post_'):
+        bump_data_version(instance.user_id)
@@ -0,0 +1,71 @@
+"""
+Per-user appointment statistics.
+
+Totals are read from the AppointmentStats and LanguageStats summary
+tables, which database triggers keep current in the same transaction
+as every appointment write. A read costs two primary-key sized queries
+however many appointments the user has.
+"""
+from django.db import connection, transaction
+
+from core.models import AppointmentStats, LanguageStats
+
+REBUILD_SQL = [
+    'LOCK TABLE core_appointment, core_appointment_languages IN SHARE MODE',
+    'DELETE FROM core_languagestats',
+    'DELETE FROM core_appointmentstats',
+    'INSERT INTO core_appointmentstats'
+    ' (user_id, appointment_count, total_price, total_minutes)'
+    ' SELECT user_id, count(*), sum(price), sum(time_minutes)'
+    ' FROM core_appointment GROUP BY user_id',
+    'INSERT INTO core_languagestats (language_id, user_id, appointment_count)'
+    ' SELECT language.id, language.user_id, count(*)'
+    ' FROM core_appointment_languages AS through'
+    ' JOIN core_language AS language ON language.id = through.language_id'
+    ' GROUP BY language.id, language.user_id',
+]
+
+
+def get_stats(user):
+    """Return the appointment statistics of user."""
+    stats = AppointmentStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = AppointmentStats(user=user)
+    languages = LanguageStats.objects.filter(
+        user=user,
+        appointment_count__gt=0,
+    ).select_related('language').order_by('language__name')
+
+    return {
+        'appointment_count': stats.appointment_count,
+        'total_price': stats.total_price,
+        'average_price': (
+            stats.total_price / stats.appointment_count
+            if stats.appointment_count else None
+        ),
+        'total_minutes': stats.total_minutes,
+        'languages': [
+            {
+                'id': row.language_id,
+                'name': row.language.name,
+                'appointment_count': row.appointment_count,
+            }
+            for row in languages
+        ],
+    }
+
+
+def rebuild_stats():
+    """Recompute every summary row from the appointment tables.
+
+    Writes to appointments wait until the rebuild commits, so no change
+    is lost or counted twice.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+
+    return (
+        AppointmentStats.objects.count(),
+        LanguageStats.objects.count(),
+    )
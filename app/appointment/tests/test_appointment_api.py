@@ -5,16 +5,20 @@ Tests for appointment APIs.
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from core.models import (
     Appointment,
     Language
 )
+from core.query_budget import QueryBudgetTestMixin
 
 from appointment.serializers import (
     AppointmentSerializer,
@@ -83,7 +87,7 @@ class PrivateAppointmentApiTests(TestCase):
         appointments = Appointment.objects.all().order_by('-id')
         serializer = AppointmentSerializer(appointments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_appointment_list_limited_to_user(self):
         """Test list of appointments is linited to authenticated user."""
@@ -99,7 +103,26 @@ class PrivateAppointmentApiTests(TestCase):
         appointments = Appointment.objects.filter(user=self.user)
         serializer = AppointmentSerializer(appointments, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_paginated_by_cursor(self):
+        """Test walking the appointment list one page at a time."""
+        appointments = [create_appointment(user=self.user) for _ in range(3)]
+
+        res = self.client.get(APPOINTMENT_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        self.assertIsNone(res.data['previous'])
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [appointments[2].id, appointments[1].id])
+
+        res = self.client.get(res.data['next'])
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [appointments[0].id])
+        self.assertIsNone(res.data['next'])
+        self.assertIsNotNone(res.data['previous'])
 
     def test_get_appointment_detail(self):
         """Test get appointment detail."""
@@ -147,6 +170,35 @@ class PrivateAppointmentApiTests(TestCase):
         self.assertEqual(appointment.title, payload['title'])
         self.assertEqual(appointment.link, original_link)
 
+    def test_partial_update_writes_changed_fields_only(self):
+        """Test a PATCH updates only the columns it changes."""
+        appointment = create_appointment(user=self.user)
+
+        url = detail_url(appointment.id)
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch(url, {'title': 'New Title'})
+
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "core_appointment"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"link"', updates[0])
+        self.assertNotIn('"price"', updates[0])
+
+    def test_partial_update_without_changes_skips_write(self):
+        """Test a PATCH that changes nothing does not write."""
+        appointment = create_appointment(user=self.user)
+
+        url = detail_url(appointment.id)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.patch(url, {'title': appointment.title})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in context.captured_queries:
+            self.assertFalse(query['sql'].startswith('UPDATE'))
+
     def test_full_update(self):
         """Test full update of an appointment."""
         appointment = create_appointment(
@@ -245,7 +297,7 @@ class PrivateAppointmentApiTests(TestCase):
         self.assertEqual(appointment.count(), 1)
         appointment = appointment[0]
         self.assertEqual(appointment.languages.count(), 2)
-        self.assertEqual(language_spanish, appointment.languages.all())
+        self.assertIn(language_spanish, appointment.languages.all())
         for language in payload['languages']:
             exists = appointment.languages.filter(
                 name=language['name'],
@@ -253,4 +305,117 @@ class PrivateAppointmentApiTests(TestCase):
             ).exists()
             self.assertTrue(exists)
 
+    def test_update_languages_writes_only_changes(self):
+        """Test updating languages keeps rows that did not change."""
+        Through = Appointment.languages.through
+        spanish = Language.objects.create(user=self.user, name='Spanish')
+        thai = Language.objects.create(user=self.user, name='Thai')
+        appointment = create_appointment(user=self.user)
+        appointment.languages.add(spanish, thai)
+        kept = Through.objects.get(appointment=appointment, language=spanish)
+
+        payload = {'languages': [{'name': 'Spanish'}, {'name': 'Dutch'}]}
+        url = detail_url(appointment.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(appointment.languages.values_list('name', flat=True)),
+            ['Dutch', 'Spanish'],
+        )
+        self.assertTrue(Through.objects.filter(id=kept.id).exists())
+        self.assertTrue(Language.objects.filter(id=thai.id).exists())
+
+    def test_update_same_languages_skips_through_table(self):
+        """Test an unchanged language set does not write join rows."""
+        appointment = create_appointment(user=self.user)
+        appointment.languages.add(
+            Language.objects.create(user=self.user, name='Spanish'),
+        )
+
+        payload = {'languages': [{'name': 'Spanish'}]}
+        url = detail_url(appointment.id)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        through_table = Appointment.languages.through._meta.db_table
+        for query in context.captured_queries:
+            if through_table in query['sql']:
+                self.assertTrue(query['sql'].startswith('SELECT'))
+
+
+class AppointmentQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test appointment endpoints run a fixed number of queries."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _create_appointments(self, count):
+        """Create `count` appointments with two languages each."""
+        for i in range(count):
+            appointment = create_appointment(user=self.user)
+            appointment.languages.add(
+                Language.objects.create(user=self.user, name=f'Lang {i}'),
+                Language.objects.create(user=self.user, name=f'Other {i}'),
+            )
+
+        return appointment
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        """Test listing appointments does not query per appointment."""
+        self._create_appointments(10)
+
+        with self.assertMaxQueries(4):
+            res = self.client.get(APPOINTMENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(res.data['results'][0]['languages']), 2)
+
+    def test_later_pages_use_keyset(self):
+        """Test later pages filter on the cursor instead of counting."""
+        self._create_appointments(5)
+        res = self.client.get(APPOINTMENT_URL, {'page_size': 2})
+
+        with self.assertMaxQueries(3) as context:
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 2)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_create_queries_do_not_grow_with_languages(self):
+        """Test creating an appointment resolves languages in bulk."""
+        Language.objects.create(user=self.user, name='Existing')
+        payload = {
+            'title': 'Sample Appointment Title',
+            'time_minutes': 25,
+            'price': '5.25',
+            'languages': [{'name': 'Existing'}] + [
+                {'name': f'New {i}'} for i in range(20)
+            ],
+        }
+
+        with self.assertMaxQueries(10):
+            res = self.client.post(APPOINTMENT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['languages']), 21)
+        self.assertEqual(Language.objects.filter(user=self.user).count(), 21)
+
+    def test_retrieve_queries(self):
+        """Test retrieving an appointment with languages."""
+        appointment = self._create_appointments(1)
+
+        with self.assertMaxQueries(4):
+            res = self.client.get(detail_url(appointment.id))
 
+        self.assertEqual(len(res.data['languages']), 2)
@@ -0,0 +1,252 @@
+"""
+Tests for the bulk appointment API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import (
+    Appointment,
+    Language,
+)
+from core.query_budget import QueryBudgetTestMixin
+from appointment.serializers import AppointmentBulkSerializer
+
+BULK_URL = reverse('appointment:appointment-bulk')
+
+
+def create_appointment(user, **params):
+    """Create and return a sample appointment."""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+def create_payload(title='Bulk Appointment', **params):
+    """Return a create item for a bulk request."""
+    data = {'title': title, 'time_minutes': 30, 'price': '10.00'}
+    data.update(params)
+
+    return {'action': 'create', 'data': data}
+
+
+class PrivateAppointmentBulkApiTests(QueryBudgetTestMixin, TestCase):
+    """Test authenticated bulk API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating appointments with languages in one request."""
+        Language.objects.create(user=self.user, name='Spanish')
+        payload = {'items': [
+            create_payload('First', languages=[{'name': 'Spanish'}]),
+            create_payload('Second', languages=[
+                {'name': 'Spanish'},
+                {'name': 'Thai'},
+            ]),
+        ]}
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([r['status'] for r in results], [201, 201])
+        self.assertEqual(results[0]['data']['title'], 'First')
+        second = Appointment.objects.get(id=results[1]['id'])
+        self.assertEqual(
+            sorted(second.languages.values_list('name', flat=True)),
+            ['Spanish', 'Thai'],
+        )
+        self.assertEqual(Language.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_update_and_delete(self):
+        """Test updating and deleting appointments in one request."""
+        spanish = Language.objects.create(user=self.user, name='Spanish')
+        to_update = create_appointment(self.user, title='Old Title')
+        to_update.languages.add(spanish)
+        to_delete = create_appointment(self.user)
+        payload = {'items': [
+            {
+                'action': 'update',
+                'id': to_update.id,
+                'data': {
+                    'title': 'New Title',
+                    'languages': [{'name': 'Thai'}],
+                },
+            },
+            {'action': 'delete', 'id': to_delete.id},
+        ]}
+
+        with self.assertMaxQueries(18):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([r['status'] for r in results], [200, 204])
+        to_update.refresh_from_db()
+        self.assertEqual(to_update.title, 'New Title')
+        self.assertEqual(to_update.time_minutes, 25)
+        self.assertEqual(
+            list(to_update.languages.values_list('name', flat=True)),
+            ['Thai'],
+        )
+        self.assertFalse(Appointment.objects.filter(id=to_delete.id).exists())
+
+    def test_invalid_item_writes_nothing(self):
+        """Test one invalid item rolls back the whole request."""
+        payload = {'items': [
+            create_payload('Valid'),
+            {'action': 'create', 'data': {'title': 'Missing fields'}},
+        ]}
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['items'][0], {})
+        self.assertIn('price', res.data['items'][1])
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_other_users_appointment_not_found(self):
+        """Test items cannot touch another user's appointments."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        appointment = create_appointment(other)
+        payload = {'items': [{'action': 'delete', 'id': appointment.id}]}
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['items'][0])
+        self.assertTrue(Appointment.objects.filter(id=appointment.id).exists())
+
+    def test_queries_do_not_grow_with_items(self):
+        """Test a bulk request runs a fixed number of queries."""
+        payload = {'items': [
+            create_payload(f'Appointment {i}', languages=[
+                {'name': f'Language {i}'},
+                {'name': 'Shared'},
+            ])
+            for i in range(50)
+        ]}
+
+        with self.assertMaxQueries(11):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Appointment.objects.count(), 50)
+        self.assertEqual(Appointment.languages.through.objects.count(), 100)
+
+    def test_mixed_field_updates_run_fixed_queries(self):
+        """Test items changing different fields share one UPDATE."""
+        fields = [
+            {'title': 'New Title'},
+            {'price': '7.00'},
+            {'time_minutes': 90},
+            {'link': 'https://example.com/a.pdf'},
+            {'description': 'Changed'},
+            {'title': 'Both', 'price': '8.00'},
+            {'time_minutes': 5, 'description': 'Short'},
+        ]
+        appointments = [create_appointment(self.user) for _ in fields]
+        payload = {'items': [
+            {'action': 'update', 'id': appointment.id, 'data': data}
+            for appointment, data in zip(appointments, fields)
+        ]}
+
+        with self.assertMaxQueries(8) as ctx:
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            query for query in ctx.captured_queries
+            if query['sql'].startswith('UPDATE "core_appointment"')
+        ]
+        self.assertEqual(len(updates), 1)
+        first, second = appointments[0], appointments[1]
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.title, 'New Title')
+        self.assertEqual(first.price, Decimal('5.25'))
+        self.assertEqual(second.title, 'Sample Appointment Title')
+        self.assertEqual(second.price, Decimal('7.00'))
+
+
+class AppointmentBulkSerializerTests(TestCase):
+    """Test writes racing a bulk request between validation and save."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.first = create_appointment(self.user, title='First')
+        self.second = create_appointment(self.user, title='Second')
+
+    def validated(self, items):
+        request = APIRequestFactory().post(BULK_URL)
+        request.user = self.user
+        serializer = AppointmentBulkSerializer(
+            data={'items': items},
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def test_only_changed_fields_written(self):
+        """Test an item does not write back fields it left alone."""
+        serializer = self.validated([
+            {'action': 'update', 'id': self.first.id,
+             'data': {'title': 'New Title'}},
+            {'action': 'update', 'id': self.second.id,
+             'data': {'price': '7.00'}},
+        ])
+        Appointment.objects.filter(id=self.first.id).update(
+            price=Decimal('99.00'),
+        )
+        Appointment.objects.filter(id=self.second.id).update(
+            title='Renamed Elsewhere',
+        )
+
+        serializer.save()
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.first.title, 'New Title')
+        self.assertEqual(self.first.price, Decimal('99.00'))
+        self.assertEqual(self.second.title, 'Renamed Elsewhere')
+        self.assertEqual(self.second.price, Decimal('7.00'))
+
+    def test_appointment_deleted_after_validation(self):
+        """Test an update of an appointment deleted meanwhile fails."""
+        serializer = self.validated([
+            create_payload('Created'),
+            {'action': 'update', 'id': self.first.id,
+             'data': {'title': 'New Title'}},
+        ])
+        self.first.delete()
+
+        with self.assertRaises(ValidationError) as cm:
+            serializer.save()
+
+        self.assertEqual(cm.exception.detail['items'][0], {})
+        self.assertIn('id', cm.exception.detail['items'][1])
+        self.assertFalse(Appointment.objects.filter(title='Created').exists())
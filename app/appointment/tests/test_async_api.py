@@ -0,0 +1,194 @@
+"""
+Tests for the async appointment and language viewsets.
+"""
+import io
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient
+
+from core.models import Appointment, Language
+from core.throttling import local_buckets
+from appointment import views
+
+sync_router = DefaultRouter()
+sync_router.register('appointments', views.AppointmentViewSet)
+sync_router.register('languages', views.LanguageViewSet)
+async_router = DefaultRouter()
+async_router.register('appointments', views.AsyncAppointmentViewSet)
+async_router.register('languages', views.AsyncLanguageViewSet)
+
+urlpatterns = [
+    path('sync/', include(sync_router.urls)),
+    path('async/', include(async_router.urls)),
+]
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_appointment(user, **params):
+    """Create and return a sample Appointment"""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+    return Appointment.objects.create(user=user, **defaults)
+
+
+def record_thread(threads, func):
+    """Wrap func to record the name of each thread it runs on."""
+    def wrapper(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsgiViewSetTests(TransactionTestCase):
+    """Test the async viewsets served under ASGI."""
+
+    def setUp(self):
+        local_buckets.clear()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.headers = {'authorization': f'Token {token.key}'}
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.async_client = AsyncClient()
+        self.appointment = create_appointment(self.user)
+        self.appointment.languages.add(
+            Language.objects.create(user=self.user, name='English'),
+        )
+        other = create_user(email='other@example.com', password='testpass123')
+        self.other_appointment = create_appointment(other)
+
+    async def test_auth_required(self):
+        """Test auth is required to call the async API."""
+        res = await self.async_client.get('/async/appointments/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_responses_match_sync(self):
+        """Test list and retrieve return what the sync views do."""
+        urls = (
+            'appointments/',
+            f'appointments/{self.appointment.id}/',
+            'languages/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                res = await self.async_client.get(
+                    f'/async/{url}',
+                    **self.headers,
+                )
+                expected = await sync_to_async(self.client.get)(
+                    f'/sync/{url}',
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json(), expected.json())
+
+    async def test_retrieve_other_users_appointment(self):
+        """Test another user's appointment is not found."""
+        res = await self.async_client.get(
+            f'/async/appointments/{self.other_appointment.id}/',
+            **self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_runs_in_database_pool(self):
+        """Test creating an appointment runs on a database pool thread."""
+        threads = []
+        perform_create = views.AppointmentViewSet.perform_create
+        payload = {
+            'title': 'Sample',
+            'time_minutes': 30,
+            'price': '5.25',
+            'languages': [{'name': 'English'}],
+        }
+
+        with patch.object(
+            views.AppointmentViewSet,
+            'perform_create',
+            record_thread(threads, perform_create),
+        ):
+            res = await self.async_client.post(
+                '/async/appointments/',
+                payload,
+                content_type='application/json',
+                **self.headers,
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json()['languages'][0]['name'], 'English')
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('async-db'))
+        exists = await sync_to_async(
+            Appointment.objects.filter(id=res.json()['id']).exists,
+        )()
+        self.assertTrue(exists)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class WsgiViewSetTests(TestCase):
+    """Test the async viewsets served under WSGI."""
+
+    def test_runs_on_request_thread(self):
+        """Test a WSGI request runs the view on its own thread."""
+        user = create_user(email='user@example.com', password='testpass123')
+        create_appointment(user)
+        client = APIClient()
+        client.force_authenticate(user)
+        threads = []
+        get_queryset = views.AppointmentViewSet.get_queryset
+
+        with patch.object(
+            views.AppointmentViewSet,
+            'get_queryset',
+            record_thread(threads, get_queryset),
+        ):
+            res = client.get('/async/appointments/')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(set(threads), {threading.current_thread().name})
+
+
+class BenchmarkAsyncCommandTests(TransactionTestCase):
+    """Test the benchmark_async command."""
+
+    def test_reports_throughput(self):
+        """Test the command reports every endpoint and cleans up."""
+        out = io.StringIO()
+        call_command(
+            'benchmark_async',
+            requests=2,
+            concurrency=2,
+            appointments=2,
+            latency=1,
+            stdout=out,
+        )
+
+        for endpoint in ('appointment list', 'appointment create'):
+            self.assertIn(endpoint, out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
@@ -0,0 +1,261 @@
+"""
+Tests for conditional requests on the appointment APIs.
+"""
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from appointment.cache import _version_key
+from appointment.serializers import AppointmentDetailSerializer
+from core.models import (
+    Appointment,
+    Language,
+)
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+LANGUAGES_URL = reverse('appointment:language-list')
+
+MSGPACK = 'application/msgpack'
+
+
+def detail_url(appointment_id):
+    """Create and return appointment detail URL."""
+    return reverse('appointment:appointment-detail', args=[appointment_id])
+
+
+def create_appointment(user, **params):
+    """Create and return a sample appointment."""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test ETag, Last-Modified and If-Match handling."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match is answered without queries."""
+        create_appointment(self.user)
+        res = self.client.get(APPOINTMENT_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(APPOINTMENT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_weak_etag_matches(self):
+        """Test If-None-Match uses weak comparison."""
+        etag = self.client.get(LANGUAGES_URL)['ETag']
+
+        res = self.client.get(LANGUAGES_URL, HTTP_IF_NONE_MATCH=f'W/{etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_changes_etag(self):
+        """Test a stale ETag gets a full response after a write."""
+        appointment = create_appointment(self.user)
+        etag = self.client.get(detail_url(appointment.id))['ETag']
+
+        appointment.languages.add(
+            Language.objects.create(user=self.user, name='Thai'),
+        )
+        res = self.client.get(
+            detail_url(appointment.id),
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data['languages'][0]['name'], 'Thai')
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since is honoured once the second is over."""
+        with patch('appointment.cache.time.time_ns', return_value=10 ** 9):
+            res = self.client.get(APPOINTMENT_URL)
+        last_modified = res['Last-Modified']
+
+        res = self.client.get(
+            APPOINTMENT_URL,
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match_stale_rejected(self):
+        """Test updating with a stale If-Match fails with 412."""
+        appointment = create_appointment(self.user)
+        etag = self.client.get(detail_url(appointment.id))['ETag']
+        create_appointment(self.user, title='Made elsewhere')
+
+        res = self.client.patch(
+            detail_url(appointment.id),
+            {'title': 'New Title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.title, 'Sample Appointment Title')
+
+    def test_if_match_checked_against_stored_version(self):
+        """Test If-Match is rejected when only the cache is stale."""
+        appointment = create_appointment(self.user)
+        key = _version_key(self.user.id)
+        etag = self.client.get(detail_url(appointment.id))['ETag']
+        stale = cache.get(key)
+        create_appointment(self.user, title='Made elsewhere')
+        # Another process whose cache missed the write.
+        cache.set(key, stale, None)
+
+        res = self.client.patch(
+            detail_url(appointment.id),
+            {'title': 'New Title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.title, 'Sample Appointment Title')
+
+    def test_if_match_current_accepted(self):
+        """Test updating with a current If-Match succeeds."""
+        appointment = create_appointment(self.user)
+        etag = self.client.get(detail_url(appointment.id))['ETag']
+
+        res = self.client.patch(
+            detail_url(appointment.id),
+            {'title': 'New Title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        res = self.client.patch(
+            detail_url(appointment.id),
+            {'title': 'Newer Title'},
+            HTTP_IF_MATCH=res['ETag'],
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_differs_by_representation(self):
+        """Test JSON and MessagePack responses have their own ETags."""
+        appointment = create_appointment(self.user)
+        json_etag = self.client.get(detail_url(appointment.id))['ETag']
+
+        res = self.client.get(
+            detail_url(appointment.id),
+            HTTP_ACCEPT=MSGPACK,
+            HTTP_IF_NONE_MATCH=json_etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], json_etag)
+
+    def test_if_match_any_representation(self):
+        """Test If-Match accepts the ETag of any current representation."""
+        appointment = create_appointment(self.user)
+        etag = self.client.get(
+            detail_url(appointment.id),
+            HTTP_ACCEPT=MSGPACK,
+        )['ETag']
+
+        res = self.client.patch(
+            detail_url(appointment.id),
+            {'title': 'New Title'},
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_match_locks_user(self):
+        """Test the If-Match check runs under a lock on the user."""
+        appointment = create_appointment(self.user)
+        etag = self.client.get(detail_url(appointment.id))['ETag']
+
+        with CaptureQueriesContext(connections['default']) as ctx:
+            self.client.patch(
+                detail_url(appointment.id),
+                {'title': 'New Title'},
+                HTTP_IF_MATCH=etag,
+            )
+
+        self.assertTrue(any(
+            'FOR UPDATE' in query['sql'] for query in ctx.captured_queries
+        ))
+
+
+class ConcurrentIfMatchTests(TransactionTestCase):
+    """Test concurrent writes sent with the same If-Match."""
+
+    def test_one_of_two_writes_succeeds(self):
+        """Test only the first of two writes with one ETag is applied."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        appointment = create_appointment(user)
+        client = APIClient()
+        client.force_authenticate(user)
+        etag = client.get(detail_url(appointment.id))['ETag']
+        update = AppointmentDetailSerializer.update
+        statuses = []
+
+        def slow_update(serializer, instance, validated_data):
+            # Leave time for the other request to pass its own check.
+            time.sleep(0.2)
+            return update(serializer, instance, validated_data)
+
+        def send(title):
+            other = APIClient()
+            other.force_authenticate(user)
+            try:
+                res = other.patch(
+                    detail_url(appointment.id),
+                    {'title': title},
+                    HTTP_IF_MATCH=etag,
+                )
+                statuses.append(res.status_code)
+            finally:
+                connections.close_all()
+
+        with patch.object(AppointmentDetailSerializer, 'update', slow_update):
+            threads = [
+                threading.Thread(target=send, args=[title])
+                for title in ('First', 'Second')
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(statuses), [
+            status.HTTP_200_OK,
+            status.HTTP_412_PRECONDITION_FAILED,
+        ])
@@ -0,0 +1,226 @@
+"""
+Tests for the streaming appointment export.
+"""
+import asyncio
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient
+
+from appointment import views
+from core.async_views import get_asgi_application
+from core.models import Appointment, Language
+from core.throttling import local_buckets
+
+EXPORT_URL = reverse('appointment:appointment-export')
+
+async_router = DefaultRouter()
+async_router.register('appointments', views.AsyncAppointmentViewSet)
+
+urlpatterns = [
+    path('api/appointment/', include('appointment.urls')),
+    path('async/', include(async_router.urls)),
+]
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_appointment(user, **params):
+    """Create and return a sample Appointment"""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+        'description': 'Sample Appointment Description',
+        'link': 'https://example.com/appointment.pdf',
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+async def asgi_get(path, headers):
+    """GET path from the ASGI application; return status and body."""
+    path, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    response = {'body': b''}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        else:
+            response['body'] += message.get('body', b'')
+
+    await get_asgi_application()(scope, receive, send)
+    return response['status'], response['body']
+
+
+class PublicExportApiTests(TestCase):
+    """Test unauthenticated export requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to export."""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    """Test authenticated export requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return res, b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Test exporting appointments as NDJSON."""
+        appointment = create_appointment(user=self.user)
+        appointment.languages.add(
+            Language.objects.create(user=self.user, name='Spanish'),
+        )
+        other_user = create_user(email='other@example.com', password='pw')
+        create_appointment(user=other_user)
+
+        res, content = self.export(format='ndjson')
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertIn('appointments.ndjson', res['Content-Disposition'])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows, [{
+            'id': appointment.id,
+            'title': appointment.title,
+            'time_minutes': appointment.time_minutes,
+            'price': '5.25',
+            'link': appointment.link,
+            'languages': [
+                {'id': appointment.languages.get().id, 'name': 'Spanish'},
+            ],
+            'description': appointment.description,
+        }])
+
+    def test_export_csv(self):
+        """Test exporting appointments as CSV."""
+        appointment = create_appointment(user=self.user, title='A, "B"')
+        appointment.languages.add(
+            Language.objects.create(user=self.user, name='Spanish'),
+            Language.objects.create(user=self.user, name='Thai'),
+        )
+
+        res, content = self.export(format='csv')
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'A, "B"')
+        self.assertEqual(rows[0]['price'], '5.25')
+        self.assertEqual(rows[0]['languages'], 'Spanish;Thai')
+
+    def test_export_empty_csv_has_header(self):
+        """Test an empty CSV export still has its header row."""
+        res, content = self.export(format='csv')
+
+        self.assertEqual(
+            content.strip(),
+            'id,title,time_minutes,price,link,languages,description',
+        )
+
+    def test_accept_header_selects_format(self):
+        """Test the Accept header picks the export format."""
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+
+    @override_settings(APPOINTMENT_EXPORT_CHUNK_SIZE=2)
+    def test_languages_fetched_per_chunk(self):
+        """Test one languages query runs per chunk of appointments."""
+        for i in range(5):
+            create_appointment(user=self.user, title=f'Appointment {i}')
+
+        with CaptureQueriesContext(connection) as context:
+            res, content = self.export(format='ndjson')
+        language_queries = [
+            query for query in context.captured_queries
+            if 'core_appointment_languages' in query['sql']
+        ]
+
+        self.assertEqual(len(content.splitlines()), 5)
+        self.assertEqual(len(language_queries), 3)
+        titles = [json.loads(line)['title'] for line in content.splitlines()]
+        self.assertEqual(titles[0], 'Appointment 4')
+
+
+@override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver'])
+class AsgiExportApiTests(TransactionTestCase):
+    """Test exports streamed through the ASGI handler."""
+
+    def setUp(self):
+        local_buckets.clear()
+        user = create_user(email='user@example.com', password='testpass123')
+        self.headers = [(
+            b'authorization',
+            f'Token {Token.objects.create(user=user).key}'.encode(),
+        )]
+        for i in range(5):
+            create_appointment(user=user, title=f'Appointment {i}')
+
+    @override_settings(APPOINTMENT_EXPORT_CHUNK_SIZE=2)
+    def test_export_streams_under_asgi(self):
+        """Test the sync and async viewsets stream exports under ASGI."""
+        for url in (EXPORT_URL, '/async/appointments/export/'):
+            with self.subTest(url=url):
+                status_code, body = asyncio.run(asgi_get(
+                    f'{url}?format=ndjson',
+                    self.headers,
+                ))
+
+                self.assertEqual(status_code, status.HTTP_200_OK)
+                titles = [
+                    json.loads(line)['title']
+                    for line in body.decode().splitlines()
+                ]
+                self.assertEqual(
+                    sorted(titles),
+                    [f'Appointment {i}' for i in range(5)],
+                )
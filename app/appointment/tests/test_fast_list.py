@@ -0,0 +1,80 @@
+"""
+Tests for the fast appointment list path.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Appointment,
+    Language,
+)
+from appointment.cache import get_data_version
+from appointment.views import AppointmentViewSet
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+
+
+class FastListTests(TestCase):
+    """Test the fast list path matches the serializer path."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        languages = [
+            Language.objects.create(user=self.user, name=name)
+            for name in ['Thai', 'Español', 'Dutch']
+        ]
+        samples = [
+            ('Plain', Decimal('5.25'), languages),
+            ('Ünïcode "quoted"', Decimal('7.5'), languages[1:2]),
+            ('No languages', Decimal('0'), []),
+        ]
+        for title, price, appointment_languages in samples:
+            appointment = Appointment.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=30,
+                price=price,
+                link='https://example.com/a.pdf',
+            )
+            appointment.languages.add(*reversed(appointment_languages))
+
+    def get_list(self, fast, **params):
+        """Return the rendered list response using either path."""
+        cache.clear()
+        with patch.object(AppointmentViewSet, 'fast_list', fast):
+            res = self.client.get(APPOINTMENT_URL, params)
+
+        return JSONRenderer().render(res.data)
+
+    def test_output_identical(self):
+        """Test both paths render byte-identical responses."""
+        self.assertEqual(self.get_list(fast=True), self.get_list(fast=False))
+
+    def test_paginated_output_identical(self):
+        """Test both paths paginate the same way."""
+        self.assertEqual(
+            self.get_list(fast=True, page_size=2),
+            self.get_list(fast=False, page_size=2),
+        )
+
+    def test_fast_list_queries(self):
+        """Test the fast path runs one query for rows, one for languages."""
+        cache.clear()
+        get_data_version(self.user.id)
+        with patch.object(AppointmentViewSet, 'fast_list', True):
+            with self.assertNumQueries(2):
+                self.client.get(APPOINTMENT_URL)
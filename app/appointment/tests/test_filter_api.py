@@ -0,0 +1,182 @@
+"""
+Tests for filtering the appointment list.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from core.models import Appointment, Language
+from appointment.views import AppointmentViewSet
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_appointment(user, **params):
+    """Create and return a sample Appointment"""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+def list_queryset(user, **params):
+    """Return the list queryset AppointmentViewSet builds for params."""
+    request = Request(APIRequestFactory().get(APPOINTMENT_URL, params))
+    request.user = user
+    view = AppointmentViewSet(
+        request=request,
+        action='list',
+        format_kwarg=None,
+    )
+    return view.get_queryset()
+
+
+class FilterApiTests(TestCase):
+    """Test the appointment list filters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pw')
+        self.client.force_authenticate(self.user)
+
+    def filter_ids(self, **params):
+        res = self.client.get(APPOINTMENT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {row['id'] for row in res.data['results']}
+
+    def test_filter_by_languages(self):
+        """Test filtering returns appointments with any given language."""
+        spanish = Language.objects.create(user=self.user, name='Spanish')
+        thai = Language.objects.create(user=self.user, name='Thai')
+        french = Language.objects.create(user=self.user, name='French')
+        both = create_appointment(user=self.user)
+        both.languages.add(spanish, thai)
+        only_thai = create_appointment(user=self.user)
+        only_thai.languages.add(thai)
+        create_appointment(user=self.user).languages.add(french)
+        create_appointment(user=self.user)
+
+        ids = self.filter_ids(languages=f'{spanish.id},{thai.id}')
+
+        self.assertEqual(ids, {both.id, only_thai.id})
+
+    def test_filter_by_price_range(self):
+        """Test price_min and price_max are inclusive bounds."""
+        create_appointment(user=self.user, price=Decimal('4.99'))
+        low = create_appointment(user=self.user, price=Decimal('5.00'))
+        high = create_appointment(user=self.user, price=Decimal('10.00'))
+        create_appointment(user=self.user, price=Decimal('10.01'))
+
+        ids = self.filter_ids(price_min='5', price_max='10.00')
+
+        self.assertEqual(ids, {low.id, high.id})
+
+    def test_filter_by_time_minutes_max(self):
+        """Test time_minutes_max filters by duration."""
+        short = create_appointment(user=self.user, time_minutes=15)
+        create_appointment(user=self.user, time_minutes=90)
+
+        self.assertEqual(self.filter_ids(time_minutes_max=30), {short.id})
+
+    def test_filters_combine(self):
+        """Test several filters narrow the list together."""
+        spanish = Language.objects.create(user=self.user, name='Spanish')
+        match = create_appointment(user=self.user, time_minutes=20)
+        match.languages.add(spanish)
+        create_appointment(user=self.user, time_minutes=60).languages.add(
+            spanish,
+        )
+
+        ids = self.filter_ids(languages=spanish.id, time_minutes_max=30)
+
+        self.assertEqual(ids, {match.id})
+
+    def test_invalid_filters_rejected(self):
+        """Test malformed filter values return 400."""
+        for params in (
+            {'languages': '1,x'},
+            {'price_min': 'cheap'},
+            {'price_max': 'NaN'},
+            {'time_minutes_max': '1.5'},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(APPOINTMENT_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(list(params)[0], res.data)
+
+
+class FilterPlanTests(TestCase):
+    """Test filter query plans against a seeded table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(email='user@example.com', password='pw')
+        other_user = create_user(email='other@example.com', password='pw')
+        appointments = Appointment.objects.bulk_create([
+            Appointment(
+                user=user,
+                title=f'Appointment {i}',
+                time_minutes=10 + i % 120,
+                price=Decimal(i % 900) + Decimal('0.50'),
+            )
+            for user in (cls.user, other_user)
+            for i in range(5000)
+        ])
+        cls.languages = [
+            Language.objects.create(user=cls.user, name=f'Language {i}')
+            for i in range(20)
+        ]
+        Through = Appointment.languages.through
+        Through.objects.bulk_create([
+            Through(
+                appointment_id=appointment.id,
+                language_id=cls.languages[i % 20].id,
+            )
+            for i, appointment in enumerate(appointments[:5000])
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_appointment')
+            cursor.execute('ANALYZE core_appointment_languages')
+
+    def explain(self, **params):
+        return list_queryset(self.user, **params).explain()
+
+    def test_languages_use_semi_join(self):
+        """Test the languages filter is an EXISTS, not a DISTINCT join."""
+        ids = f'{self.languages[0].id},{self.languages[1].id}'
+        plan = self.explain(languages=ids)
+        sql = str(list_queryset(self.user, languages=ids).query)
+
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertRegex(plan, r'Semi Join|SubPlan')
+        self.assertEqual(list_queryset(self.user, languages=ids).count(), 500)
+
+    def test_price_range_uses_index(self):
+        """Test a selective price range reads the (user, price) index."""
+        plan = self.explain(price_min='890', price_max='899')
+
+        self.assertIn('core_appt_user_price_idx', plan)
+
+    def test_time_minutes_uses_index(self):
+        """Test a selective duration reads the (user, time_minutes) index."""
+        plan = self.explain(time_minutes_max='10')
+
+        self.assertIn('core_appt_user_minutes_idx', plan)
@@ -0,0 +1,303 @@
+"""
+Tests for the bulk appointment import.
+"""
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from core.models import Appointment, Language
+from appointment.cache import get_data_version
+from appointment.importer import AppointmentImporter
+
+IMPORT_URL = reverse('appointment:appointment-import-file')
+
+CSV_FILE = (
+    'title,time_minutes,price,link,description,languages\n'
+    'First,30,5.25,https://example.com/a.pdf,"Line 1\nLine 2",Spanish;Thai\n'
+    'Second,45,10.00,,,Spanish\n'
+    'Bad,soon,5.00,,,\n'
+)
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def ndjson(*rows):
+    """Return rows encoded as NDJSON bytes."""
+    return ''.join(json.dumps(row) + '\n' for row in rows).encode()
+
+
+class AppointmentImporterTests(TestCase):
+    """Test importing appointment files."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def run_import(self, content, format, **kwargs):
+        importer = AppointmentImporter(self.user, **kwargs)
+        return importer.run(io.BytesIO(content), format)
+
+    def test_import_csv(self):
+        """Test valid CSV rows are imported with their languages."""
+        report = self.run_import(CSV_FILE.encode(), 'csv')
+
+        self.assertEqual(report['rows'], 3)
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(report['error_count'], 1)
+        self.assertEqual(report['errors'][0]['line'], 5)
+        self.assertIn('time_minutes', report['errors'][0]['errors'])
+        first = Appointment.objects.get(user=self.user, title='First')
+        self.assertEqual(first.price, Decimal('5.25'))
+        self.assertEqual(first.description, 'Line 1\nLine 2')
+        self.assertEqual(
+            sorted(first.languages.values_list('name', flat=True)),
+            ['Spanish', 'Thai'],
+        )
+        second = Appointment.objects.get(user=self.user, title='Second')
+        self.assertEqual(second.link, '')
+        self.assertEqual(
+            Language.objects.filter(user=self.user).count(),
+            2,
+        )
+
+    def test_import_ndjson(self):
+        """Test NDJSON rows are imported and bad lines reported."""
+        content = ndjson(
+            {'title': 'A "quoted" title', 'time_minutes': 10, 'price': '1.50',
+             'languages': [{'name': 'Es"pa\\nol'}, {'name': 'Thai'}]},
+            {'title': 'No price', 'time_minutes': 10},
+        ) + b'{not json\n\n[1, 2]\n'
+
+        report = self.run_import(content, 'ndjson')
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(
+            [error['line'] for error in report['errors']],
+            [2, 3, 5],
+        )
+        appointment = Appointment.objects.get(user=self.user)
+        self.assertEqual(appointment.title, 'A "quoted" title')
+        self.assertEqual(
+            sorted(appointment.languages.values_list('name', flat=True)),
+            ['Es"pa\\nol', 'Thai'],
+        )
+
+    def test_reuses_existing_languages(self):
+        """Test languages the user already has are linked, not copied."""
+        spanish = Language.objects.create(user=self.user, name='Spanish')
+        other_user = create_user(email='other@example.com', password='pw')
+        Language.objects.create(user=other_user, name='Thai')
+
+        self.run_import(CSV_FILE.encode(), 'csv', chunk_size=1)
+
+        self.assertEqual(
+            Language.objects.filter(user=self.user, name='Spanish').get(),
+            spanish,
+        )
+        self.assertEqual(spanish.appointment_set.count(), 2)
+        self.assertEqual(Language.objects.filter(name='Thai').count(), 2)
+
+    def test_ids_follow_sequence(self):
+        """Test later inserts do not collide with imported ids."""
+        self.run_import(CSV_FILE.encode(), 'csv')
+
+        appointment = Appointment.objects.create(
+            user=self.user,
+            title='After',
+            time_minutes=5,
+            price=Decimal('1.00'),
+        )
+
+        self.assertEqual(
+            appointment.id,
+            Appointment.objects.order_by('-id').values_list(
+                'id', flat=True,
+            )[0],
+        )
+        self.assertEqual(Appointment.objects.count(), 3)
+
+    def test_max_errors(self):
+        """Test only max_errors errors are kept but all are counted."""
+        content = ndjson(*[{'title': 'x'} for _ in range(5)])
+
+        report = self.run_import(content, 'ndjson', max_errors=2)
+
+        self.assertEqual(report['error_count'], 5)
+        self.assertEqual(len(report['errors']), 2)
+
+    def test_csv_invalid_utf8_row(self):
+        """Test a row that is not UTF-8 is reported, not imported."""
+        content = (
+            b'title,time_minutes,price\n'
+            b'Caf\xe9,30,5.25\n'
+            b'Second,45,10.00\n'
+        )
+
+        report = self.run_import(content, 'csv')
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(report['errors'][0]['line'], 2)
+        self.assertEqual(
+            Appointment.objects.get(user=self.user).title,
+            'Second',
+        )
+
+    def test_csv_nul_byte_row(self):
+        """Test a row with a NUL byte is reported, not imported."""
+        content = (
+            b'title,time_minutes,price\n'
+            b'Fir\x00st,30,5.25\n'
+            b'Second,45,10.00\n'
+        )
+
+        report = self.run_import(content, 'csv')
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(report['errors'][0]['line'], 2)
+
+    def test_csv_invalid_header_rejected(self):
+        """Test a header that is not UTF-8 rejects the file."""
+        with self.assertRaises(ValidationError):
+            self.run_import(b'titl\xe9,time_minutes,price\n', 'csv')
+
+    def test_import_bumps_data_version(self):
+        """Test an import invalidates cached lists."""
+        version = get_data_version(self.user.id)
+
+        self.run_import(CSV_FILE.encode(), 'csv')
+
+        self.assertNotEqual(get_data_version(self.user.id), version)
+
+
+class ImportApiTests(TestCase):
+    """Test the upload endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_upload_csv(self):
+        """Test uploading a CSV file imports it."""
+        upload = SimpleUploadedFile('appointments.csv', CSV_FILE.encode())
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 2)
+        self.assertEqual(res.data['error_count'], 1)
+        self.assertEqual(Appointment.objects.filter(user=self.user).count(), 2)
+
+    def test_upload_with_explicit_format(self):
+        """Test the format field overrides the file name."""
+        upload = SimpleUploadedFile(
+            'appointments.txt',
+            ndjson({'title': 'A', 'time_minutes': 5, 'price': '1.00'}),
+        )
+
+        res = self.client.post(IMPORT_URL, {
+            'file': upload,
+            'format': 'ndjson',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 1)
+
+    def test_unknown_format_rejected(self):
+        """Test a file of unknown format is rejected."""
+        upload = SimpleUploadedFile('appointments.txt', b'title')
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('format', res.data)
+
+    def test_unparseable_csv_rejected(self):
+        """Test a file csv cannot parse is refused with 400."""
+        content = b'title,time_minutes,price\n"' + b'x' * 200000 + b'",5,1\n'
+        upload = SimpleUploadedFile('appointments.csv', content)
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('file', res.data)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_auth_required(self):
+        """Test auth is required to import."""
+        res = APIClient().post(IMPORT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ImportCommandTests(TestCase):
+    """Test the import_appointments command."""
+
+    def setUp(self):
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as stream:
+            stream.write(CSV_FILE)
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_file(self):
+        """Test the command imports a file and reports throughput."""
+        out, err = io.StringIO(), io.StringIO()
+
+        call_command(
+            'import_appointments',
+            self.path,
+            email=self.user.email,
+            stdout=out,
+            stderr=err,
+        )
+
+        self.assertIn('Imported 2 of 3 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertIn('Line 5', err.getvalue())
+        self.assertEqual(Appointment.objects.filter(user=self.user).count(), 2)
+
+    def test_unknown_user(self):
+        """Test the command fails for an unknown user."""
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_appointments',
+                self.path,
+                email='nobody@example.com',
+            )
+
+    def test_invalid_file(self):
+        """Test the command fails for a file it cannot read."""
+        with open(self.path, 'wb') as stream:
+            stream.write(b'titl\xe9,time_minutes,price\n')
+
+        with self.assertRaisesMessage(CommandError, 'not valid UTF-8'):
+            call_command(
+                'import_appointments',
+                self.path,
+                email=self.user.email,
+            )
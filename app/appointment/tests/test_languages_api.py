@@ -56,7 +56,7 @@ class PrivateLanguagesApiTests(TestCase):
         languages = Language.objects.all().order_by('-name')
         serializer = LanguageSerializer(languages, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test list of languages is limited to authenticated user."""
@@ -67,9 +67,26 @@ class PrivateLanguagesApiTests(TestCase):
         res = self.client.get(LANGUAGES_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], language.name)
-        self.assertEqual(res.data[0]['id'], language.id)
+        results = res.data['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['name'], language.name)
+        self.assertEqual(results[0]['id'], language.id)
+
+    def test_languages_paginated_by_cursor(self):
+        """Test walking the language list one page at a time."""
+        for name in ['Arabic', 'Dutch', 'Greek']:
+            Language.objects.create(user=self.user, name=name)
+
+        res = self.client.get(LANGUAGES_URL, {'page_size': 2})
+
+        names = [item['name'] for item in res.data['results']]
+        self.assertEqual(names, ['Greek', 'Dutch'])
+
+        res = self.client.get(res.data['next'])
+
+        names = [item['name'] for item in res.data['results']]
+        self.assertEqual(names, ['Arabic'])
+        self.assertIsNone(res.data['next'])
 
     def test_update_language(self):
         """Test updating a language"""
@@ -83,6 +100,18 @@ class PrivateLanguagesApiTests(TestCase):
         language.refresh_from_db()
         self.assertEqual(language.name, payload['name'])
 
+    def test_update_language_to_existing_name_error(self):
+        """Test renaming a language to a name already in use fails."""
+        Language.objects.create(user=self.user, name='Spanish')
+        language = Language.objects.create(user=self.user, name='Spansh')
+
+        url = detail_url(language.id)
+        res = self.client.patch(url, {'name': 'Spanish'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        language.refresh_from_db()
+        self.assertEqual(language.name, 'Spansh')
+
     def test_delete_language(self):
         """Test deleting a language."""
         language = Language.objects.create(user=self.user, name='British')
@@ -0,0 +1,169 @@
+"""
+Tests for the per-user appointment list cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    Appointment,
+    Language,
+)
+from appointment.cache import (
+    _version_key,
+    bump_data_version,
+    get_data_version,
+    get_stored_data_version,
+)
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+LANGUAGES_URL = reverse('appointment:language-list')
+
+
+def create_appointment(user, **params):
+    """Create and return a sample appointment."""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+def titles(res):
+    """Return the titles in a list response."""
+    return [item['title'] for item in res.data['results']]
+
+
+class AppointmentListCacheTests(TestCase):
+    """Test cached list responses and their invalidation."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeat_list_served_from_cache(self):
+        """Test a repeated list request runs no queries."""
+        create_appointment(self.user)
+        first = self.client.get(APPOINTMENT_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(APPOINTMENT_URL)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_query_string_is_part_of_key(self):
+        """Test different pages are cached separately."""
+        create_appointment(self.user, title='First')
+        create_appointment(self.user, title='Second')
+
+        self.client.get(APPOINTMENT_URL, {'page_size': 1})
+        res = self.client.get(APPOINTMENT_URL, {'page_size': 2})
+
+        self.assertEqual(titles(res), ['Second', 'First'])
+
+    def test_create_invalidates(self):
+        """Test creating an appointment invalidates the list."""
+        self.client.get(APPOINTMENT_URL)
+
+        payload = {'title': 'New', 'time_minutes': 5, 'price': '1.00'}
+        self.client.post(APPOINTMENT_URL, payload)
+        res = self.client.get(APPOINTMENT_URL)
+
+        self.assertEqual(titles(res), ['New'])
+
+    def test_delete_invalidates(self):
+        """Test deleting an appointment invalidates the list."""
+        appointment = create_appointment(self.user)
+        self.client.get(APPOINTMENT_URL)
+
+        appointment.delete()
+        res = self.client.get(APPOINTMENT_URL)
+
+        self.assertEqual(titles(res), [])
+
+    def test_language_changes_invalidate(self):
+        """Test adding and renaming languages invalidates both lists."""
+        appointment = create_appointment(self.user)
+        language = Language.objects.create(user=self.user, name='Spansh')
+        self.client.get(APPOINTMENT_URL)
+        self.client.get(LANGUAGES_URL)
+
+        appointment.languages.add(language)
+        res = self.client.get(APPOINTMENT_URL)
+        self.assertEqual(
+            res.data['results'][0]['languages'],
+            [{'id': language.id, 'name': 'Spansh'}],
+        )
+
+        language.name = 'Spanish'
+        language.save()
+        res = self.client.get(APPOINTMENT_URL)
+        self.assertEqual(
+            res.data['results'][0]['languages'][0]['name'],
+            'Spanish',
+        )
+        res = self.client.get(LANGUAGES_URL)
+        self.assertEqual(res.data['results'][0]['name'], 'Spanish')
+
+    def test_bulk_invalidates(self):
+        """Test the bulk endpoint invalidates the list."""
+        self.client.get(APPOINTMENT_URL)
+
+        payload = {'items': [{
+            'action': 'create',
+            'data': {'title': 'Bulk', 'time_minutes': 5, 'price': '1.00'},
+        }]}
+        self.client.post(
+            reverse('appointment:appointment-bulk'),
+            payload,
+            format='json',
+        )
+        res = self.client.get(APPOINTMENT_URL)
+
+        self.assertEqual(titles(res), ['Bulk'])
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached lists."""
+        create_appointment(self.user, title='Mine')
+        self.client.get(APPOINTMENT_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+
+        res = client.get(APPOINTMENT_URL)
+
+        self.assertEqual(titles(res), [])
+
+    def test_version_cached_on_commit(self):
+        """Test the stored version is cached when the write commits."""
+        key = _version_key(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(self.user.id)
+            self.assertIsNone(cache.get(key))
+
+        self.assertEqual(cache.get(key), get_stored_data_version(self.user.id))
+
+    def test_version_read_from_user_on_cache_miss(self):
+        """Test a cold cache falls back to the version on the user row."""
+        bump_data_version(self.user.id)
+        cache.clear()
+
+        self.user.refresh_from_db()
+        version = get_data_version(self.user.id)
+
+        self.assertEqual(version, self.user.data_version)
@@ -0,0 +1,116 @@
+"""
+Tests for MessagePack requests and responses on the API.
+"""
+from decimal import Decimal
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Appointment, Language
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+LANGUAGES_URL = reverse('appointment:language-list')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+MSGPACK = 'application/msgpack'
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class MessagePackApiTests(TestCase):
+    """Test the API speaks MessagePack."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_appointments(self):
+        """Test listing appointments as MessagePack."""
+        appointment = Appointment.objects.create(
+            user=self.user,
+            title='Sample Appointment',
+            time_minutes=25,
+            price=Decimal('5.25'),
+        )
+        appointment.languages.add(
+            Language.objects.create(user=self.user, name='Spanish'),
+        )
+
+        res = self.client.get(APPOINTMENT_URL, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data['results'][0]['title'], 'Sample Appointment')
+        self.assertEqual(data['results'][0]['price'], '5.25')
+        self.assertEqual(
+            data['results'][0]['languages'][0]['name'],
+            'Spanish',
+        )
+
+    def test_format_query_parameter(self):
+        """Test ?format=msgpack selects MessagePack."""
+        res = self.client.get(LANGUAGES_URL, {'format': 'msgpack'})
+
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        self.assertEqual(msgpack.unpackb(res.content)['results'], [])
+
+    def test_create_appointment(self):
+        """Test creating an appointment from a MessagePack body."""
+        payload = {
+            'title': 'Sample Appointment',
+            'time_minutes': 30,
+            'price': '5.99',
+            'languages': [{'name': 'Thai'}],
+        }
+
+        res = self.client.post(APPOINTMENT_URL, payload, format='msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        appointment = Appointment.objects.get(id=res.data['id'])
+        self.assertEqual(appointment.price, Decimal('5.99'))
+        self.assertEqual(appointment.languages.get().name, 'Thai')
+
+    def test_invalid_body_returns_400(self):
+        """Test a malformed MessagePack body is rejected."""
+        res = self.client.post(
+            APPOINTMENT_URL,
+            b'\xc1',
+            content_type=MSGPACK,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_user(self):
+        """Test updating the user from a MessagePack body."""
+        res = self.client.patch(ME_URL, {'name': 'New'}, format='msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New')
+
+    def test_create_token(self):
+        """Test obtaining a token with a MessagePack body."""
+        client = APIClient()
+        res = client.post(
+            TOKEN_URL,
+            {'email': 'user@example.com', 'password': 'testpass123'},
+            format='msgpack',
+            HTTP_ACCEPT=MSGPACK,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', msgpack.unpackb(res.content))
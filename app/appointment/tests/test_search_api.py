@@ -0,0 +1,189 @@
+"""
+Tests for full-text search on the appointment list.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Appointment
+from appointment.search import FullTextSearchFilter
+
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_appointment(user, **params):
+    """Create and return a sample Appointment"""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+class SearchVectorTests(TestCase):
+    """Test the search vector is kept in sync by the database."""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com', password='pw')
+
+    def test_vector_set_on_insert(self):
+        """Test title and description lexemes are stored on insert."""
+        appointment = create_appointment(
+            user=self.user,
+            title='Spanish lessons',
+            description='Grammar practice',
+        )
+        appointment.refresh_from_db()
+
+        self.assertEqual(
+            appointment.search_vector,
+            "'grammar':3B 'lesson':2A 'practic':4B 'spanish':1A",
+        )
+
+    def test_vector_updated_with_title(self):
+        """Test the vector follows title changes, including bulk ones."""
+        appointment = create_appointment(user=self.user, title='Spanish')
+
+        Appointment.objects.filter(id=appointment.id).update(title='Thai')
+        appointment.refresh_from_db()
+
+        self.assertEqual(appointment.search_vector, "'thai':1A")
+
+
+class SearchApiTests(TestCase):
+    """Test ?search= on the appointment list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pw')
+        self.client.force_authenticate(self.user)
+
+    def search(self, terms, **params):
+        res = self.client.get(APPOINTMENT_URL, {'search': terms, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_search_ranks_title_matches_first(self):
+        """Test matches are returned best first."""
+        in_description = create_appointment(
+            user=self.user,
+            title='Weekly call',
+            description='Review the Spanish homework',
+        )
+        in_title = create_appointment(user=self.user, title='Spanish class')
+        create_appointment(user=self.user, title='Thai class')
+        other_user = create_user(email='other@example.com', password='pw')
+        create_appointment(user=other_user, title='Spanish class')
+
+        res = self.search('spanish')
+
+        self.assertEqual(
+            [row['id'] for row in res.data['results']],
+            [in_title.id, in_description.id],
+        )
+
+    def test_search_stems_and_excludes(self):
+        """Test stemming and web search syntax."""
+        lessons = create_appointment(user=self.user, title='Spanish lessons')
+        create_appointment(user=self.user, title='Spanish lesson online')
+
+        res = self.search('lesson -online')
+
+        self.assertEqual(
+            [row['id'] for row in res.data['results']],
+            [lessons.id],
+        )
+
+    def test_search_pages(self):
+        """Test ranked results are paged with next and previous links."""
+        for i in range(3):
+            create_appointment(user=self.user, title=f'Lesson {i}')
+
+        first = self.search('lesson', page_size=2)
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(len(second.data['results']), 1)
+        self.assertIsNone(second.data['next'])
+        self.assertIsNotNone(second.data['previous'])
+        ids = [row['id'] for row in first.data['results']]
+        ids += [row['id'] for row in second.data['results']]
+        self.assertEqual(len(set(ids)), 3)
+
+    def test_invalid_page(self):
+        """Test a bad page number returns 404."""
+        res = self.client.get(APPOINTMENT_URL, {'search': 'x', 'page': 'a'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_blank_search_lists_everything(self):
+        """Test an empty search term does not filter."""
+        create_appointment(user=self.user)
+
+        res = self.search(' ')
+
+        self.assertEqual(len(res.data['results']), 1)
+
+
+class SearchPlanTests(TestCase):
+    """Test search query plans against a seeded table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(email='user@example.com', password='pw')
+        other_user = create_user(email='other@example.com', password='pw')
+        Appointment.objects.bulk_create([
+            Appointment(
+                user=user,
+                title=f'Weekly call {i}',
+                description='Review homework and plan the next session',
+                time_minutes=30,
+                price=Decimal('5.00'),
+            )
+            for user in (cls.user, other_user)
+            for i in range(5000)
+        ] + [
+            Appointment(
+                user=cls.user,
+                title='Spanish exam',
+                time_minutes=60,
+                price=Decimal('9.00'),
+            )
+            for i in range(5)
+        ])
+        with connection.cursor() as cursor:
+            # Move rows out of the GIN pending list as VACUUM would.
+            cursor.execute(
+                "SELECT gin_clean_pending_list('core_appt_search_idx')",
+            )
+            cursor.execute('ANALYZE core_appointment')
+
+    def test_search_uses_gin_index(self):
+        """Test a selective search is answered from the GIN index."""
+        request = type('Request', (), {'query_params': {'search': 'exam'}})
+        queryset = FullTextSearchFilter().filter_queryset(
+            request,
+            Appointment.objects.filter(user=self.user),
+            None,
+        )
+
+        plan = queryset.explain()
+
+        self.assertIn('core_appt_search_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
+        self.assertEqual(queryset.count(), 5)
@@ -0,0 +1,211 @@
+"""
+Tests for the appointment statistics endpoint.
+"""
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Appointment, AppointmentStats, Language
+from core.query_budget import QueryBudgetTestMixin
+from appointment.importer import AppointmentImporter
+from appointment.stats import get_stats
+
+STATS_URL = reverse('appointment:stats')
+APPOINTMENT_URL = reverse('appointment:appointment-list')
+BULK_URL = reverse('appointment:appointment-bulk')
+
+
+def detail_url(appointment_id):
+    """Create and return appointment detail URL."""
+    return reverse('appointment:appointment-detail', args=[appointment_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_appointment(user, **params):
+    """Create and return a sample Appointment"""
+    defaults = {
+        'title': 'Sample Appointment Title',
+        'time_minutes': 25,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Appointment.objects.create(user=user, **defaults)
+
+
+class PublicStatsApiTests(TestCase):
+    """Test unauthenticated stats requests."""
+
+    def test_auth_required(self):
+        """Test auth is required for stats."""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateStatsApiTests(QueryBudgetTestMixin, TestCase):
+    """Test the stats endpoint and the summary it reads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='pw')
+        self.client.force_authenticate(self.user)
+
+    def assertStatsMatchTables(self):
+        """Assert the summary equals a rebuild from the raw tables."""
+        incremental = get_stats(self.user)
+        call_command('rebuild_appointment_stats', stdout=io.StringIO())
+        self.assertEqual(incremental, get_stats(self.user))
+
+    def test_empty_stats(self):
+        """Test a user without appointments gets zeros."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'appointment_count': 0,
+            'total_price': '0.00',
+            'average_price': None,
+            'total_minutes': 0,
+            'languages': [],
+        })
+
+    def test_stats_follow_api_writes(self):
+        """Test creates, updates and deletes through the API are counted."""
+        payload = {
+            'title': 'Spanish',
+            'time_minutes': 30,
+            'price': '10.00',
+            'languages': [{'name': 'Spanish'}, {'name': 'Thai'}],
+        }
+        first = self.client.post(APPOINTMENT_URL, payload, format='json')
+        payload.update(price='5.00', languages=[{'name': 'Thai'}])
+        second = self.client.post(APPOINTMENT_URL, payload, format='json')
+        create_appointment(user=self.user, price=Decimal('1.00'))
+        self.client.patch(
+            detail_url(first.data['id']),
+            {'time_minutes': 60, 'languages': [{'name': 'Thai'}]},
+            format='json',
+        )
+        self.client.delete(detail_url(second.data['id']))
+        other_user = create_user(email='other@example.com', password='pw')
+        create_appointment(user=other_user)
+
+        res = self.client.get(STATS_URL)
+
+        thai = Language.objects.get(user=self.user, name='Thai')
+        self.assertEqual(res.data, {
+            'appointment_count': 2,
+            'total_price': '11.00',
+            'average_price': '5.50',
+            'total_minutes': 85,
+            'languages': [
+                {'id': thai.id, 'name': 'Thai', 'appointment_count': 1},
+            ],
+        })
+        self.assertStatsMatchTables()
+
+    def test_stats_follow_bulk_writes(self):
+        """Test bulk creates, updates and deletes are counted."""
+        existing = create_appointment(user=self.user)
+        removed = create_appointment(user=self.user)
+        self.client.post(BULK_URL, {'items': [
+            {'action': 'create', 'data': {
+                'title': 'New', 'time_minutes': 10, 'price': '2.00',
+                'languages': [{'name': 'French'}],
+            }},
+            {'action': 'update', 'id': existing.id, 'data': {
+                'price': '3.00', 'languages': [{'name': 'French'}],
+            }},
+            {'action': 'delete', 'id': removed.id},
+        ]}, format='json')
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['appointment_count'], 2)
+        self.assertEqual(res.data['total_price'], '5.00')
+        self.assertEqual(res.data['languages'][0]['appointment_count'], 2)
+        self.assertStatsMatchTables()
+
+    def test_stats_follow_copy_import(self):
+        """Test rows loaded by the COPY importer are counted."""
+        content = (
+            'title,time_minutes,price,languages\n'
+            'A,10,1.00,Thai\n'
+            'B,20,2.00,Thai;French\n'
+        ).encode()
+
+        AppointmentImporter(self.user).run(io.BytesIO(content), 'csv')
+
+        stats = get_stats(self.user)
+        self.assertEqual(stats['appointment_count'], 2)
+        self.assertEqual(stats['total_minutes'], 30)
+        self.assertEqual(
+            [(row['name'], row['appointment_count'])
+             for row in stats['languages']],
+            [('French', 1), ('Thai', 2)],
+        )
+        self.assertStatsMatchTables()
+
+    def test_language_delete_removes_counts(self):
+        """Test deleting a language drops it from the stats."""
+        appointment = create_appointment(user=self.user)
+        language = Language.objects.create(user=self.user, name='Thai')
+        appointment.languages.add(language)
+
+        language.delete()
+
+        self.assertEqual(get_stats(self.user)['languages'], [])
+        self.assertStatsMatchTables()
+
+    def test_user_delete_removes_stats(self):
+        """Test deleting a user deletes their summary rows."""
+        create_appointment(user=self.user).languages.add(
+            Language.objects.create(user=self.user, name='Thai'),
+        )
+
+        self.user.delete()
+
+        self.assertFalse(AppointmentStats.objects.exists())
+
+    def test_read_is_constant_in_appointments(self):
+        """Test stats are read with the same queries for any volume."""
+        Appointment.objects.bulk_create([
+            Appointment(
+                user=self.user,
+                title=f'Appointment {i}',
+                time_minutes=1,
+                price=Decimal('1.00'),
+            )
+            for i in range(500)
+        ])
+
+        with self.assertMaxQueries(2):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['appointment_count'], 500)
+        self.assertEqual(res.data['total_minutes'], 500)
+
+    def test_rebuild_command_repairs_stats(self):
+        """Test the rebuild command recomputes a damaged summary."""
+        create_appointment(user=self.user, price=Decimal('2.50'))
+        AppointmentStats.objects.filter(user=self.user).update(
+            appointment_count=99,
+        )
+        out = io.StringIO()
+
+        call_command('rebuild_appointment_stats', stdout=out)
+
+        self.assertEqual(get_stats(self.user)['appointment_count'], 1)
+        self.assertIn('Rebuilt statistics for 1 users', out.getvalue())
@@ -1,6 +1,7 @@
 """
 URL mappings for the appointment app.
 """
+from django.conf import settings
 from django.urls import (
     path,
     include,
@@ -11,11 +12,16 @@ from rest_framework.routers import DefaultRouter
 from appointment import views
 
 router = DefaultRouter()
-router.register('appointments', views.AppointmentViewSet)
-router.register('languages', views.LanguageViewSet)
+if settings.ASYNC_VIEWS:
+    router.register('appointments', views.AsyncAppointmentViewSet)
+    router.register('languages', views.AsyncLanguageViewSet)
+else:
+    router.register('appointments', views.AppointmentViewSet)
+    router.register('languages', views.LanguageViewSet)
 
 app_name = 'appointment'
 
 urlpatterns = [
+    path('stats/', views.AppointmentStatsView.as_view(), name='stats'),
     path("", include(router.urls))
 ]
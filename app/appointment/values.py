@@ -0,0 +1,81 @@
+"""
+Read-only fast path for appointment lists.
+
+Builds the same output as AppointmentSerializer straight from .values()
+rows plus one query for every row's languages, skipping model
+instantiation and per-field serializer dispatch.
+"""
+from collections import defaultdict
+
+from rest_framework.response import Response
+
+from core.models import Appointment
+from appointment.serializers import AppointmentSerializer
+
+
+def get_languages_by_appointment(appointment_ids):
+    """Return {appointment id: [language dicts]} in one query."""
+    languages = defaultdict(list)
+    rows = Appointment.languages.through.objects.filter(
+        appointment_id__in=appointment_ids,
+    ).order_by('language_id').values_list(
+        'appointment_id',
+        'language_id',
+        'language__name',
+    )
+    for appointment_id, language_id, name in rows:
+        languages[appointment_id].append({'id': language_id, 'name': name})
+
+    return languages
+
+
+class AppointmentValuesSerializer:
+    """Serialize .values() rows exactly like AppointmentSerializer."""
+    serializer_class = AppointmentSerializer
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def value_fields(cls):
+        """Return the model fields to select with .values()."""
+        return [
+            field for field in cls.serializer_class.Meta.fields
+            if field != 'languages'
+        ]
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        languages = get_languages_by_appointment([row['id'] for row in rows])
+        price = self.serializer_class().fields['price']
+        for row in rows:
+            row['price'] = price.to_representation(row['price'])
+            row['languages'] = languages.get(row['id'], [])
+
+        return rows
+
+
+class FastListMixin:
+    """Opt-in .values() based list action for a viewset.
+
+    Set fast_list to True and values_serializer_class to a class with
+    value_fields() and a data property. Other actions are unaffected.
+    """
+    fast_list = False
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list:
+            return super().list(request, *args, **kwargs)
+
+        serializer_class = self.values_serializer_class
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None,
+        ).values(*serializer_class.value_fields())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page).data)
+
+        return Response(serializer_class(queryset).data)
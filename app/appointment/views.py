@@ -1,32 +1,198 @@
 """
 Views for the Appointment APIs.
 """
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from django.utils.translation import gettext as _
+
+from drf_spectacular.utils import (
+    extend_schema_view,
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
 from rest_framework import (
+    generics,
     viewsets,
     mixins,
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from core.async_views import AsyncViewSetMixin, streaming_response
+from core.authentication import CachedTokenAuthentication
 from core.models import Appointment, Language
+from core.query_budget import QueryBudgetMixin
+from core.renderers import CSVRenderer, NDJSONRenderer
+from core.throttling import IPRateThrottle, TokenRateThrottle
 from appointment import serializers
+from appointment.cache import CachedListMixin
+from appointment.conditional import ConditionalRequestMixin
+from appointment.export import AppointmentExportSerializer, iter_export_chunks
+from appointment.importer import (
+    AppointmentImporter,
+    AppointmentImportSerializer,
+)
+from appointment.values import AppointmentValuesSerializer, FastListMixin
+from appointment.pagination import (
+    AppointmentPagination,
+    LanguagePagination,
+    RankedPagination,
+)
+from appointment.search import FullTextSearchFilter
+from appointment.stats import get_stats
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'languages',
+                OpenApiTypes.STR,
+                description='Comma separated list of language IDs to filter',
+            ),
+            OpenApiParameter(
+                'price_min',
+                OpenApiTypes.DECIMAL,
+                description='Lowest price to include',
+            ),
+            OpenApiParameter(
+                'price_max',
+                OpenApiTypes.DECIMAL,
+                description='Highest price to include',
+            ),
+            OpenApiParameter(
+                'time_minutes_max',
+                OpenApiTypes.INT,
+                description='Longest duration in minutes to include',
+            ),
+        ]
+    )
+)
+class AppointmentViewSet(
+    QueryBudgetMixin,
+    ConditionalRequestMixin,
+    CachedListMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     """View for Manage Appointment APIs"""
     serializer_class = serializers.AppointmentDetailSerializer
     queryset = Appointment.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenRateThrottle, IPRateThrottle]
+    pagination_class = AppointmentPagination
+    filter_backends = [FullTextSearchFilter]
+    fast_list = settings.APPOINTMENT_FAST_LIST
+    values_serializer_class = AppointmentValuesSerializer
+    query_budgets = {
+        'list': 4,
+        'retrieve': 4,
+        'create': 10,
+        'update': 12,
+        'partial_update': 12,
+        'destroy': 5,
+        'bulk': 18,
+    }
+
+    @property
+    def paginator(self):
+        """Page search results by rank, everything else by keyset."""
+        if not hasattr(self, '_paginator') and (
+            FullTextSearchFilter().get_search_terms(self.request)
+        ):
+            self._paginator = RankedPagination()
+        return super().paginator
+
+    def _params_to_ints(self, name, qs):
+        """Convert a comma separated list of strings to integers."""
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {name: [_('Enter a comma separated list of IDs.')]}
+            )
+
+    def _param_to_int(self, name, value):
+        """Convert a query parameter to an integer."""
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: [_('A valid integer is required.')]})
+
+    def _param_to_decimal(self, name, value):
+        """Convert a query parameter to a finite Decimal."""
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            number = None
+        if number is None or not number.is_finite():
+            raise ValidationError({name: [_('A valid number is required.')]})
+        return number
+
+    def _filter_queryset_params(self, queryset):
+        """Apply the language, price and duration query parameters."""
+        params = self.request.query_params
+        languages = params.get('languages')
+        price_min = params.get('price_min')
+        price_max = params.get('price_max')
+        time_minutes_max = params.get('time_minutes_max')
+
+        if languages:
+            language_ids = self._params_to_ints('languages', languages)
+            # A semi-join returns each appointment once, without the
+            # DISTINCT a join on the through table would need.
+            queryset = queryset.filter(Exists(
+                Appointment.languages.through.objects.filter(
+                    appointment_id=OuterRef('pk'),
+                    language_id__in=language_ids,
+                )
+            ))
+        if price_min:
+            queryset = queryset.filter(
+                price__gte=self._param_to_decimal('price_min', price_min),
+            )
+        if price_max:
+            queryset = queryset.filter(
+                price__lte=self._param_to_decimal('price_max', price_max),
+            )
+        if time_minutes_max:
+            queryset = queryset.filter(time_minutes__lte=self._param_to_int(
+                'time_minutes_max',
+                time_minutes_max,
+            ))
+
+        return queryset
 
     def get_queryset(self):
         """Retrieve appointments for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self._filter_queryset_params(
+            self.queryset.filter(user=self.request.user),
+        )
+        if self.action != 'destroy':
+            queryset = queryset.prefetch_related(Prefetch(
+                'languages',
+                queryset=Language.objects.order_by('id'),
+            ))
+
+        return queryset.order_by('-id')
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
             return serializers.AppointmentSerializer
+        elif self.action == 'bulk':
+            return serializers.AppointmentBulkSerializer
+        elif self.action == 'import_file':
+            return AppointmentImportSerializer
 
         return self.serializer_class
 
@@ -34,8 +200,65 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """Create a new appointment"""
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        """Create, update and delete many appointments at once."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='import',
+        parser_classes=[MultiPartParser],
+    )
+    def import_file(self, request):
+        """Import appointments from an uploaded CSV or NDJSON file."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = AppointmentImporter(request.user).run(
+            serializer.validated_data['file'],
+            serializer.validated_data['format'],
+        )
+
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream every appointment of the user as NDJSON or CSV."""
+        renderer = request.accepted_renderer
+        chunks = iter_export_chunks(
+            self.get_queryset(),
+            settings.APPOINTMENT_EXPORT_CHUNK_SIZE,
+            language_names=renderer.format == 'csv',
+        )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        response = streaming_response(
+            request,
+            renderer.render_stream(
+                chunks,
+                header=AppointmentExportSerializer.field_names(),
+            ),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="appointments.{renderer.format}"'
+        )
+        return response
+
 
 class LanguageViewSet(
+    ConditionalRequestMixin,
+    CachedListMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
@@ -44,12 +267,43 @@ class LanguageViewSet(
     """Manage Languages in the database."""
     serializer_class = serializers.LanguageSerializer
     queryset = Language.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenRateThrottle, IPRateThrottle]
+    pagination_class = LanguagePagination
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
         return self.queryset.filter(user=self.request.user).order_by('-name')
 
+    def perform_update(self, serializer):
+        """Update a language, rejecting names the user already has."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError(
+                {'name': [_('You already have a language with this name.')]}
+            )
 
 
+class AsyncAppointmentViewSet(AsyncViewSetMixin, AppointmentViewSet):
+    """AppointmentViewSet as a coroutine view, for ASGI."""
+
+
+class AsyncLanguageViewSet(AsyncViewSetMixin, LanguageViewSet):
+    """LanguageViewSet as a coroutine view, for ASGI."""
+
+
+class AppointmentStatsView(QueryBudgetMixin, generics.GenericAPIView):
+    """Show totals over the authenticated user's appointments."""
+    serializer_class = serializers.AppointmentStatsSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [TokenRateThrottle, IPRateThrottle]
+    query_budgets = {'get': 2}
+
+    def get(self, request):
+        """Return the user's appointment statistics."""
+        serializer = self.get_serializer(get_stats(request.user))
+        return Response(serializer.data)
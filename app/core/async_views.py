@@ -0,0 +1,243 @@
+"""
+Async DRF viewsets for serving the API under ASGI.
+
+Django 3.2 runs a sync view for an ASGI request on one thread shared by
+every request, so concurrent requests queue behind each other's database
+waits. AsyncViewSetMixin turns a viewset into a coroutine view whose
+blocking work (DRF's dispatch and rendering the response) runs as one
+call on a pool of ASYNC_DB_THREADS threads, so requests wait on the
+database side by side.
+
+Django 3.2 has no async ORM, so the ORM still runs in threads; the pool
+is as close to async-native as this Django version allows.
+
+Django 3.2 also iterates streaming responses on the event loop, where
+the ORM refuses to run. AsyncStreamingHttpResponse streams an async
+iterator instead, and needs the ASGIHandler below to be served.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers import asgi
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connections
+from django.http import StreamingHttpResponse
+from django.utils.decorators import classonlymethod
+
+database_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_THREADS,
+    thread_name_prefix='async-db',
+)
+
+
+def _run_in_pool(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(request, func, *args, **kwargs):
+    """Run a blocking call for request off the event loop.
+
+    ASGI requests use the database pool, in a copy of the caller's
+    context so context variables such as replica pinning carry over.
+    Anything else (a WSGI request run through async_to_sync) stays on
+    the request's own thread, which keeps its connection and any open
+    transaction.
+    """
+    if isinstance(request, ASGIRequest):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            database_executor,
+            functools.partial(
+                context.run, _run_in_pool, func, *args, **kwargs,
+            ),
+        )
+    return await sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+
+class AsyncViewSetMixin:
+    """Serve a DRF viewset as a coroutine view.
+
+    Behaviour is that of the sync viewset: the same authentication,
+    permission, throttle, conditional request and query budget checks
+    run before the same handlers.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        # Keep cls, initkwargs, actions and csrf_exempt for DRF's
+        # routers and schema generation.
+        async_view.__dict__.update(view.__dict__)
+        return async_view
+
+    def _dispatch_and_render(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        return await run_blocking(
+            request,
+            self._dispatch_and_render,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+def _close_iterator(iterator):
+    try:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+    finally:
+        connections.close_all()
+
+
+def iterate_in_context(iterator, context):
+    """Yield the items of a blocking iterator, advancing it in context."""
+    done = object()
+    try:
+        while True:
+            item = context.run(next, iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            context.run(iterator.close)
+
+
+async def iterate_in_thread(iterator, context=None):
+    """Yield the items of a blocking iterator, advancing it off the loop.
+
+    The iterator gets a thread of its own for its whole life, so a
+    server-side cursor it reads from keeps its database connection. It
+    runs in context, by default a copy of the context at the first item.
+    """
+    loop = asyncio.get_running_loop()
+    if context is None:
+        context = contextvars.copy_context()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+    done = object()
+    try:
+        while True:
+            item = await loop.run_in_executor(
+                executor,
+                functools.partial(context.run, next, iterator, done),
+            )
+            if item is done:
+                return
+            yield item
+    finally:
+        await loop.run_in_executor(
+            executor,
+            functools.partial(context.run, _close_iterator, iterator),
+        )
+        executor.shutdown(wait=False)
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """A streaming response whose content is an async iterator of bytes.
+
+    Only ASGIHandler below can send it.
+    """
+
+    @property
+    def streaming_content(self):
+        return self._aiter_bytes()
+
+    @streaming_content.setter
+    def streaming_content(self, value):
+        self._iterator = value
+
+    async def _aiter_bytes(self):
+        async for part in self._iterator:
+            yield self.make_bytes(part)
+
+    async def aclose(self):
+        """Finish the content iterator early, e.g. on a failed send."""
+        if hasattr(self._iterator, 'aclose'):
+            await self._iterator.aclose()
+
+    def __iter__(self):
+        raise TypeError(
+            f'{self.__class__.__name__} can only be iterated asynchronously.'
+        )
+
+
+def streaming_response(request, content, **kwargs):
+    """Return a streaming response for request with blocking content.
+
+    ASGI requests get an AsyncStreamingHttpResponse that produces the
+    content on a worker thread; others a plain StreamingHttpResponse.
+    Either way the content is produced in a copy of the current context,
+    as the response is sent after middleware such as replica routing has
+    reset its context variables. request may be a DRF Request.
+    """
+    context = contextvars.copy_context()
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return AsyncStreamingHttpResponse(
+            iterate_in_thread(iter(content), context),
+            **kwargs,
+        )
+    return StreamingHttpResponse(
+        iterate_in_context(iter(content), context),
+        **kwargs,
+    )
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """Django's ASGI handler, able to send AsyncStreamingHttpResponse."""
+
+    async def send_response(self, response, send):
+        if not isinstance(response, AsyncStreamingHttpResponse):
+            return await super().send_response(response, send)
+
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str) else header,
+                value.encode('latin1') if isinstance(value, str) else value,
+            )
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            headers.append((
+                b'Set-Cookie',
+                cookie.output(header='').encode('ascii').strip(),
+            ))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        try:
+            async for part in response.streaming_content:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            await response.aclose()
+        await send({'type': 'http.response.body'})
+
+
+def get_asgi_application():
+    """Return the project's ASGI callable, using ASGIHandler above."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
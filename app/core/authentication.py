@@ -0,0 +1,272 @@
+"""
+Authentication classes for the API.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TTLCache:
+    """Thread-safe, in-process LRU cache with per-entry expiry.
+
+    on_remove, if given, is called with the key and value of every entry
+    evicted, found expired or deleted, after the cache's lock is released.
+    """
+
+    def __init__(self, max_size, ttl, clock=time.monotonic, on_remove=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.on_remove = on_remove
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _removed(self, entries):
+        if self.on_remove is not None:
+            for key, value in entries:
+                self.on_remove(key, value)
+
+    def get(self, key):
+        """Return the live value for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires > self.clock():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        self._removed([(key, value)])
+        return None
+
+    def set(self, key, value):
+        """Store value, evicting the least recently used entry if full."""
+        evicted = []
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                old_key, (_, old_value) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+        self._removed(evicted)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._removed([(key, entry[1])])
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _copy_token(token):
+    """Return a copy of token and its user safe to hand to one request."""
+    user = copy.copy(token.user)
+    token = copy.copy(token)
+    token.user = user
+    return token
+
+
+class TokenCache:
+    """Token key to token (with its user) cache used by authentication.
+
+    Lookups try the in-process LRU first, then the optional shared Django
+    cache named by TOKEN_AUTH_CACHE['SHARED_CACHE']. A user id to token key
+    index lets a user change evict that user's token without a query; it
+    only holds users whose token is in the in-process LRU.
+    """
+    key_prefix = 'auth-token'
+
+    def __init__(self, max_size, ttl):
+        self.ttl = ttl
+        self.local = TTLCache(max_size, ttl, on_remove=self._forget)
+        self._user_keys = {}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        """Return the shared cache tier, or None if not configured."""
+        alias = settings.TOKEN_AUTH_CACHE.get('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    def _token_key(self, key):
+        return f'{self.key_prefix}:{key}'
+
+    def _user_key(self, user_id):
+        return f'{self.key_prefix}:user:{user_id}'
+
+    def get(self, key):
+        """Return a private copy of the cached token for key, or None."""
+        token = self.local.get(key)
+        if token is not None:
+            self.local_hits += 1
+        elif self.shared is not None:
+            token = self.shared.get(self._token_key(key))
+            if token is not None:
+                self.shared_hits += 1
+                self._set_local(token)
+        if token is None:
+            self.misses += 1
+            return None
+
+        return _copy_token(token)
+
+    def _set_local(self, token):
+        with self._lock:
+            self._user_keys[token.user_id] = token.key
+        self.local.set(token.key, token)
+
+    def _forget(self, key, token):
+        """Drop the index entry of a token leaving the in-process LRU."""
+        with self._lock:
+            if self._user_keys.get(token.user_id) == key:
+                del self._user_keys[token.user_id]
+
+    def set(self, token):
+        """Cache token, which must have its user loaded."""
+        token = _copy_token(token)
+        self._set_local(token)
+        if self.shared is not None:
+            self.shared.set_many({
+                self._token_key(token.key): token,
+                self._user_key(token.user_id): token.key,
+            }, self.ttl)
+
+    def delete(self, key):
+        """Evict the token with the given key."""
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._token_key(key))
+
+    def delete_user(self, user_id):
+        """Evict the token belonging to the given user."""
+        with self._lock:
+            key = self._user_keys.pop(user_id, None)
+        if key is not None:
+            self.local.delete(key)
+        if self.shared is not None:
+            shared_key = self.shared.get(self._user_key(user_id))
+            if shared_key is not None:
+                self.shared.delete_many([
+                    self._token_key(shared_key),
+                    self._user_key(user_id),
+                ])
+
+    def clear(self):
+        """Empty the in-process tier and reset the counters."""
+        self.local.clear()
+        with self._lock:
+            self._user_keys.clear()
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        """Return hit and miss counters."""
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'size': len(self.local),
+        }
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_AUTH_CACHE['MAX_SIZE'],
+    ttl=settings.TOKEN_AUTH_CACHE['TTL'],
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that caches the token to user lookup.
+
+    Entries are evicted when the token is deleted or its user is saved
+    (which covers deactivation). Other processes only see an eviction
+    through the shared tier, so TOKEN_AUTH_CACHE['TTL'] bounds how long
+    a revoked token may still work in their in-process tier.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is not None:
+            return (token.user, token)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(token)
+        return (user, token)
+
+
+class LoginCache:
+    """Recently issued tokens, keyed by the credentials that obtained them.
+
+    Keys are an HMAC of the email and password under SECRET_KEY, so the
+    cache never holds anything a password could be recovered from. An
+    entry remembers the token and the password hash it was verified
+    against, and is only honoured while the token exists, its user is
+    active and their stored hash is unchanged.
+    """
+    key_salt = 'core.authentication.LoginCache'
+
+    def __init__(self, max_size, ttl):
+        self.local = TTLCache(max_size, ttl)
+
+    def _key(self, email, password):
+        return salted_hmac(
+            self.key_salt,
+            f'{email}\0{password}',
+            algorithm='sha256',
+        ).hexdigest()
+
+    def get(self, email, password):
+        """Return the token issued for these credentials, or None."""
+        key = self._key(email, password)
+        entry = self.local.get(key)
+        if entry is None:
+            return None
+
+        token_key, encoded = entry
+        token = Token.objects.select_related('user').filter(
+            key=token_key,
+        ).first()
+        if (
+            token is None
+            or not token.user.is_active
+            or token.user.password != encoded
+        ):
+            self.local.delete(key)
+            return None
+        return token
+
+    def set(self, email, password, token):
+        """Remember token, whose user must have just logged in."""
+        self.local.set(
+            self._key(email, password),
+            (token.key, token.user.password),
+        )
+
+    def clear(self):
+        """Remove every entry."""
+        self.local.clear()
+
+
+login_cache = LoginCache(
+    max_size=settings.LOGIN_CACHE['MAX_SIZE'],
+    ttl=settings.LOGIN_CACHE['TTL'],
+)
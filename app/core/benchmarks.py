@@ -0,0 +1,162 @@
+"""
+Helpers for the benchmark management commands.
+
+Requests are sent straight to Django's WSGI and ASGI handlers, in
+process, so a benchmark measures the application and not a server or
+network in front of it.
+"""
+import asyncio
+import io
+import statistics
+import threading
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+async def asgi_request(application, method, path, headers=(), body=b''):
+    """Send one HTTP request to an ASGI application; return the status."""
+    path, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    status = None
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client never disconnects early.
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+def wsgi_request(application, method, path, headers=(), body=b''):
+    """Send one HTTP request to a WSGI application; return the status."""
+    path, _, query_string = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers:
+        name = name.decode().upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = value.decode()
+    status = None
+
+    def start_response(status_line, response_headers, exc_info=None):
+        nonlocal status
+        status = int(status_line.split(' ', 1)[0])
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries from every thread."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, connection):
+        """Count the queries of connection."""
+        # Outermost, so wrappers pushed and popped around the block that
+        # opened the connection stay balanced.
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self)
+            with self._lock:
+                self._connections.append(connection)
+
+    def uninstall(self):
+        """Stop counting on every connection."""
+        with self._lock:
+            installed, self._connections = self._connections, []
+        for connection in installed:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+@contextmanager
+def count_all_queries():
+    """Count queries on every connection, in any thread, in the block.
+
+    Connections opened inside the block are counted from the start;
+    of those already open, only the current thread's are seen.
+    """
+    counter = QueryCounter()
+
+    def install(sender, connection, **kwargs):
+        counter.install(connection)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        counter.install(connection)
+    try:
+        yield counter
+    finally:
+        connection_created.disconnect(install)
+        counter.uninstall()
+
+
+def summarize(latencies, seconds, queries):
+    """Return latency percentiles in ms, throughput and queries/request."""
+    count = len(latencies)
+    if count > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        'requests': count,
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'throughput_rps': round(count / seconds, 1) if seconds else 0.0,
+        'queries_per_request': round(queries / count, 2) if count else 0.0,
+    }
@@ -0,0 +1,13 @@
+"""
+PostgreSQL database backend that reuses connections from a pool.
+
+Use it as the ENGINE of a database and configure the pool with a POOL
+entry in the same DATABASES settings:
+
+    'ENGINE': 'core.db_pool',
+    'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 20, 'TIMEOUT': 10},
+
+Each process keeps one pool per database. Django's own connection
+handling is unchanged: closing a connection, at the end of a request
+or when CONN_MAX_AGE runs out, returns it to the pool instead.
+"""
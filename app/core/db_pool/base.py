@@ -0,0 +1,113 @@
+"""
+Database wrapper of the pooled PostgreSQL backend.
+"""
+import functools
+import threading
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as BaseDatabaseCreation,
+)
+from django.utils.asyncio import async_unsafe
+
+from core.db_pool.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _connect(conn_params, isolation_level):
+    """Open a connection set up as Django's postgresql backend does."""
+    connection = psycopg2.connect(**conn_params)
+    if (
+        isolation_level is not None
+        and isolation_level != connection.isolation_level
+    ):
+        connection.set_session(isolation_level=isolation_level)
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection,
+        loads=lambda x: x,
+    )
+    return connection
+
+
+def get_pool(settings_dict, conn_params):
+    """Return the process-wide pool for these connection parameters."""
+    key = tuple(sorted(
+        (name, str(value)) for name, value in conn_params.items()
+    ))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = _pools[key] = ConnectionPool(
+                functools.partial(
+                    _connect,
+                    conn_params,
+                    settings_dict['OPTIONS'].get('isolation_level'),
+                ),
+                min_size=options.get('MIN_SIZE', 0),
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                max_lifetime=options.get('MAX_LIFETIME'),
+                max_idle=options.get('MAX_IDLE'),
+                check_interval=options.get('CHECK_INTERVAL', 0),
+            )
+            pool.database = conn_params['database']
+        return pool
+
+
+def pool_stats():
+    """Return the stats of every pool, keyed by database name."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    stats = {}
+    for pool in pools:
+        stats.setdefault(pool.database, []).append(pool.stats())
+    return stats
+
+
+def close_pools(database):
+    """Close the idle connections of every pool for database."""
+    with _pools_lock:
+        pools = [
+            pool for pool in _pools.values() if pool.database == database
+        ]
+    for pool in pools:
+        pool.close()
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would stop the database being dropped.
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL wrapper checking connections out of a pool."""
+    creation_class = DatabaseCreation
+    pool = None
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.settings_dict, conn_params)
+        connection = self.pool.getconn()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # A connection closed mid-transaction stays referenced
+                # until the atomic block exits, so it is not reused.
+                self.pool.putconn(
+                    self.connection,
+                    close=self.in_atomic_block,
+                )
@@ -0,0 +1,225 @@
+"""
+Thread-safe pool of psycopg2 connections.
+"""
+import collections
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no connection could be checked out in time."""
+
+
+Idle = collections.namedtuple('Idle', ['connection', 'created', 'returned'])
+
+
+class ConnectionPool:
+    """Keep between min_size and max_size open connections for reuse.
+
+    getconn() hands out the most recently returned idle connection,
+    opens a new one while under max_size, or waits up to `timeout`
+    seconds for one to be returned. A connection idle for
+    `check_interval` seconds or more is pinged before it is handed out.
+    Connections older than `max_lifetime` are closed rather than reused,
+    and idle ones beyond min_size are closed after `max_idle` seconds.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, timeout=10,
+                 max_lifetime=None, max_idle=None, check_interval=0,
+                 clock=time.monotonic):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.clock = clock
+        self._idle = collections.deque()
+        self._in_use = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.health_check_failures = 0
+
+    def _open(self):
+        """Open a connection for a slot already counted in _size."""
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.connections_created += 1
+        return connection
+
+    def _close(self, connection):
+        """Close a connection and free its slot."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self.connections_closed += 1
+            self._cond.notify()
+
+    def _is_healthy(self, idle, now):
+        connection = idle.connection
+        if connection.closed:
+            return False
+        if (
+            self.max_lifetime is not None
+            and now - idle.created >= self.max_lifetime
+        ):
+            return False
+        if now - idle.returned < self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except psycopg2.Error:
+            self.health_check_failures += 1
+            return False
+        return True
+
+    def _take_expired(self, now):
+        """Remove and return idle connections past max_idle."""
+        expired = []
+        while (
+            self.max_idle is not None
+            and self._idle
+            and self._size - len(expired) > self.min_size
+            and now - self._idle[0].returned >= self.max_idle
+        ):
+            expired.append(self._idle.popleft().connection)
+        return expired
+
+    def fill(self):
+        """Open connections until min_size are open."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._open()
+            now = self.clock()
+            with self._cond:
+                self._idle.appendleft(Idle(connection, now, now))
+                self._cond.notify()
+
+    def getconn(self):
+        """Check out a connection, waiting up to `timeout` seconds."""
+        if self._size < self.min_size:
+            self.fill()
+        deadline = self.clock() + self.timeout
+        while True:
+            with self._cond:
+                expired = self._take_expired(self.clock())
+                if not self._idle and self._size >= self.max_size:
+                    self.waits += 1
+                    wait_start = self.clock()
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - self.clock()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            self.wait_seconds += self.clock() - wait_start
+                            raise PoolTimeout(
+                                f'No database connection was free within '
+                                f'{self.timeout} seconds '
+                                f'({self.max_size} in use).'
+                            )
+                        self._cond.wait(remaining)
+                    self.wait_seconds += self.clock() - wait_start
+                idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    self._size += 1
+
+            for connection in expired:
+                self._close(connection)
+            if idle is None:
+                connection = self._open()
+                created = self.clock()
+            elif self._is_healthy(idle, self.clock()):
+                connection, created = idle.connection, idle.created
+            else:
+                self._close(idle.connection)
+                continue
+
+            with self._cond:
+                self._in_use[id(connection)] = created
+                self.checkouts += 1
+            return connection
+
+    def putconn(self, connection, close=False):
+        """Return a checked out connection, or close it if `close`.
+
+        A closed connection is not replaced here, where a failing
+        connect would hold up and break the caller's teardown; getconn()
+        opens connections back up to min_size.
+        """
+        with self._cond:
+            created = self._in_use.pop(id(connection))
+        now = self.clock()
+        if not close and not connection.closed:
+            status = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    close = True
+        if (
+            close
+            or connection.closed
+            or self.max_lifetime is not None
+            and now - created >= self.max_lifetime
+        ):
+            self._close(connection)
+            return
+
+        with self._cond:
+            self._idle.append(Idle(connection, created, now))
+            self._cond.notify()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle = [entry.connection for entry in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return the pool's size and counters."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 6),
+                'timeouts': self.timeouts,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'health_check_failures': self.health_check_failures,
+            }
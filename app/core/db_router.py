@@ -0,0 +1,308 @@
+"""
+Read replica routing.
+
+ReplicaRouter sends reads to the DATABASE_REPLICAS aliases, in turn, and
+everything else to the primary. ReplicaRoutingMiddleware pins a request
+to the primary when it writes, and for sticky_seconds() after a client's
+last successful write, so clients read their own writes while replicas
+catch up. Replicas that fail a health check, or lag by more than MAX_LAG
+seconds, are left out until a later check passes.
+"""
+import asyncio
+import contextvars
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from core.async_views import AsyncStreamingHttpResponse, iterate_in_context
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds a replica has been behind the primary, or NULL on a primary
+# standing in for a replica.
+REPLICATION_LAG_SQL = (
+    'SELECT CASE WHEN pg_is_in_recovery() '
+    'THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+# True to read from the primary; None outside requests routed by
+# ReplicaRoutingMiddleware.
+_use_primary = contextvars.ContextVar('use_primary', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Send the block's reads to the primary."""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def sticky_seconds():
+    """Return how long reads stay on the primary after a write.
+
+    At least MAX_LAG plus CHECK_INTERVAL, the furthest behind a replica
+    in rotation can be, so a replica read after the window has the
+    write.
+    """
+    options = settings.REPLICA_ROUTING
+    return max(
+        options['STICKY_SECONDS'],
+        options['MAX_LAG'] + options['CHECK_INTERVAL'],
+    )
+
+
+def pin_if_written_since(written_ns):
+    """Send the rest of the request's reads to the primary if data
+    changed, at time.time_ns() written_ns, within sticky_seconds().
+
+    Reads whose results are cached or validated under a version of the
+    data use this, so a lagging replica's rows are never stored under,
+    or compared against, a newer version. Only requests routed by
+    ReplicaRoutingMiddleware are pinned, as it undoes the pin afterwards.
+    """
+    if (
+        _use_primary.get() is False
+        and settings.DATABASE_REPLICAS
+        and time.time_ns() - written_ns < sticky_seconds() * 10 ** 9
+    ):
+        _use_primary.set(True)
+
+
+class ReplicaHealth:
+    """Health check replicas on a background thread.
+
+    The thread starts on first use and checks every replica each
+    CHECK_INTERVAL seconds, so requests never wait on a check. A replica
+    is in rotation once its latest check passed, and while that check
+    is recent; results older than three intervals count as failures.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._checks = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def clear(self):
+        self._checks.clear()
+
+    def start(self):
+        """Start the checking thread unless it is running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='replica-health',
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def stop(self):
+        """Stop the checking thread and wait for it to finish."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stopped.set()
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Replica health checks failed.')
+            finally:
+                # No connection is held between checks, so none outlives
+                # the database it points at.
+                connections.close_all()
+            if self._stopped.wait(settings.REPLICA_ROUTING['CHECK_INTERVAL']):
+                return
+
+    def refresh(self):
+        """Check every replica once and record the results."""
+        for alias in settings.DATABASE_REPLICAS:
+            healthy = self.check(alias)
+            previous = self._checks.get(alias)
+            if previous is not None and healthy != previous[0]:
+                if healthy:
+                    logger.info('Replica %s is back in rotation.', alias)
+                else:
+                    logger.warning('Replica %s left rotation.', alias)
+            self._checks[alias] = (healthy, self.clock())
+
+    def is_healthy(self, alias):
+        check = self._checks.get(alias)
+        interval = settings.REPLICA_ROUTING['CHECK_INTERVAL']
+        return (
+            check is not None
+            and check[0]
+            and self.clock() - check[1] < 3 * interval
+        )
+
+    def check(self, alias):
+        """Return whether the replica answers and is not lagging.
+
+        Connecting is bounded by the alias's connect_timeout option.
+        """
+        connection = connections[alias]
+        try:
+            with connection.wrap_database_errors:
+                connection.ensure_connection()
+                # A raw cursor, so query counters don't see the check.
+                with connection.connection.cursor() as cursor:
+                    cursor.execute(REPLICATION_LAG_SQL)
+                    lag = cursor.fetchone()[0]
+        except DatabaseError:
+            logger.warning('Replica %s failed its health check.', alias,
+                           exc_info=True)
+            connection.close()
+            return False
+        max_lag = settings.REPLICA_ROUTING['MAX_LAG']
+        return lag is None or lag <= max_lag
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """Route reads to healthy replicas and writes to the primary."""
+
+    # Token lookups stay on the primary so a token works as soon as it is
+    # issued; CachedTokenAuthentication caches them anyway.
+    primary_models = {'authtoken.token'}
+
+    def __init__(self):
+        self._turn = itertools.count()
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or _use_primary.get()
+            or model._meta.label_lower in self.primary_models
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replica_health.start()
+        start = next(self._turn)
+        for i in range(len(replicas)):
+            alias = replicas[(start + i) % len(replicas)]
+            if replica_health.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def client_key(request):
+    """Return a cache key identifying the request's client, or None."""
+    credential = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credential:
+        return None
+    digest = hashlib.sha256(credential.encode()).hexdigest()
+    return f'replica-routing:wrote:{digest}'
+
+
+class ReplicaRoutingMiddleware:
+    """Pin writes, and reads soon after a client's write, to the primary.
+
+    Clients are told apart by their Authorization header or session
+    cookie. The last-write marks live in the REPLICA_ROUTING['CACHE']
+    alias, which must be shared for them to reach every process.
+
+    The content of a streaming response is produced after the request
+    has left the middleware, so it is produced in a copy of the
+    request's context. AsyncStreamingHttpResponse content carries its
+    own copy; see core.async_views.streaming_response.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does, so the handler awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def _before(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return None, None
+        writes = request.method not in SAFE_METHODS
+        key = client_key(request)
+        cache = caches[settings.REPLICA_ROUTING['CACHE']]
+        primary = writes or (key is not None and cache.get(key) is not None)
+        return _use_primary.set(primary), key if writes else None
+
+    def _after(self, write_key, response):
+        if write_key is not None and response.status_code < 400:
+            caches[settings.REPLICA_ROUTING['CACHE']].set(
+                write_key,
+                1,
+                sticky_seconds(),
+            )
+
+    def _keep_routing(self, response):
+        if response.streaming and not isinstance(
+            response,
+            AsyncStreamingHttpResponse,
+        ):
+            response.streaming_content = iterate_in_context(
+                response.streaming_content,
+                contextvars.copy_context(),
+            )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token, write_key = self._before(request)
+        try:
+            response = self.get_response(request)
+            if token is not None:
+                self._keep_routing(response)
+        finally:
+            if token is not None:
+                _use_primary.reset(token)
+        self._after(write_key, response)
+        return response
+
+    async def __acall__(self, request):
+        token, write_key = self._before(request)
+        try:
+            response = await self.get_response(request)
+            if token is not None:
+                self._keep_routing(response)
+        finally:
+            if token is not None:
+                _use_primary.reset(token)
+        self._after(write_key, response)
+        return response
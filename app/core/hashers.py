@@ -0,0 +1,63 @@
+"""
+Password hashing for the API.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 hasher whose work factor is the PBKDF2_ITERATIONS setting.
+
+    Stored hashes with a different iteration count are upgraded on the
+    owner's next successful login, like any outdated hasher.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_THREADS,
+    thread_name_prefix='password-hash',
+)
+
+
+def _run_in_pool(view, request, *args, **kwargs):
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def offload_view(view):
+    """Run a sync view in the password hash thread pool under ASGI.
+
+    Django runs sync views on one shared thread under ASGI, so a slow
+    password hash there stalls every other sync view. Requests served by
+    WSGI run the view in their own thread as usual.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if isinstance(request, ASGIRequest):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                password_hash_executor,
+                functools.partial(
+                    _run_in_pool, view, request, *args, **kwargs,
+                ),
+            )
+        return await sync_to_async(view, thread_sensitive=True)(
+            request,
+            *args,
+            **kwargs,
+        )
+
+    return wrapper
@@ -0,0 +1,466 @@
+"""
+Django command benchmarking the REST endpoints against seeded data.
+"""
+import asyncio
+import json
+import platform
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core.async_views import get_asgi_application
+from core.benchmarks import (
+    asgi_request,
+    count_all_queries,
+    summarize,
+    wsgi_request,
+)
+from core.models import Appointment, Language
+from core.schema import code_version
+
+ENDPOINTS = (
+    'appointment list',
+    'appointment detail',
+    'appointment create',
+    'appointment update',
+    'token',
+)
+
+HARNESSES = ('client', 'wsgi', 'asgi')
+
+# Options that change what is measured; baselines are only comparable
+# when they match.
+WORKLOAD_OPTIONS = (
+    'users',
+    'appointments',
+    'languages',
+    'requests',
+    'concurrency',
+    'seed',
+)
+
+
+class Command(BaseCommand):
+    """Seed data, drive the API in process and report latency."""
+    help = (
+        'Benchmark the appointment and token endpoints and optionally '
+        'record or compare a JSON baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument(
+            '--appointments',
+            type=int,
+            default=2000,
+            help='Appointments seeded per user.',
+        )
+        parser.add_argument(
+            '--languages',
+            type=int,
+            default=50,
+            help='Languages seeded per user.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Measured requests per endpoint and harness.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Unmeasured requests sent to each endpoint first.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Requests in flight at once for the wsgi and asgi '
+                 'harnesses; the test client sends one at a time.',
+        )
+        parser.add_argument(
+            '--harness',
+            action='append',
+            choices=HARNESSES,
+            dest='harnesses',
+            help='Harness to run; repeat for several. Defaults to all.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output',
+            help='Write the results to this JSON baseline file.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Compare against this baseline and fail on regressions.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20,
+            help='Percent the p95 latency, throughput or queries per '
+                 'request may worsen before it counts as a regression.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Run with DEBUG off. The benchmark seeds and then deletes '
+                 'rows in the default database.',
+        )
+
+    def _seed(self, options, rng, prefix):
+        """Create users, with emails starting with prefix, and their
+        appointments, languages and tokens.
+        """
+        password = uuid.uuid4().hex
+        hashed = make_password(password)
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f'{prefix}{i}@example.com',
+                name=f'Benchmark {i}',
+                password=hashed,
+            )
+            for i in range(options['users'])
+        )
+        clients = []
+        for user in users:
+            languages = Language.objects.bulk_create(
+                Language(user=user, name=f'Language {i}')
+                for i in range(options['languages'])
+            )
+            appointments = Appointment.objects.bulk_create(
+                (
+                    Appointment(
+                        user=user,
+                        title=f'Appointment {i}',
+                        description=f'Seeded appointment {i}.',
+                        time_minutes=rng.randint(15, 120),
+                        price=Decimal(rng.randint(100, 99999)) / 100,
+                    )
+                    for i in range(options['appointments'])
+                ),
+                batch_size=2000,
+            )
+            if languages:
+                Link = Appointment.languages.through
+                Link.objects.bulk_create(
+                    (
+                        Link(appointment=appointment, language=language)
+                        for appointment in appointments
+                        for language in rng.sample(
+                            languages,
+                            min(2, len(languages)),
+                        )
+                    ),
+                    batch_size=5000,
+                )
+            clients.append({
+                'email': user.email,
+                'password': password,
+                'token': Token.objects.create(user=user).key,
+                'appointments': [
+                    appointment.id for appointment in appointments
+                ],
+            })
+        return clients
+
+    def _requests(self, endpoint, count, clients, rng):
+        """Return (method, path, headers, body) for each request."""
+        list_url = reverse('appointment:appointment-list')
+        requests = []
+        for i in range(count):
+            client = clients[i % len(clients)]
+            headers = {
+                'Authorization': f'Token {client["token"]}',
+                'Content-Type': 'application/json',
+            }
+            body = b''
+            if endpoint == 'appointment list':
+                method, path = 'GET', list_url
+            elif endpoint == 'appointment detail':
+                method = 'GET'
+                path = self._detail_url(client, rng)
+            elif endpoint == 'appointment create':
+                method, path = 'POST', list_url
+                body = json.dumps({
+                    'title': f'Created {i}',
+                    'time_minutes': 30,
+                    'price': '5.25',
+                    'languages': [{'name': 'Language 0'}],
+                }).encode()
+            elif endpoint == 'appointment update':
+                method = 'PATCH'
+                path = self._detail_url(client, rng)
+                body = json.dumps({'title': f'Updated {i}'}).encode()
+            else:
+                method, path = 'POST', reverse('user:token')
+                del headers['Authorization']
+                body = json.dumps({
+                    'email': client['email'],
+                    'password': client['password'],
+                }).encode()
+            requests.append((method, path, headers, body))
+        return requests
+
+    def _detail_url(self, client, rng):
+        return reverse(
+            'appointment:appointment-detail',
+            args=[rng.choice(client['appointments'])],
+        )
+
+    def _run_client(self, requests, concurrency):
+        client = Client()
+        latencies = []
+        statuses = []
+        start = time.perf_counter()
+        for method, path, headers, body in requests:
+            extra = {
+                'HTTP_' + name.upper().replace('-', '_'): value
+                for name, value in headers.items()
+                if name != 'Content-Type'
+            }
+            sent = time.perf_counter()
+            res = client.generic(
+                method,
+                path,
+                body,
+                content_type=headers['Content-Type'],
+                **extra,
+            )
+            latencies.append(time.perf_counter() - sent)
+            statuses.append(res.status_code)
+        return latencies, statuses, time.perf_counter() - start
+
+    def _run_wsgi(self, requests, concurrency):
+        application = get_wsgi_application()
+
+        def send(request):
+            method, path, headers, body = request
+            sent = time.perf_counter()
+            status = wsgi_request(
+                application,
+                method,
+                path,
+                self._raw_headers(headers),
+                body,
+            )
+            return time.perf_counter() - sent, status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, requests))
+        seconds = time.perf_counter() - start
+        return (
+            [latency for latency, _ in results],
+            [status for _, status in results],
+            seconds,
+        )
+
+    def _run_asgi(self, requests, concurrency):
+        application = get_asgi_application()
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send(request):
+                method, path, headers, body = request
+                async with semaphore:
+                    sent = time.perf_counter()
+                    status = await asgi_request(
+                        application,
+                        method,
+                        path,
+                        [
+                            *self._raw_headers(headers),
+                            (b'content-length', str(len(body)).encode()),
+                        ],
+                        body,
+                    )
+                    return time.perf_counter() - sent, status
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*map(send, requests))
+            return results, time.perf_counter() - start
+
+        results, seconds = asyncio.run(run())
+        return (
+            [latency for latency, _ in results],
+            [status for _, status in results],
+            seconds,
+        )
+
+    def _raw_headers(self, headers):
+        return [
+            (name.lower().encode(), value.encode())
+            for name, value in headers.items()
+        ]
+
+    def _compare(self, baseline, results, tolerance):
+        """Print and return regressions against baseline results."""
+        factor = 1 + tolerance / 100
+        regressions = []
+        for harness, endpoints in results.items():
+            for endpoint, new in endpoints.items():
+                old = baseline['results'].get(harness, {}).get(endpoint)
+                if old is None:
+                    continue
+                checks = (
+                    ('p95_ms', new['p95_ms'] > old['p95_ms'] * factor),
+                    (
+                        'throughput_rps',
+                        new['throughput_rps'] * factor < old['throughput_rps'],
+                    ),
+                    (
+                        'queries_per_request',
+                        new['queries_per_request']
+                        > old['queries_per_request'] * factor,
+                    ),
+                )
+                for metric, worse in checks:
+                    if worse:
+                        regressions.append(
+                            f'{harness} {endpoint}: {metric} '
+                            f'{old[metric]} -> {new[metric]}'
+                        )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(f'Regression: {regression}'))
+        return regressions
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'DEBUG is off, so the default database may hold real data. '
+                'Pass --force to seed and delete benchmark rows in it.'
+            )
+        harnesses = options['harnesses'] or list(HARNESSES)
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Could not read baseline: {exc}')
+
+        rng = random.Random(options['seed'])
+        self.stdout.write(
+            f'Seeding {options["users"]} users with '
+            f'{options["appointments"]} appointments and '
+            f'{options["languages"]} languages each...'
+        )
+        # Every seeded user's email starts with prefix, so cleanup finds
+        # them even when seeding fails halfway.
+        prefix = f'benchmark-{uuid.uuid4().hex[:12]}-'
+        runners = {
+            'client': self._run_client,
+            'wsgi': self._run_wsgi,
+            'asgi': self._run_asgi,
+        }
+        limit = f'{options["requests"] * 100}/s'
+        results = {}
+        try:
+            clients = self._seed(options, rng, prefix)
+            workload = {
+                endpoint: self._requests(
+                    endpoint,
+                    options['warmup'] + options['requests'],
+                    clients,
+                    rng,
+                )
+                for endpoint in ENDPOINTS
+            }
+            self.stdout.write(
+                f'{"":<7} {"endpoint":<20} {"p50 ms":>9} {"p95 ms":>9} '
+                f'{"p99 ms":>9} {"req/s":>9} {"queries":>8} {"errors":>7}'
+            )
+            # The harnesses send requests for the 'testserver' host.
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': {'token': limit, 'ip': limit},
+                },
+            ):
+                for harness in harnesses:
+                    run = runners[harness]
+                    results[harness] = {}
+                    for endpoint in ENDPOINTS:
+                        requests = workload[endpoint]
+                        run(requests[:options['warmup']], 1)
+                        with count_all_queries() as queries:
+                            latencies, statuses, seconds = run(
+                                requests[options['warmup']:],
+                                options['concurrency'],
+                            )
+                        summary = summarize(latencies, seconds, queries.count)
+                        summary['errors'] = sum(
+                            status >= 400 for status in statuses
+                        )
+                        results[harness][endpoint] = summary
+                        self.stdout.write(
+                            f'{harness:<7} {endpoint:<20} '
+                            f'{summary["p50_ms"]:9.2f} '
+                            f'{summary["p95_ms"]:9.2f} '
+                            f'{summary["p99_ms"]:9.2f} '
+                            f'{summary["throughput_rps"]:9.1f} '
+                            f'{summary["queries_per_request"]:8.2f} '
+                            f'{summary["errors"]:7d}'
+                        )
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=prefix,
+            ).delete()
+
+        report = {
+            'created': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'code_version': code_version(),
+                'database': settings.DATABASES['default']['ENGINE'],
+            },
+            'options': {name: options[name] for name in WORKLOAD_OPTIONS},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Wrote {options["output"]}')
+
+        if baseline is not None:
+            if baseline.get('options') != report['options']:
+                self.stdout.write(self.style.WARNING(
+                    'The baseline was recorded with different options: '
+                    f'{baseline.get("options")}'
+                ))
+            regressions = self._compare(
+                baseline,
+                results,
+                options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} regressions against '
+                    f'{options["baseline"]}.'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'No regressions against {options["baseline"]}.'
+            ))
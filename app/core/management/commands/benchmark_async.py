@@ -0,0 +1,165 @@
+"""
+Django command comparing sync and async viewsets under ASGI.
+"""
+import asyncio
+import json
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+
+from core.async_views import get_asgi_application
+from core.benchmarks import asgi_request
+from core.models import Appointment
+from appointment import views
+
+sync_router = DefaultRouter()
+sync_router.register('appointments', views.AppointmentViewSet)
+sync_router.register('languages', views.LanguageViewSet)
+async_router = DefaultRouter()
+async_router.register('appointments', views.AsyncAppointmentViewSet)
+async_router.register('languages', views.AsyncLanguageViewSet)
+
+# Both versions side by side, served through Django's ASGI handler.
+urlpatterns = [
+    path('sync/', include(sync_router.urls)),
+    path('async/', include(async_router.urls)),
+]
+
+
+class Command(BaseCommand):
+    """Send concurrent ASGI requests to the sync and async viewsets."""
+    help = 'Benchmark concurrent throughput of the async viewsets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--appointments', type=int, default=50)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0,
+            help='Milliseconds added to every query, as a remote database '
+                 'would.',
+        )
+
+    def _add_latency(self, sender, connection, **kwargs):
+        # Outermost, so wrappers pushed and popped around the block that
+        # opened the connection stay balanced.
+        if self._delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, self._delay)
+
+    def _delay(self, execute, sql, params, many, context):
+        time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def _seed(self, count):
+        user = get_user_model().objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex}@example.com',
+            password=uuid.uuid4().hex,
+        )
+        Appointment.objects.bulk_create(
+            Appointment(
+                user=user,
+                title=f'Appointment {i}',
+                time_minutes=30,
+                price=Decimal('5.25'),
+            )
+            for i in range(count)
+        )
+        return user, Token.objects.create(user=user)
+
+    async def _run(self, requests, concurrency, method, url, body):
+        application = get_asgi_application()
+        if method == 'GET':
+            body = b''
+        headers = [
+            (b'authorization', f'Token {self.token.key}'.encode()),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send():
+            async with semaphore:
+                status = await asgi_request(
+                    application,
+                    method,
+                    url,
+                    headers,
+                    body,
+                )
+                assert status < 300, f'{method} {url} returned {status}'
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(requests)))
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        requests = options['requests']
+        concurrency = options['concurrency']
+        user, self.token = self._seed(options['appointments'])
+        self.latency = options['latency'] / 1000
+        if self.latency:
+            connection_created.connect(self._add_latency)
+            connection.execute_wrappers.append(self._delay)
+        appointment_id = user.appointment_set.values_list('id').first()[0]
+        body = json.dumps({
+            'title': 'Created',
+            'time_minutes': 30,
+            'price': '5.25',
+            'languages': [{'name': 'English'}],
+        }).encode()
+        endpoints = [
+            ('appointment list', 'GET', 'appointments/'),
+            ('appointment detail', 'GET', f'appointments/{appointment_id}/'),
+            ('appointment create', 'POST', 'appointments/'),
+            ('language list', 'GET', 'languages/'),
+        ]
+        limit = f'{requests * 10}/s'
+        self.stdout.write(
+            f'{requests} requests per endpoint, {concurrency} concurrent, '
+            f'{settings.ASYNC_DB_THREADS} async database threads, '
+            f'{options["latency"]} ms added per query:'
+        )
+        self.stdout.write(f'{"":<20} {"sync req/s":>12} {"async req/s":>12}')
+        try:
+            with override_settings(
+                ROOT_URLCONF=__name__,
+                ALLOWED_HOSTS=['testserver'],
+                APPOINTMENT_LIST_CACHE_TIMEOUT=0,
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': {'token': limit, 'ip': limit},
+                },
+            ):
+                for name, method, url in endpoints:
+                    rates = [
+                        requests / asyncio.run(self._run(
+                            requests,
+                            concurrency,
+                            method,
+                            f'/{prefix}/{url}',
+                            body,
+                        ))
+                        for prefix in ('sync', 'async')
+                    ]
+                    self.stdout.write(
+                        f'{name:<20} {rates[0]:12.1f} {rates[1]:12.1f}'
+                    )
+        finally:
+            if self.latency:
+                connection_created.disconnect(self._add_latency)
+                connection.execute_wrappers.remove(self._delay)
+            user.delete()
@@ -0,0 +1,76 @@
+"""
+Django command comparing the JSON and MessagePack renderers and parsers.
+"""
+import io
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+
+
+def sample_appointments(rows):
+    """Return a paginated appointment list shaped like the API output."""
+    return {
+        'next': 'http://testserver/api/appointment/appointments/?cursor=cD0x',
+        'previous': None,
+        'results': [
+            {
+                'id': i,
+                'title': f'Sample Appointment {i}',
+                'time_minutes': 30 + i % 60,
+                'price': str(Decimal('5.25') + i % 100),
+                'link': f'https://example.com/appointment-{i}.pdf',
+                'languages': [
+                    {'id': i % 50, 'name': 'Español'},
+                    {'id': i % 50 + 1, 'name': 'ไทย'},
+                ],
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """Time rendering and parsing a large appointment list."""
+    help = 'Benchmark the API renderers and parsers against DRF JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _best(self, func, repeat):
+        return min(timeit.repeat(func, number=1, repeat=repeat))
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        data = sample_appointments(options['rows'])
+        repeat = options['repeat']
+        codecs = [
+            ('json', JSONRenderer(), JSONParser()),
+            ('orjson', FastJSONRenderer(), FastJSONParser()),
+            ('msgpack', MessagePackRenderer(), MessagePackParser()),
+        ]
+        if FastJSONRenderer().render(data) != JSONRenderer().render(data):
+            self.stderr.write('JSON renderers produced different output!')
+
+        self.stdout.write(
+            f'{options["rows"]} appointments, best of {repeat}:\n'
+            f'{"codec":<8} {"bytes":>9} {"render ms":>10} {"parse ms":>10}'
+        )
+        for name, renderer, parser in codecs:
+            payload = renderer.render(data)
+            render_time = self._best(lambda: renderer.render(data), repeat)
+            parse_time = self._best(
+                lambda: parser.parse(io.BytesIO(payload)),
+                repeat,
+            )
+            self.stdout.write(
+                f'{name:<8} {len(payload):>9} '
+                f'{render_time * 1000:>10.2f} {parse_time * 1000:>10.2f}'
+            )
@@ -0,0 +1,102 @@
+"""
+Django command measuring token login throughput.
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.authentication import login_cache
+
+
+class Command(BaseCommand):
+    """Log in repeatedly through the token endpoint and report req/s."""
+    help = 'Benchmark token logins with and without the login cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.PASSWORD_HASH_THREADS,
+        )
+
+    def _report(self, name, requests, seconds):
+        self.stdout.write(
+            f'{name:<22} {requests / seconds:10.1f} req/s '
+            f'{seconds / requests * 1000:10.2f} ms/req'
+        )
+
+    def _sync(self, name, requests, cached):
+        client = Client()
+        login_cache.clear()
+        if cached:
+            self._login(client)
+        start = time.perf_counter()
+        for _ in range(requests):
+            if not cached:
+                login_cache.clear()
+            self._login(client)
+        self._report(name, requests, time.perf_counter() - start)
+
+    def _login(self, client):
+        res = client.post(
+            self.url,
+            self.body,
+            content_type='application/json',
+        )
+        assert res.status_code == 200, res.content
+
+    async def _asgi(self, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                res = await client.post(
+                    self.url,
+                    self.body,
+                    content_type='application/json',
+                )
+                assert res.status_code == 200, res.content
+
+        login_cache.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        requests = options['requests']
+        password = uuid.uuid4().hex
+        user = get_user_model().objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex}@example.com',
+            password=password,
+        )
+        self.url = reverse('user:token')
+        self.body = json.dumps({'email': user.email, 'password': password})
+        self.stdout.write(
+            f'{requests} logins, {settings.PBKDF2_ITERATIONS} PBKDF2 '
+            f'iterations, {options["concurrency"]} concurrent under ASGI:'
+        )
+        # The test clients send requests for the 'testserver' host.
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self._sync('wsgi, hashing', requests, cached=False)
+                self._sync('wsgi, login cache', requests, cached=True)
+                self._report(
+                    'asgi, hashing in pool',
+                    requests,
+                    asyncio.run(
+                        self._asgi(requests, options['concurrency']),
+                    ),
+                )
+        finally:
+            user.delete()
@@ -0,0 +1,72 @@
+"""
+Django command measuring the per-request cost of the API throttles.
+"""
+import timeit
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import throttling
+
+
+class Command(BaseCommand):
+    """Time the token and IP throttles a throttled view runs."""
+    help = 'Benchmark the token-bucket throttles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000)
+        parser.add_argument('--clients', type=int, default=1000)
+
+    def _time(self, name, store, iterations, clients):
+        requests = []
+        for i in range(clients):
+            request = Request(APIRequestFactory().get(
+                '/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}',
+            ))
+            request._auth = Token(key=f'{i:040x}')
+            requests.append(request)
+        throttle_classes = [
+            throttling.TokenRateThrottle,
+            throttling.IPRateThrottle,
+        ]
+        original = throttling.TokenBucketThrottle.store
+        throttling.TokenBucketThrottle.store = store
+        counter = iter(range(iterations))
+
+        def check():
+            request = requests[next(counter) % clients]
+            for throttle_class in throttle_classes:
+                throttle_class().allow_request(request, None)
+
+        try:
+            seconds = timeit.timeit(check, number=iterations)
+        finally:
+            throttling.TokenBucketThrottle.store = original
+        self.stdout.write(
+            f'{name:<8} {seconds / iterations * 1e6:8.2f} us/request'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        iterations = options['iterations']
+        clients = options['clients']
+        self.stdout.write(
+            f'{iterations} requests from {clients} clients through '
+            'the token and IP throttles:'
+        )
+        self._time(
+            'local',
+            throttling.LocalBucketStore(max_size=clients * 2),
+            iterations,
+            clients,
+        )
+        self._time(
+            'cache',
+            throttling.CacheBucketStore(caches['default']),
+            iterations,
+            clients,
+        )
@@ -0,0 +1,30 @@
+"""
+Django command to render the OpenAPI schema ahead of serving it.
+"""
+from django.core.management.base import BaseCommand
+
+from core.schema import (
+    CachedSpectacularAPIView,
+    code_version,
+    render_schema,
+    schema_cache,
+)
+
+
+class Command(BaseCommand):
+    """Write the schema served by /api/schema/ to the schema cache."""
+    help = 'Render the OpenAPI schema for the current code version.'
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        formats = {}
+        for renderer_class in CachedSpectacularAPIView.renderer_classes:
+            formats.setdefault(renderer_class.format, renderer_class())
+        for fmt, renderer in formats.items():
+            path = schema_cache.path(fmt)
+            schema_cache.write(path, render_schema(renderer))
+            self.stdout.write(f'Wrote {path}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Schema built for code version {code_version()}.'
+        ))
@@ -0,0 +1,57 @@
+"""
+Django command to import appointments from a CSV or NDJSON file.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.exceptions import ValidationError
+
+from appointment.importer import (
+    IMPORT_FORMATS,
+    AppointmentImporter,
+    detect_format,
+)
+
+
+class Command(BaseCommand):
+    """Import a file of appointments for one user."""
+    help = 'Bulk import appointments for a user with PostgreSQL COPY.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--format', choices=IMPORT_FORMATS)
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--max-errors', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+        format = options['format'] or detect_format(options['path'])
+        if format is None:
+            raise CommandError('Could not tell the format, use --format.')
+
+        importer = AppointmentImporter(
+            user,
+            chunk_size=options['chunk_size'],
+            max_errors=options['max_errors'],
+        )
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(stream, format)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValidationError as exc:
+            raise CommandError(' '.join(exc.detail['file']))
+
+        for error in report['errors']:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report["imported"]} of {report["rows"]} rows '
+            f'in {report["seconds"]:.2f}s '
+            f'({report["rows_per_second"]} rows/s), '
+            f'{report["error_count"]} rejected.'
+        ))
@@ -0,0 +1,18 @@
+"""
+Django command to rebuild the appointment statistics tables.
+"""
+from django.core.management.base import BaseCommand
+
+from appointment.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """Recompute appointment statistics from scratch."""
+    help = 'Rebuild the appointment and language statistics tables.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        users, languages = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt statistics for {users} users and {languages} languages.'
+        ))
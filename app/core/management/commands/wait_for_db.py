@@ -1,27 +1,126 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from psycopg2 import OperationalError as Psycopg2OpError
-
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
+    help = 'Wait until every given database accepts connections.'
+    # Only the connection matters here, not the project's system checks.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for; repeat for several. '
+                 'Defaults to "default".',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before failing; 0 waits forever.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.1,
+            help='Seconds before the first retry, doubled on each retry.',
+        )
+        parser.add_argument(
+            '--max-interval',
+            type=float,
+            default=2,
+            help='Longest delay between retries.',
+        )
+        parser.add_argument(
+            '--connect-timeout',
+            type=int,
+            default=10,
+            help='Seconds one connection attempt may take, cut to the '
+                 'time left before --timeout.',
+        )
+
+    def probe(self, alias, connect_timeout):
+        """Open, then close, a connection to alias.
+
+        The connection bypasses any pool, and gives up after
+        connect_timeout whole seconds.
+        """
+        connection = connections[alias]
+        params = connection.get_connection_params()
+        params['connect_timeout'] = connect_timeout
+        with connection.wrap_database_errors:
+            connection.Database.connect(**params).close()
+
+    def wait(self, alias, deadline, interval, max_interval, connect_timeout):
+        """Probe alias until it answers; return False on timeout."""
+        attempt = 0
+        while True:
+            if deadline is not None:
+                connect_timeout = min(
+                    connect_timeout,
+                    max(1, int(deadline - time.monotonic())),
+                )
+            try:
+                self.probe(alias, connect_timeout)
+                return True
+            except OperationalError:
+                pass
+            # Full jitter, so restarting services don't retry in step.
+            delay = random.uniform(
+                0,
+                min(max_interval, interval * 2 ** attempt),
+            )
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            self.stdout.write(
+                f'Database {alias} unavailable, retrying in {delay:.2f}s...'
+            )
+            time.sleep(delay)
+            attempt += 1
 
     def handle(self, *args, **options):
         """Entrypoint for command."""
+        aliases = options['databases'] or [DEFAULT_DB_ALIAS]
+        unknown = [alias for alias in aliases if alias not in connections]
+        if unknown:
+            raise CommandError(
+                f'Unknown database alias: {", ".join(unknown)}'
+            )
+        timeout = options['timeout']
+        deadline = time.monotonic() + timeout if timeout > 0 else None
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            results = executor.map(
+                lambda alias: self.wait(
+                    alias,
+                    deadline,
+                    options['interval'],
+                    options['max_interval'],
+                    options['connect_timeout'],
+                ),
+                aliases,
+            )
+            down = [
+                alias for alias, up in zip(aliases, results) if not up
+            ]
+        if down:
+            raise CommandError(
+                f'Database unavailable after {timeout:g} seconds: '
+                f'{", ".join(down)}'
+            )
 
-        self.stdout.write(self.style.SUCCESS('Database unavailable!'))
+        self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auto_20230619_1259'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', '-id'], name='core_appt_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='language',
+            index=models.Index(fields=['user', '-name'], name='core_lang_user_name_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:14
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_languages(apps, schema_editor):
+    """Keep one language per (user, name), moving appointments onto it."""
+    Language = apps.get_model('core', 'Language')
+    Appointment = apps.get_model('core', 'Appointment')
+    Through = Appointment._meta.get_field('languages').remote_field.through
+
+    duplicates = Language.objects.values('user', 'name').annotate(
+        keep=Min('id'),
+        copies=Count('id'),
+    ).filter(copies__gt=1)
+    for group in duplicates:
+        extra = Language.objects.filter(
+            user=group['user'],
+            name=group['name'],
+        ).exclude(id=group['keep'])
+        appointment_ids = set(
+            Through.objects.filter(language__in=extra).values_list(
+                'appointment_id',
+                flat=True,
+            )
+        ) - set(
+            Through.objects.filter(language_id=group['keep']).values_list(
+                'appointment_id',
+                flat=True,
+            )
+        )
+        Through.objects.bulk_create([
+            Through(appointment_id=appointment_id, language_id=group['keep'])
+            for appointment_id in appointment_ids
+        ])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_appointment_language_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_languages,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_merge_duplicate_languages'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='language',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='core_lang_user_name_uniq'),
+        ),
+        migrations.RemoveIndex(
+            model_name='language',
+            name='core_lang_user_name_idx',
+        ),
+    ]
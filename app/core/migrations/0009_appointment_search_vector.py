@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:36
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_TRIGGER = """
+CREATE FUNCTION core_appointment_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_appointment_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector
+    ON core_appointment
+    FOR EACH ROW EXECUTE FUNCTION core_appointment_search_vector_update();
+
+UPDATE core_appointment SET search_vector = NULL;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER core_appointment_search_vector_trigger ON core_appointment;
+DROP FUNCTION core_appointment_search_vector_update();
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_language_user_name_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='core_appt_search_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_appointment_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'price'], name='core_appt_user_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'time_minutes'], name='core_appt_user_minutes_idx'),
+        ),
+    ]
@@ -0,0 +1,186 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Statement-level triggers fold each INSERT, UPDATE or DELETE into the
+# summary tables with one statement per trigger, using transition tables.
+# Deletes only update existing rows, so a summary row already removed
+# with its user or language is not recreated.
+CREATE_TRIGGERS = """
+CREATE FUNCTION core_appointment_stats_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE core_appointmentstats AS stats SET
+            appointment_count = stats.appointment_count - changes.appointment_count,
+            total_price = stats.total_price - changes.total_price,
+            total_minutes = stats.total_minutes - changes.total_minutes
+        FROM (
+            SELECT user_id, count(*) AS appointment_count,
+                   sum(price) AS total_price,
+                   sum(time_minutes) AS total_minutes
+            FROM old_rows GROUP BY user_id
+        ) AS changes
+        WHERE stats.user_id = changes.user_id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO core_appointmentstats AS stats
+            (user_id, appointment_count, total_price, total_minutes)
+        SELECT user_id, count(*), sum(price), sum(time_minutes)
+        FROM new_rows GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            appointment_count = stats.appointment_count + EXCLUDED.appointment_count,
+            total_price = stats.total_price + EXCLUDED.total_price,
+            total_minutes = stats.total_minutes + EXCLUDED.total_minutes;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO core_appointmentstats AS stats
+        (user_id, appointment_count, total_price, total_minutes)
+    SELECT user_id, sum(appointment_count), sum(total_price), sum(total_minutes)
+    FROM (
+        SELECT user_id, 1 AS appointment_count, price AS total_price,
+               time_minutes AS total_minutes
+        FROM new_rows
+        UNION ALL
+        SELECT user_id, -1, -price, -time_minutes FROM old_rows
+    ) AS changes
+    GROUP BY user_id
+    HAVING sum(appointment_count) <> 0 OR sum(total_price) <> 0
+        OR sum(total_minutes) <> 0
+    ON CONFLICT (user_id) DO UPDATE SET
+        appointment_count = stats.appointment_count + EXCLUDED.appointment_count,
+        total_price = stats.total_price + EXCLUDED.total_price,
+        total_minutes = stats.total_minutes + EXCLUDED.total_minutes;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_appointment_stats_insert
+    AFTER INSERT ON core_appointment
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_appointment_stats_update();
+
+CREATE TRIGGER core_appointment_stats_update
+    AFTER UPDATE ON core_appointment
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_appointment_stats_update();
+
+CREATE TRIGGER core_appointment_stats_delete
+    AFTER DELETE ON core_appointment
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_appointment_stats_update();
+
+CREATE FUNCTION core_language_stats_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE core_languagestats AS stats SET
+            appointment_count = stats.appointment_count - changes.appointment_count
+        FROM (
+            SELECT language_id, count(*) AS appointment_count
+            FROM old_rows GROUP BY language_id
+        ) AS changes
+        WHERE stats.language_id = changes.language_id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO core_languagestats AS stats
+            (language_id, user_id, appointment_count)
+        SELECT language.id, language.user_id, count(*)
+        FROM new_rows
+        JOIN core_language AS language ON language.id = new_rows.language_id
+        GROUP BY language.id, language.user_id
+        ON CONFLICT (language_id) DO UPDATE SET
+            appointment_count = stats.appointment_count + EXCLUDED.appointment_count;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO core_languagestats AS stats
+        (language_id, user_id, appointment_count)
+    SELECT language.id, language.user_id, sum(changes.appointment_count)
+    FROM (
+        SELECT language_id, 1 AS appointment_count FROM new_rows
+        UNION ALL
+        SELECT language_id, -1 FROM old_rows
+    ) AS changes
+    JOIN core_language AS language ON language.id = changes.language_id
+    GROUP BY language.id, language.user_id
+    HAVING sum(changes.appointment_count) <> 0
+    ON CONFLICT (language_id) DO UPDATE SET
+        appointment_count = stats.appointment_count + EXCLUDED.appointment_count;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_language_stats_insert
+    AFTER INSERT ON core_appointment_languages
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_language_stats_update();
+
+CREATE TRIGGER core_language_stats_update
+    AFTER UPDATE ON core_appointment_languages
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_language_stats_update();
+
+CREATE TRIGGER core_language_stats_delete
+    AFTER DELETE ON core_appointment_languages
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_language_stats_update();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER core_language_stats_delete ON core_appointment_languages;
+DROP TRIGGER core_language_stats_update ON core_appointment_languages;
+DROP TRIGGER core_language_stats_insert ON core_appointment_languages;
+DROP FUNCTION core_language_stats_update();
+DROP TRIGGER core_appointment_stats_delete ON core_appointment;
+DROP TRIGGER core_appointment_stats_update ON core_appointment;
+DROP TRIGGER core_appointment_stats_insert ON core_appointment;
+DROP FUNCTION core_appointment_stats_update();
+"""
+
+BACKFILL = """
+INSERT INTO core_appointmentstats
+    (user_id, appointment_count, total_price, total_minutes)
+SELECT user_id, count(*), sum(price), sum(time_minutes)
+FROM core_appointment GROUP BY user_id;
+
+INSERT INTO core_languagestats (language_id, user_id, appointment_count)
+SELECT language.id, language.user_id, count(*)
+FROM core_appointment_languages AS through
+JOIN core_language AS language ON language.id = through.language_id
+GROUP BY language.id, language.user_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_appointment_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.user')),
+                ('appointment_count', models.BigIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_minutes', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LanguageStats',
+            fields=[
+                ('language', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.language')),
+                ('appointment_count', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_appointment_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -2,6 +2,8 @@
 Database Models.
 """
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -39,6 +41,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # time.time_ns() of the last change to the user's appointments or
+    # languages, 0 if there was none; see appointment.cache.
+    data_version = models.BigIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
@@ -57,11 +62,66 @@ class Appointment(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     languages = models.ManyToManyField('Language')
+    # Weighted title and description lexemes, maintained by a database
+    # trigger (see migration 0009) so raw SQL and bulk writes keep it too.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='core_appt_user_id_idx',
+            ),
+            models.Index(
+                fields=['user', 'price'],
+                name='core_appt_user_price_idx',
+            ),
+            models.Index(
+                fields=['user', 'time_minutes'],
+                name='core_appt_user_minutes_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='core_appt_search_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class LanguageManager(models.Manager):
+    """Manager for languages."""
+
+    def get_or_create_many(self, user, names):
+        """Return a {name: language} dict for user, creating missing ones.
+
+        Runs at most three queries however many names are given. Rows
+        created concurrently by another request are picked up rather than
+        duplicated, thanks to the unique (user, name) constraint.
+        """
+        names = set(names)
+        if not names:
+            return {}
+
+        languages = {
+            language.name: language
+            for language in self.filter(user=user, name__in=names)
+        }
+        missing = names - languages.keys()
+        if missing:
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            languages.update(
+                (language.name, language)
+                for language in self.filter(user=user, name__in=missing)
+            )
+
+        return languages
+
+
 class Language(models.Model):
     """Tag for filtering appointments & interpreters."""
     name = models.CharField(max_length=255)
@@ -70,5 +130,54 @@ class Language(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = LanguageManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='core_lang_user_name_uniq',
+            ),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class AppointmentStats(models.Model):
+    """Running appointment totals of a user.
+
+    Maintained by statement-level triggers on core_appointment (see
+    migration 0011) in the same transaction as every write, and rebuilt
+    from scratch by the rebuild_appointment_stats command.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    appointment_count = models.BigIntegerField(default=0)
+    total_price = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+    )
+    total_minutes = models.BigIntegerField(default=0)
+
+
+class LanguageStats(models.Model):
+    """Number of appointments tagged with a language.
+
+    Maintained by triggers on the appointment languages table like
+    AppointmentStats.
+    """
+    language = models.OneToOneField(
+        Language,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    appointment_count = models.BigIntegerField(default=0)
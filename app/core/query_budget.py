@@ -0,0 +1,99 @@
+"""
+Query budgets for views and other blocks of code.
+
+A budget is the most database queries a block may run. Going over it
+raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (the default
+under DEBUG) and logs a warning otherwise.
+"""
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a block runs more queries than its budget allows."""
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Count queries run on every configured database inside the block."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def check_budget(label, budget, used):
+    """Fail or warn if `used` queries is over `budget`."""
+    if budget is None or used <= budget:
+        return
+    msg = f'{label} ran {used} queries, over its budget of {budget}.'
+    if getattr(settings, 'QUERY_BUDGET_STRICT', settings.DEBUG):
+        raise QueryBudgetExceeded(msg)
+    logger.warning(msg)
+
+
+@contextmanager
+def query_budget(max_queries, label='Block'):
+    """Context manager and decorator enforcing a query budget."""
+    with count_queries() as counter:
+        yield counter
+    check_budget(label, max_queries, counter.count)
+
+
+class QueryBudgetMixin:
+    """Enforce per-action query budgets on a DRF view.
+
+    `query_budgets` maps the viewset action (or the lower-cased HTTP
+    method for plain views) to the most queries the request may run,
+    authentication included.
+    """
+    query_budgets = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        with count_queries() as counter:
+            response = super().dispatch(request, *args, **kwargs)
+        action = getattr(self, 'action', None) or request.method.lower()
+        check_budget(
+            f'{self.__class__.__name__}.{action}',
+            self.query_budgets.get(action),
+            counter.count,
+        )
+        return response
+
+
+class QueryBudgetTestMixin:
+    """TestCase helpers for asserting query budgets."""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, using='default'):
+        """Assert the block runs at most `max_queries` queries."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > max_queries:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, at most {max_queries} '
+                f'expected.\nCaptured queries were:\n{queries}'
+            )
@@ -0,0 +1,179 @@
+"""
+Renderers for the API.
+"""
+import csv
+import io
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, with the stdlib encoder as fallback.
+
+    Output is byte-for-byte what JSONRenderer produces: datetimes, dates
+    and times are passed through to DRF's encoder, and anything orjson
+    cannot encode is retried with the stdlib path. Pretty-printed output
+    (an indent parameter) is always rendered by the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent is not None or not self.compact or (
+            self.ensure_ascii
+        ):
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context,
+            )
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(
+                    orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                    | orjson.OPT_NON_STR_KEYS
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context,
+            )
+
+        # Escape U+2028 and U+2029 like JSONRenderer does, so the output
+        # stays a strict JavaScript subset.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9',
+                b'\\u2029',
+            )
+        return ret
+
+
+def msgpack_default(obj):
+    """Convert obj to a type MessagePack can pack.
+
+    Decimals become their exact string form ("5.25"), the same value the
+    JSON API returns for prices, so no precision is lost to floats.
+    Everything else is converted the way DRF's JSONEncoder does.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer which serializes to MessagePack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:  # pragma: no cover
+            raise ImproperlyConfigured(
+                'MessagePackRenderer requires the msgpack package.'
+            )
+        if data is None:
+            return b''
+
+        return msgpack.packb(
+            data,
+            default=msgpack_default,
+            use_bin_type=True,
+        )
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renderer for newline-delimited JSON, one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    json_renderer_class = FastJSONRenderer
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+
+        return b''.join(self.render_stream([data]))
+
+    def render_stream(self, chunks, header=None):
+        """Yield the encoded lines for each chunk of rows."""
+        renderer = self.json_renderer_class()
+        for rows in chunks:
+            yield b''.join(renderer.render(row) + b'\n' for row in rows)
+
+
+class CSVRenderer(BaseRenderer):
+    """Renderer for CSV with a header row.
+
+    The header defaults to the keys of the first row. List values are
+    joined with semicolons.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+
+        return b''.join(self.render_stream([data]))
+
+    def format_value(self, value):
+        """Return value as a single CSV cell."""
+        if value is None:
+            return ''
+        if isinstance(value, (list, tuple)):
+            return ';'.join(str(self.format_value(item)) for item in value)
+        return value
+
+    def render_stream(self, chunks, header=None):
+        """Yield the header, then the encoded rows for each chunk."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header is not None:
+            writer.writerow(header)
+            yield self._drain(buffer)
+
+        for rows in chunks:
+            for row in rows:
+                if header is None:
+                    header = list(row)
+                    writer.writerow(header)
+                writer.writerow(
+                    [self.format_value(row.get(field)) for field in header]
+                )
+            yield self._drain(buffer)
+
+    def _drain(self, buffer):
+        value = buffer.getvalue().encode(self.charset)
+        buffer.seek(0)
+        buffer.truncate()
+        return value
@@ -0,0 +1,188 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is
+rendered once per code version and format, kept in memory and under
+OPENAPI_SCHEMA_CACHE['DIR'], and served with an ETag and, to clients
+that accept it, gzipped. `manage.py build_schema` renders it ahead of
+time; otherwise the first request does.
+"""
+import gzip
+import hashlib
+import threading
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+# Installed packages whose upgrade can change the generated schema.
+SCHEMA_PACKAGES = ('Django', 'djangorestframework', 'drf-spectacular')
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Return OPENAPI_SCHEMA_CACHE['VERSION'] or a hash of the code.
+
+    The hash covers the project's Python sources and the versions of
+    SCHEMA_PACKAGES, so any change to them renders a new schema.
+    """
+    if settings.OPENAPI_SCHEMA_CACHE['VERSION']:
+        return settings.OPENAPI_SCHEMA_CACHE['VERSION']
+    digest = hashlib.sha256()
+    for package in SCHEMA_PACKAGES:
+        try:
+            digest.update(f'{package}=={version(package)}\n'.encode())
+        except PackageNotFoundError:
+            pass
+    base_dir = Path(settings.BASE_DIR)
+    for path in sorted(base_dir.rglob('*.py')):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def accepts_gzip(request):
+    """Return whether the client takes gzip-encoded responses.
+
+    gzip, or failing that *, must be listed in Accept-Encoding with a
+    q-value above 0; q=0 refuses the coding.
+    """
+    qvalues = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, *params = coding.split(';')
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[name.strip().lower()] = qvalue
+    return qvalues.get('gzip', qvalues.get('*', 0.0)) > 0
+
+
+def content_type(renderer):
+    """Return the Content-Type DRF would send for renderer."""
+    if renderer.charset:
+        return f'{renderer.media_type}; charset={renderer.charset}'
+    return renderer.media_type
+
+
+class RenderedSchema:
+    """A rendered schema with its gzipped body and ETag."""
+
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.etag = quote_etag(hashlib.sha256(body).hexdigest()[:32])
+
+
+class SchemaCache:
+    """Rendered schemas by code version, format and language."""
+
+    def __init__(self):
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        self._rendered.clear()
+
+    def path(self, fmt, lang=None):
+        """Return the file a rendered schema is kept in."""
+        name = f'schema-{lang}.{fmt}' if lang else f'schema.{fmt}'
+        return (
+            Path(settings.OPENAPI_SCHEMA_CACHE['DIR']) / code_version() / name
+        )
+
+    def get(self, renderer, lang=None):
+        """Return the RenderedSchema for renderer's format and lang."""
+        key = (code_version(), renderer.format, lang)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            # One request renders; the others wait for it.
+            with self._lock:
+                rendered = self._rendered.get(key)
+                if rendered is None:
+                    rendered = self._load(renderer, lang)
+                    self._rendered[key] = rendered
+        return rendered
+
+    def _load(self, renderer, lang):
+        path = self.path(renderer.format, lang)
+        try:
+            return RenderedSchema(path.read_bytes())
+        except OSError:
+            pass
+        body = render_schema(renderer, lang)
+        try:
+            self.write(path, body)
+        except OSError:
+            # A read-only disk only costs the next process a render.
+            pass
+        return RenderedSchema(body)
+
+    def write(self, path, body):
+        """Write body to path atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        partial.write_bytes(body)
+        partial.replace(path)
+
+
+schema_cache = SchemaCache()
+
+
+def render_schema(renderer, lang=None):
+    """Generate the public schema and render it with renderer."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        urlconf=spectacular_settings.SERVE_URLCONF,
+    )
+    with translation.override(lang or settings.LANGUAGE_CODE):
+        schema = generator.get_schema(request=None, public=True)
+        return renderer.render(schema, renderer_context={})
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """Serve the schema from schema_cache.
+
+    Answers If-None-Match with 304, and sends the gzipped body to
+    clients that accept it.
+    """
+
+    def _get_schema_response(self, request):
+        renderer = request.accepted_renderer
+        lang = request.GET.get('lang') if settings.USE_I18N else None
+        if lang not in dict(settings.LANGUAGES):
+            lang = None
+        rendered = schema_cache.get(renderer, lang)
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None and rendered.etag in [
+            _strip_weak(etag) for etag in parse_etags(if_none_match)
+        ]:
+            response = HttpResponseNotModified()
+        elif accepts_gzip(request):
+            response = HttpResponse(
+                rendered.gzipped,
+                content_type=content_type(renderer),
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                rendered.body,
+                content_type=content_type(renderer),
+            )
+        response['ETag'] = rendered.etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
@@ -0,0 +1,29 @@
+"""
+Shared serializer helpers.
+"""
+
+
+class UpdateChangedFieldsMixin:
+    """ModelSerializer mixin whose updates write only changed columns.
+
+    The UPDATE names just the fields whose values differ, so concurrent
+    PATCHes to different fields do not overwrite each other, and an
+    update that changes nothing skips the write entirely.
+    """
+
+    def save_changed(self, instance, validated_data, changed=()):
+        """Apply validated_data to instance and save what changed."""
+        update_fields = list(changed)
+        for attr, value in validated_data.items():
+            if getattr(instance, attr) != value:
+                setattr(instance, attr, value)
+                update_fields.append(attr)
+
+        if update_fields:
+            instance.save(update_fields=update_fields)
+
+        return instance
+
+    def update(self, instance, validated_data):
+        """Update and return instance, saving only changed fields."""
+        return self.save_changed(instance, validated_data)
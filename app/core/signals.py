@@ -0,0 +1,23 @@
+"""
+Signal receivers for the core app.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a token once it is deleted."""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_saved_user_token(sender, instance, created, **kwargs):
+    """Drop cached copies of a user, e.g. after deactivation."""
+    if not created:
+        token_cache.delete_user(instance.id)
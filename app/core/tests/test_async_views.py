@@ -0,0 +1,60 @@
+"""
+Tests for streaming responses under WSGI and ASGI.
+"""
+import asyncio
+import contextvars
+import io
+
+from django.core.handlers.asgi import ASGIRequest
+from django.test import RequestFactory, SimpleTestCase
+
+from core.async_views import streaming_response
+
+current = contextvars.ContextVar('current', default=None)
+
+
+def read_current():
+    """Yield the value of current each time an item is produced."""
+    for _ in range(2):
+        yield current.get()
+
+
+def asgi_request():
+    """Return a bare ASGI GET request."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/',
+        'query_string': b'',
+        'headers': [],
+    }
+    return ASGIRequest(scope, io.BytesIO())
+
+
+class StreamingResponseTests(SimpleTestCase):
+    """Test content is produced in the context of the view."""
+
+    def build(self, request):
+        token = current.set('view')
+        try:
+            return streaming_response(request, read_current())
+        finally:
+            current.reset(token)
+
+    def test_wsgi_content_keeps_context(self):
+        """Test WSGI content sees the view's context variables."""
+        response = self.build(RequestFactory().get('/'))
+
+        self.assertEqual(b''.join(response.streaming_content), b'viewview')
+        response.close()
+
+    def test_asgi_content_keeps_context(self):
+        """Test ASGI content sees the view's context variables."""
+        response = self.build(asgi_request())
+
+        async def consume():
+            return b''.join([
+                part async for part in response.streaming_content
+            ])
+
+        self.assertEqual(asyncio.run(consume()), b'viewview')
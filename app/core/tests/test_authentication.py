@@ -0,0 +1,181 @@
+"""
+Tests for the cached token authentication.
+"""
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import TTLCache, TokenCache, token_cache
+
+ME_URL = reverse('user:me')
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(SimpleTestCase):
+    """Test the in-process LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full."""
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Test entries are not returned after their TTL."""
+        clock = FakeClock()
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set('a', 1)
+
+        clock.now = 9
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_on_remove_called(self):
+        """Test on_remove sees evicted, expired and deleted entries."""
+        clock = FakeClock()
+        removed = []
+        cache = TTLCache(
+            max_size=2,
+            ttl=10,
+            clock=clock,
+            on_remove=lambda key, value: removed.append(key),
+        )
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        cache.delete('b')
+        clock.now = 10
+        cache.get('c')
+
+        self.assertEqual(removed, ['a', 'b', 'c'])
+
+
+class TokenCacheTests(SimpleTestCase):
+    """Test the token cache's user index."""
+
+    def token(self, user_id):
+        return SimpleNamespace(
+            key=f'key-{user_id}',
+            user_id=user_id,
+            user=SimpleNamespace(id=user_id),
+        )
+
+    @override_settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 2, 'TTL': 60})
+    def test_user_index_bounded_by_lru(self):
+        """Test users whose tokens leave the LRU leave the index too."""
+        cache = TokenCache(max_size=2, ttl=60)
+        for user_id in range(10):
+            cache.set(self.token(user_id))
+
+        self.assertEqual(cache._user_keys, {8: 'key-8', 9: 'key-9'})
+
+        cache.delete('key-8')
+        self.assertEqual(cache._user_keys, {9: 'key-9'})
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_query(self):
+        """Test the token lookup only runs on the first request."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        stats = token_cache.stats()
+        self.assertEqual(stats['local_hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops working straight away."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user stops authenticating straight away."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_seen_on_next_request(self):
+        """Test cached users are refreshed after the user changes."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'tokens': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'test-token-auth',
+            },
+        },
+        TOKEN_AUTH_CACHE={'MAX_SIZE': 10, 'TTL': 60, 'SHARED_CACHE': 'tokens'},
+    )
+    def test_shared_tier(self):
+        """Test a token cached by another process is read from the tier."""
+        self.client.get(ME_URL)
+        token_cache.local.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()['shared_hits'], 1)
+
+        token_cache.local.clear()
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
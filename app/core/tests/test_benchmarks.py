@@ -0,0 +1,206 @@
+"""
+Tests for the benchmark helpers and the benchmark_api command.
+"""
+import asyncio
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.async_views import get_asgi_application
+from core.benchmarks import (
+    asgi_request,
+    count_all_queries,
+    summarize,
+    wsgi_request,
+)
+from core.management.commands.benchmark_api import ENDPOINTS, HARNESSES
+from core.models import Appointment
+
+CREATE_USER_URL = reverse('user:create')
+
+
+class SummarizeTests(SimpleTestCase):
+    """Test summarize."""
+
+    def test_percentiles(self):
+        """Test latency percentiles, throughput and queries per request."""
+        latencies = [i / 1000 for i in range(1, 101)]
+
+        summary = summarize(latencies, seconds=2, queries=250)
+
+        self.assertEqual(summary['requests'], 100)
+        self.assertAlmostEqual(summary['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['p95_ms'], 95.05)
+        self.assertAlmostEqual(summary['p99_ms'], 99.01)
+        self.assertEqual(summary['throughput_rps'], 50.0)
+        self.assertEqual(summary['queries_per_request'], 2.5)
+
+    def test_single_request(self):
+        """Test a single sample is every percentile."""
+        summary = summarize([0.01], seconds=0.01, queries=1)
+
+        self.assertEqual(summary['p50_ms'], 10.0)
+        self.assertEqual(summary['p99_ms'], 10.0)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class InProcessRequestTests(TransactionTestCase):
+    """Test the in-process WSGI and ASGI harnesses."""
+
+    def setUp(self):
+        self.body = json.dumps({
+            'email': 'user@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+        }).encode()
+        self.headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(self.body)).encode()),
+        ]
+
+    def test_wsgi_request(self):
+        """Test a request through the WSGI handler reaches the view."""
+        with count_all_queries() as queries:
+            status = wsgi_request(
+                get_wsgi_application(),
+                'POST',
+                CREATE_USER_URL,
+                self.headers,
+                self.body,
+            )
+
+        self.assertEqual(status, 201)
+        self.assertTrue(get_user_model().objects.exists())
+        self.assertGreater(queries.count, 0)
+
+    def test_asgi_request(self):
+        """Test a request through the ASGI handler reaches the view."""
+        status = asyncio.run(asgi_request(
+            get_asgi_application(),
+            'POST',
+            CREATE_USER_URL,
+            self.headers,
+            self.body,
+        ))
+
+        self.assertEqual(status, 201)
+        self.assertTrue(get_user_model().objects.exists())
+
+    def test_count_stops_after_block(self):
+        """Test queries after the block are not counted."""
+        with count_all_queries() as queries:
+            get_user_model().objects.exists()
+        get_user_model().objects.exists()
+
+        self.assertEqual(queries.count, 1)
+        self.assertNotIn(queries, connection.execute_wrappers)
+
+
+class BenchmarkApiCommandTests(TransactionTestCase):
+    """Test the benchmark_api command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'baseline.json')
+
+    def benchmark(self, **options):
+        call_command(
+            'benchmark_api',
+            users=2,
+            appointments=5,
+            languages=3,
+            requests=4,
+            warmup=1,
+            concurrency=2,
+            stdout=io.StringIO(),
+            **{'force': True, **options},
+        )
+
+    def test_writes_baseline(self):
+        """Test every harness and endpoint is measured and cleaned up."""
+        self.benchmark(output=self.output)
+
+        with open(self.output) as f:
+            report = json.load(f)
+        self.assertEqual(set(report['results']), set(HARNESSES))
+        for harness in HARNESSES:
+            results = report['results'][harness]
+            self.assertEqual(set(results), set(ENDPOINTS))
+            for summary in results.values():
+                self.assertEqual(summary['requests'], 4)
+                self.assertEqual(summary['errors'], 0)
+                self.assertLessEqual(summary['p50_ms'], summary['p99_ms'])
+        self.assertGreater(
+            report['results']['client']['appointment create']
+            ['queries_per_request'],
+            0,
+        )
+        self.assertEqual(report['options']['appointments'], 5)
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_refuses_without_debug_or_force(self):
+        """Test nothing is seeded with DEBUG off unless forced."""
+        with self.assertRaisesMessage(CommandError, '--force'):
+            self.benchmark(force=False)
+
+        self.assertFalse(get_user_model().objects.exists())
+
+    @override_settings(DEBUG=True)
+    def test_runs_with_debug(self):
+        """Test the command runs unforced when DEBUG is on."""
+        self.benchmark(force=False, harnesses=['client'])
+
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_failed_seed_cleaned_up(self):
+        """Test users seeded before a failure are deleted."""
+        with patch.object(
+            Token.objects,
+            'create',
+            side_effect=DatabaseError('seeding failed'),
+        ), self.assertRaises(DatabaseError):
+            self.benchmark()
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Appointment.objects.exists())
+
+    def record_baseline(self, **fast):
+        """Record a baseline slower than any run but for `fast` metrics."""
+        self.benchmark(output=self.output, harnesses=['client'])
+        with open(self.output) as f:
+            report = json.load(f)
+        for summary in report['results']['client'].values():
+            summary.update(
+                p95_ms=10 ** 6,
+                throughput_rps=0.001,
+                queries_per_request=1000,
+            )
+        report['results']['client']['appointment list'].update(fast)
+        with open(self.output, 'w') as f:
+            json.dump(report, f)
+
+    def test_regression_against_baseline(self):
+        """Test a slower run than the baseline fails the command."""
+        self.record_baseline(p95_ms=0.0001, throughput_rps=10 ** 9)
+
+        with self.assertRaisesMessage(CommandError, '2 regressions'):
+            self.benchmark(baseline=self.output, harnesses=['client'])
+
+    def test_no_regression_against_slow_baseline(self):
+        """Test a run at least as fast as the baseline passes."""
+        self.record_baseline()
+
+        self.benchmark(baseline=self.output, harnesses=['client'])
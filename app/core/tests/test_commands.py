@@ -1,34 +1,120 @@
 """
 Test custom Django management commands.
 """
+import io
+import threading
 from unittest.mock import patch
 
-from psycopg2 import OperationalError as Psycopg2Error
-
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.db import connections
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TransactionTestCase
 
 
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch.dict(connections.settings, replica1=connections.settings['default'])
+@patch('core.management.commands.wait_for_db.Command.probe')
 class CommandTests(SimpleTestCase):
     """Test Commands."""
 
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for database if database ready."""
-        patched_check.return_value = True
+        patched_probe.return_value = None
+        out = io.StringIO()
 
-        call_command('wait_for_db')
+        call_command('wait_for_db', stdout=out)
 
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with('default', 10)
+        self.assertIn('Database available!', out.getvalue())
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for database when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2Error] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [OperationalError] * 5 + [None]
+
+        call_command('wait_for_db', interval=1, max_interval=4,
+                     stdout=io.StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+        patched_probe.assert_called_with('default', 10)
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        for delay, limit in zip(delays, [1, 2, 4, 4, 4]):
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, limit)
+
+    def test_wait_for_db_timeout(self, patched_probe):
+        """Test the command fails once the timeout has passed."""
+        patched_probe.side_effect = OperationalError
+
+        with self.assertRaisesMessage(CommandError, 'default'):
+            call_command('wait_for_db', timeout=0.05, interval=0.01,
+                         stdout=io.StringIO())
+
+    def test_wait_for_several_databases(self, patched_probe):
+        """Test several databases are probed in parallel."""
+        threads = set()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def probe(alias, connect_timeout):
+            threads.add(threading.current_thread().name)
+            barrier.wait()
+
+        patched_probe.side_effect = probe
+
+        call_command('wait_for_db', database=['default', 'replica1'],
+                     stdout=io.StringIO())
+
+        self.assertEqual(len(threads), 2)
+
+    def test_reports_databases_still_down(self, patched_probe):
+        """Test only the databases that never answered are reported."""
+        def probe(alias, connect_timeout):
+            if alias == 'replica1':
+                raise OperationalError
+
+        patched_probe.side_effect = probe
+
+        with self.assertRaisesMessage(CommandError, ': replica1'):
+            call_command('wait_for_db', database=['default', 'replica1'],
+                         timeout=0.05, interval=0.01, stdout=io.StringIO())
+
+    def test_connect_timeout_within_timeout(self, patched_probe):
+        """Test a connection attempt never outlasts the time left."""
+        call_command('wait_for_db', timeout=3, connect_timeout=10,
+                     stdout=io.StringIO())
+
+        connect_timeout = patched_probe.call_args.args[1]
+        self.assertGreaterEqual(connect_timeout, 1)
+        self.assertLessEqual(connect_timeout, 3)
+
+    def test_unknown_database(self, patched_probe):
+        """Test an alias missing from DATABASES fails the command."""
+        with self.assertRaisesMessage(CommandError, 'replica9'):
+            call_command('wait_for_db', database=['default', 'replica9'],
+                         stdout=io.StringIO())
+
+        patched_probe.assert_not_called()
+
+
+class WaitForDbConnectionTests(TransactionTestCase):
+    """Test wait_for_db against the test database."""
+
+    def test_connects_to_database(self):
+        """Test the command returns as soon as the database answers."""
+        out = io.StringIO()
+
+        call_command('wait_for_db', timeout=5, stdout=out)
 
-        call_command('wait_for_db')
+        self.assertNotIn('unavailable', out.getvalue())
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+    def test_unreachable_database(self):
+        """Test a database that refuses connections times out."""
+        settings_dict = {
+            **connections.settings['default'],
+            'HOST': '127.0.0.1',
+            'PORT': '1',
+        }
+        with patch.dict(connections.settings, unreachable=settings_dict):
+            with self.assertRaisesMessage(CommandError, 'unreachable'):
+                call_command('wait_for_db', database=['unreachable'],
+                             timeout=0.2, interval=0.05,
+                             stdout=io.StringIO())
@@ -0,0 +1,263 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+from unittest.mock import Mock
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db_pool.pool import ConnectionPool, PoolTimeout
+
+DB_POOL_URL = reverse('db-pool')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        self.connection.pings += 1
+        if self.connection.broken:
+            raise psycopg2.OperationalError('server closed the connection')
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test ConnectionPool."""
+
+    def create_pool(self, **options):
+        self.clock = FakeClock()
+        self.opened = []
+
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+
+        return ConnectionPool(connect, clock=self.clock, **options)
+
+    def test_reuses_returned_connection(self):
+        """Test a returned connection is handed out again."""
+        pool = self.create_pool(max_size=2)
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_min_size_opened_up_front(self):
+        """Test min_size connections are opened on first use."""
+        pool = self.create_pool(min_size=3, max_size=5)
+
+        pool.getconn()
+
+        self.assertEqual(len(self.opened), 3)
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Test a checkout fails after the timeout when all are busy."""
+        pool = self.create_pool(max_size=1, timeout=0)
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        """Test a waiting thread gets the connection another returns."""
+        connection = FakeConnection()
+        pool = ConnectionPool(lambda: connection, max_size=1, timeout=5)
+        checked_out = pool.getconn()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(
+            pool.getconn(),
+        ))
+
+        waiter.start()
+        while pool.stats()['waits'] == 0:
+            time.sleep(0.001)
+        pool.putconn(checked_out)
+        waiter.join(5)
+
+        self.assertEqual(result, [connection])
+
+    def test_failed_health_check_replaces_connection(self):
+        """Test a connection failing its ping is closed and replaced."""
+        pool = self.create_pool(max_size=2, check_interval=5)
+        first = pool.getconn()
+        pool.putconn(first)
+        first.broken = True
+        self.clock.now += 10
+
+        second = pool.getconn()
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_recently_used_connection_not_pinged(self):
+        """Test connections used within check_interval skip the ping."""
+        pool = self.create_pool(check_interval=5)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.clock.now += 1
+
+        pool.getconn()
+
+        self.assertEqual(first.pings, 0)
+
+    def test_old_connections_recycled(self):
+        """Test connections past max_lifetime are closed, not reused."""
+        pool = self.create_pool(max_lifetime=60)
+        first = pool.getconn()
+        self.clock.now += 61
+        pool.putconn(first)
+
+        second = pool.getconn()
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+    def test_idle_connections_trimmed_to_min_size(self):
+        """Test connections idle past max_idle are closed down to min."""
+        pool = self.create_pool(min_size=1, max_size=3, max_idle=30)
+        connections = [pool.getconn() for _ in range(3)]
+        for conn in connections:
+            pool.putconn(conn)
+        self.clock.now += 31
+
+        pool.getconn()
+
+        self.assertEqual(sum(conn.closed for conn in self.opened), 2)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_open_transaction_rolled_back_on_return(self):
+        """Test a connection returned mid-transaction is rolled back."""
+        pool = self.create_pool()
+        conn = pool.getconn()
+        conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+        pool.putconn(conn)
+
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_closed_connection_discarded_on_return(self):
+        """Test a connection closed while in use is not pooled."""
+        pool = self.create_pool()
+        conn = pool.getconn()
+        conn.closed = 1
+
+        pool.putconn(conn)
+
+        self.assertEqual(pool.stats()['idle'], 0)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_closed_connection_replaced_on_checkout(self):
+        """Test returning a connection never connects, even if it fails."""
+        pool = self.create_pool(min_size=1)
+        conn = pool.getconn()
+        connect = pool.connect
+        pool.connect = Mock(side_effect=psycopg2.OperationalError)
+
+        pool.putconn(conn, close=True)
+
+        pool.connect.assert_not_called()
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.connect = connect
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEqual(pool.stats()['size'], 1)
+
+
+class PooledBackendTests(TransactionTestCase):
+    """Test the pooled database backend."""
+
+    def test_connection_reused_after_close(self):
+        """Test closing the Django connection keeps the server session."""
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            pid = cursor.fetchone()[0]
+        connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            self.assertEqual(cursor.fetchone()[0], pid)
+
+
+class DatabasePoolStatsApiTests(TestCase):
+    """Test the pool metrics endpoint."""
+
+    def test_stats_admin_only(self):
+        """Test pool metrics are only shown to staff."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(DB_POOL_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = res.data[connection.settings_dict['NAME']][0]
+        self.assertGreaterEqual(stats['in_use'], 1)
+        self.assertIn('waits', stats)
@@ -0,0 +1,409 @@
+"""
+Tests for read replica routing.
+"""
+import asyncio
+import contextvars
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+)
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from appointment.cache import bump_data_version
+from core import db_router
+from core.db_router import (
+    ReplicaHealth,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    pin_if_written_since,
+    sticky_seconds,
+    use_primary,
+)
+from core.models import Appointment
+from core.throttling import local_buckets
+
+REPLICAS = ['replica1', 'replica2']
+
+APPOINTMENTS_URL = reverse('appointment:appointment-list')
+EXPORT_URL = reverse('appointment:appointment-export')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def routing(**options):
+    """Return REPLICA_ROUTING with options overridden."""
+    return {**settings.REPLICA_ROUTING, **options}
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test ReplicaRouter."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.down = set()
+        for name, value in (
+            ('is_healthy', lambda alias: alias not in self.down),
+            ('start', lambda: None),
+        ):
+            patcher = patch.object(db_router.replica_health, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reads_rotate_over_replicas(self):
+        """Test reads go to each replica in turn."""
+        aliases = [self.router.db_for_read(Appointment) for _ in range(4)]
+
+        self.assertEqual(aliases, REPLICAS * 2)
+
+    def test_writes_go_to_primary(self):
+        """Test writes always go to the primary."""
+        self.assertEqual(
+            self.router.db_for_write(Appointment),
+            DEFAULT_DB_ALIAS,
+        )
+
+    def test_unhealthy_replica_skipped(self):
+        """Test a replica out of rotation gets no reads."""
+        self.down.add('replica1')
+
+        aliases = {self.router.db_for_read(Appointment) for _ in range(4)}
+
+        self.assertEqual(aliases, {'replica2'})
+
+    def test_all_replicas_down_reads_primary(self):
+        """Test reads fall back to the primary with no healthy replica."""
+        self.down.update(REPLICAS)
+
+        self.assertEqual(
+            self.router.db_for_read(Appointment),
+            DEFAULT_DB_ALIAS,
+        )
+
+    def test_use_primary_pins_reads(self):
+        """Test reads inside use_primary go to the primary."""
+        with use_primary():
+            self.assertEqual(
+                self.router.db_for_read(Appointment),
+                DEFAULT_DB_ALIAS,
+            )
+
+        self.assertIn(self.router.db_for_read(Appointment), REPLICAS)
+
+    def test_tokens_read_from_primary(self):
+        """Test token lookups are not sent to replicas."""
+        self.assertEqual(self.router.db_for_read(Token), DEFAULT_DB_ALIAS)
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations only run against the primary."""
+        self.assertFalse(self.router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_reads_primary(self):
+        """Test reads go to the primary when no replica is configured."""
+        self.assertEqual(
+            self.router.db_for_read(Appointment),
+            DEFAULT_DB_ALIAS,
+        )
+
+
+@override_settings(
+    DATABASE_REPLICAS=REPLICAS,
+    REPLICA_ROUTING=routing(STICKY_SECONDS=5, CHECK_INTERVAL=5, MAX_LAG=30),
+)
+class StickyWindowTests(SimpleTestCase):
+    """Test how long reads stay on the primary after a change."""
+
+    def pinned_after(self, seconds_ago):
+        def pin():
+            # As ReplicaRoutingMiddleware leaves a read request.
+            db_router._use_primary.set(False)
+            pin_if_written_since(time.time_ns() - int(seconds_ago * 10 ** 9))
+            return db_router._use_primary.get()
+
+        return contextvars.copy_context().run(pin)
+
+    def test_window_covers_replica_lag(self):
+        """Test the window outlasts the lag a replica in rotation has."""
+        self.assertEqual(sticky_seconds(), 35)
+
+    def test_outside_request_not_pinned(self):
+        """Test nothing is pinned outside a routed request."""
+        def pin():
+            pin_if_written_since(time.time_ns())
+            return db_router._use_primary.get()
+
+        self.assertIsNone(contextvars.copy_context().run(pin))
+
+    def test_recent_change_pins_reads(self):
+        """Test reads go to the primary until replicas have the change."""
+        self.assertTrue(self.pinned_after(34))
+        self.assertFalse(self.pinned_after(36))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_not_pinned(self):
+        """Test nothing is pinned without replicas."""
+        self.assertFalse(self.pinned_after(0))
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1'],
+    REPLICA_ROUTING=routing(CHECK_INTERVAL=5, MAX_LAG=30),
+)
+class ReplicaHealthTests(SimpleTestCase):
+    """Test ReplicaHealth."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.health = ReplicaHealth(clock=self.clock)
+        self.results = {'replica1': [True]}
+        self.checks = 0
+
+        def check(alias):
+            self.checks += 1
+            return self.results[alias][-1]
+
+        self.health.check = check
+
+    def test_unchecked_replica_unhealthy(self):
+        """Test a replica is out of rotation until a check passes."""
+        self.assertFalse(self.health.is_healthy('replica1'))
+        self.assertEqual(self.checks, 0)
+
+        self.health.refresh()
+
+        self.assertTrue(self.health.is_healthy('replica1'))
+        self.assertEqual(self.checks, 1)
+
+    def test_replica_leaves_and_rejoins_rotation(self):
+        """Test a failed replica is rechecked and comes back."""
+        self.results['replica1'].append(False)
+        self.health.refresh()
+        self.assertFalse(self.health.is_healthy('replica1'))
+
+        self.results['replica1'].append(True)
+        self.health.refresh()
+        self.assertTrue(self.health.is_healthy('replica1'))
+
+    def test_stale_result_unhealthy(self):
+        """Test a replica leaves rotation when checks stop arriving."""
+        self.health.refresh()
+        self.clock.now += 14
+
+        self.assertTrue(self.health.is_healthy('replica1'))
+        self.clock.now += 1
+        self.assertFalse(self.health.is_healthy('replica1'))
+
+    def test_checks_run_in_background(self):
+        """Test the checking thread records results without requests."""
+        self.health.start()
+        self.addCleanup(self.health.stop)
+        deadline = time.monotonic() + 5
+        while self.checks == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertTrue(self.health.is_healthy('replica1'))
+
+    def test_unreachable_replica_unhealthy(self):
+        """Test a replica that cannot be reached fails its check."""
+        with patch.object(
+            connections[DEFAULT_DB_ALIAS],
+            'ensure_connection',
+            side_effect=OperationalError('could not connect'),
+        ), self.assertLogs('core.db_router', 'WARNING'):
+            self.assertFalse(ReplicaHealth().check(DEFAULT_DB_ALIAS))
+
+
+class ReplicaHealthCheckTests(TestCase):
+    """Test health checks against a real database."""
+
+    def test_primary_standing_in_passes(self):
+        """Test a database that is not in recovery passes its check."""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as ctx:
+            healthy = ReplicaHealth().check(DEFAULT_DB_ALIAS)
+
+        self.assertTrue(healthy)
+        self.assertEqual(len(ctx), 0)
+
+
+@override_settings(
+    DATABASE_REPLICAS=REPLICAS,
+    REPLICA_ROUTING=routing(STICKY_SECONDS=60),
+)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Test ReplicaRoutingMiddleware."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.pinned = []
+        self.status = 200
+
+    def get_response(self, request):
+        self.pinned.append(db_router._use_primary.get())
+        return HttpResponse(status=self.status)
+
+    def send(self, method, token='abc'):
+        request = self.factory.generic(
+            method,
+            '/',
+            HTTP_AUTHORIZATION=f'Token {token}',
+        )
+        ReplicaRoutingMiddleware(self.get_response)(request)
+        return self.pinned[-1]
+
+    def test_reads_use_replicas(self):
+        """Test a client that has not written reads from replicas."""
+        self.assertFalse(self.send('GET'))
+        self.assertFalse(db_router._use_primary.get())
+
+    def test_writes_pinned_to_primary(self):
+        """Test a write request reads from the primary."""
+        self.assertTrue(self.send('POST'))
+        self.assertFalse(db_router._use_primary.get())
+
+    def test_reads_after_write_stick_to_primary(self):
+        """Test a client's reads follow its write to the primary."""
+        self.send('PATCH')
+
+        self.assertTrue(self.send('GET'))
+        self.assertFalse(self.send('GET', token='other'))
+
+    def test_failed_write_not_sticky(self):
+        """Test a rejected write does not pin later reads."""
+        self.status = 400
+        self.send('POST')
+
+        self.assertFalse(self.send('GET'))
+
+    @override_settings(REPLICA_ROUTING=routing(
+        STICKY_SECONDS=0.05,
+        MAX_LAG=0,
+        CHECK_INTERVAL=0,
+    ))
+    def test_stickiness_expires(self):
+        """Test reads return to replicas after the sticky window."""
+        self.send('DELETE')
+        time.sleep(0.1)
+
+        self.assertFalse(self.send('GET'))
+
+    def test_async_requests(self):
+        """Test the middleware pins async requests too."""
+        async def get_response(request):
+            return self.get_response(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = self.factory.post('/', HTTP_AUTHORIZATION='Token abc')
+
+        asyncio.run(middleware(request))
+
+        self.assertEqual(self.pinned, [True])
+        self.assertTrue(self.send('GET'))
+
+    def test_streaming_content_keeps_pin(self):
+        """Test streamed content is produced with the request's pin."""
+        def content():
+            yield str(db_router._use_primary.get())
+
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: StreamingHttpResponse(content()),
+        )
+        request = self.factory.post('/', HTTP_AUTHORIZATION='Token abc')
+
+        response = middleware(request)
+
+        self.assertEqual(b''.join(response.streaming_content), b'True')
+        self.assertFalse(db_router._use_primary.get())
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'No read replica configured.')
+class ReplicaRoutingApiTests(TransactionTestCase):
+    """Test API requests against the configured replicas."""
+
+    databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        local_buckets.clear()
+        db_router.replica_health.clear()
+        self.addCleanup(db_router.replica_health.stop)
+        with override_settings(
+            DATABASE_REPLICAS=settings.DATABASE_REPLICAS[:1],
+        ):
+            db_router.replica_health.refresh()
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.user = user
+        # Data last changed long before the replicas were checked.
+        get_user_model().objects.filter(pk=user.id).update(
+            data_version=time.time_ns() - 3600 * 10 ** 9,
+        )
+        token = Token.objects.create(user=user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def replica_queries(self, method, *args, **kwargs):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with override_settings(
+            DATABASE_REPLICAS=settings.DATABASE_REPLICAS[:1],
+            APPOINTMENT_LIST_CACHE_TIMEOUT=0,
+        ), CaptureQueriesContext(replica) as ctx:
+            res = getattr(self.client, method)(*args, **kwargs)
+            if res.streaming:
+                b''.join(res.streaming_content)
+        self.assertLess(res.status_code, 400)
+        return len(ctx)
+
+    def test_list_reads_from_replica_until_write(self):
+        """Test lists read from a replica, except just after a write."""
+        self.assertGreater(self.replica_queries('get', APPOINTMENTS_URL), 0)
+
+        self.client.post(APPOINTMENTS_URL, {
+            'title': 'Sample',
+            'time_minutes': 30,
+            'price': '5.25',
+        })
+
+        self.assertEqual(self.replica_queries('get', APPOINTMENTS_URL), 0)
+
+    def test_export_reads_from_primary_after_write(self):
+        """Test a streamed export keeps the request's routing."""
+        self.assertGreater(self.replica_queries('get', EXPORT_URL), 0)
+
+        self.client.post(APPOINTMENTS_URL, {
+            'title': 'Sample',
+            'time_minutes': 30,
+            'price': '5.25',
+        })
+
+        self.assertEqual(self.replica_queries('get', EXPORT_URL), 0)
+
+    def test_list_reads_from_primary_after_any_change(self):
+        """Test a list is not cached from a replica lacking a change."""
+        bump_data_version(self.user.id)
+
+        self.assertEqual(self.replica_queries('get', APPOINTMENTS_URL), 0)
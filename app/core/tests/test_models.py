@@ -3,6 +3,7 @@ Tests for models.
 """
 from decimal import Decimal
 
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -76,3 +77,28 @@ class ModelTests(TestCase):
         tag = models.Language.objects.create(user=user, name='tag1')
 
         self.assertEqual(str(tag), tag.name)
+
+    def test_language_name_unique_per_user(self):
+        """Test a user cannot have two languages with the same name."""
+        user = create_user()
+        models.Language.objects.create(user=user, name='Thai')
+
+        with self.assertRaises(IntegrityError):
+            models.Language.objects.create(user=user, name='Thai')
+
+    def test_get_or_create_many_languages(self):
+        """Test resolving languages by name in bulk."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        existing = models.Language.objects.create(user=user, name='Thai')
+        models.Language.objects.create(user=other_user, name='Dutch')
+
+        with self.assertNumQueries(3):
+            languages = models.Language.objects.get_or_create_many(
+                user,
+                ['Thai', 'Dutch', 'Dutch'],
+            )
+
+        self.assertEqual(languages['Thai'], existing)
+        self.assertEqual(languages['Dutch'].user, user)
+        self.assertEqual(models.Language.objects.filter(user=user).count(), 2)
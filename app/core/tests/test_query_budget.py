@@ -0,0 +1,56 @@
+"""
+Tests for query budgets.
+"""
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from core.query_budget import (
+    QueryBudgetExceeded,
+    QueryBudgetTestMixin,
+    query_budget,
+)
+
+
+def run_queries(count):
+    """Run `count` trivial queries."""
+    for _ in range(count):
+        get_user_model().objects.exists()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the query budget helpers."""
+
+    def test_within_budget(self):
+        """Test a block within its budget reports the queries it ran."""
+        with query_budget(2) as counter:
+            run_queries(2)
+
+        self.assertEqual(counter.count, 2)
+
+    def test_over_budget_raises(self):
+        """Test a block over its budget raises in strict mode."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                run_queries(2)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_over_budget_logs_when_not_strict(self):
+        """Test a block over its budget only logs outside strict mode."""
+        with self.assertLogs('core.query_budget', level='WARNING'):
+            with query_budget(1):
+                run_queries(2)
+
+    def test_decorator(self):
+        """Test query_budget can decorate a function."""
+        decorated = query_budget(1, label='run_queries')(run_queries)
+
+        decorated(1)
+        with self.assertRaises(QueryBudgetExceeded):
+            decorated(3)
+
+    def test_assert_max_queries_fails_over_budget(self):
+        """Test the test helper fails when the budget is exceeded."""
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(1):
+                run_queries(2)
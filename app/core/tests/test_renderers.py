@@ -0,0 +1,186 @@
+"""
+Tests for the orjson-backed renderer and parser.
+"""
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+import msgpack
+
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test FastJSONRenderer matches JSONRenderer."""
+
+    def assertSameOutput(self, data, media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_native_types(self):
+        """Test plain JSON types render identically."""
+        self.assertSameOutput({
+            'id': 1,
+            'title': 'Sample Appointment',
+            'price': '5.25',
+            'ratio': 0.5,
+            'flag': True,
+            'empty': None,
+            'languages': [{'id': 1, 'name': 'Español'}, {'name': 'ไทย'}],
+        })
+
+    def test_python_types(self):
+        """Test types handled by DRF's encoder render identically."""
+        self.assertSameOutput({
+            'utc': datetime.datetime(
+                2023, 6, 19, 12, 59, 1, 123456,
+                tzinfo=datetime.timezone.utc,
+            ),
+            'offset': datetime.datetime(
+                2023, 6, 19, 12, 59,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=2)),
+            ),
+            'naive': datetime.datetime(2023, 6, 19, 12, 59),
+            'date': datetime.date(2023, 6, 19),
+            'time': datetime.time(12, 59, 1, 500),
+            'decimal': Decimal('5.25'),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Sample'),
+            'set': {1},
+            'bytes': b'raw',
+        })
+
+    def test_generators(self):
+        """Test generators render as lists."""
+        self.assertEqual(
+            FastJSONRenderer().render({'ids': (i for i in range(3))}),
+            JSONRenderer().render({'ids': (i for i in range(3))}),
+        )
+
+    def test_non_string_keys(self):
+        """Test integer keys render identically."""
+        self.assertSameOutput({1: 'one', 'two': 2})
+
+    def test_line_separators_escaped(self):
+        """Test U+2028 and U+2029 are escaped like JSONRenderer does."""
+        data = {'title': 'a\u2028b\u2029c'}
+
+        self.assertSameOutput(data)
+        self.assertNotIn(b'\xe2\x80\xa8', FastJSONRenderer().render(data))
+
+    def test_indent_uses_stdlib(self):
+        """Test pretty-printed output comes from the stdlib path."""
+        self.assertSameOutput({'a': [1, 2]}, 'application/json; indent=4')
+
+    def test_none_renders_empty(self):
+        """Test None renders as an empty body."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_falls_back_without_orjson(self):
+        """Test rendering works when orjson is not installed."""
+        with patch('core.renderers.orjson', None):
+            self.assertSameOutput({'price': Decimal('1.50')})
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Test FastJSONParser matches JSONParser."""
+
+    def parse(self, parser, payload):
+        return parser.parse(io.BytesIO(payload))
+
+    def test_parses_like_json_parser(self):
+        """Test parsed data matches JSONParser."""
+        payload = '{"title": "ไทย", "price": 5.25, "tags": [1, null]}'
+        payload = payload.encode()
+
+        self.assertEqual(
+            self.parse(FastJSONParser(), payload),
+            self.parse(JSONParser(), payload),
+        )
+
+    def test_invalid_json_raises_parse_error(self):
+        """Test malformed input raises ParseError."""
+        with self.assertRaises(ParseError):
+            self.parse(FastJSONParser(), b'{"title": ')
+
+    def test_non_finite_numbers_rejected(self):
+        """Test NaN is refused like the strict JSONParser does."""
+        with self.assertRaises(ParseError):
+            self.parse(FastJSONParser(), b'{"price": NaN}')
+
+    def test_falls_back_without_orjson(self):
+        """Test parsing works when orjson is not installed."""
+        with patch('core.parsers.orjson', None):
+            self.assertEqual(
+                self.parse(FastJSONParser(), b'{"a": 1}'),
+                {'a': 1},
+            )
+
+
+class MessagePackTests(SimpleTestCase):
+    """Test the MessagePack renderer and parser."""
+
+    def test_round_trip(self):
+        """Test rendered data parses back to the same values."""
+        data = {'id': 1, 'title': 'ไทย', 'languages': [{'name': 'Español'}]}
+
+        rendered = MessagePackRenderer().render(data)
+
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(rendered)),
+            data,
+        )
+
+    def test_decimal_rendered_as_string(self):
+        """Test Decimals are packed as their exact string form."""
+        rendered = MessagePackRenderer().render({'price': Decimal('5.25')})
+
+        self.assertEqual(msgpack.unpackb(rendered), {'price': '5.25'})
+
+    def test_python_types(self):
+        """Test other types are converted like the JSON encoder does."""
+        rendered = MessagePackRenderer().render({
+            'created': datetime.datetime(
+                2023, 6, 19, 12, 59, tzinfo=datetime.timezone.utc,
+            ),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Sample'),
+        })
+
+        self.assertEqual(msgpack.unpackb(rendered), {
+            'created': '2023-06-19T12:59:00Z',
+            'uuid': '00000000-0000-0000-0000-000000000001',
+            'lazy': 'Sample',
+        })
+
+    def test_invalid_payload_raises_parse_error(self):
+        """Test malformed input raises ParseError."""
+        for payload in (b'\xc1', b'\x92\x01', b'\x01\x02'):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ParseError):
+                    MessagePackParser().parse(io.BytesIO(payload))
+
+
+class BenchmarkJSONCommandTests(SimpleTestCase):
+    """Test the benchmark_json command."""
+
+    def test_reports_timings(self):
+        """Test the command prints timings for every codec."""
+        out = io.StringIO()
+        call_command('benchmark_json', rows=10, repeat=1, stdout=out)
+
+        for codec in ('json', 'orjson', 'msgpack'):
+            self.assertIn(codec, out.getvalue())
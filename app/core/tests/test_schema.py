@@ -0,0 +1,173 @@
+"""
+Tests for the precomputed OpenAPI schema.
+"""
+import gzip
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from drf_spectacular.views import SpectacularAPIView
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core import schema
+from core.schema import code_version, schema_cache
+
+SCHEMA_URL = reverse('api-schema')
+
+JSON_SCHEMA = 'application/vnd.oai.openapi+json'
+
+
+class SchemaCacheTestMixin:
+    """Point the schema cache at a fresh directory and code version."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.set_version('test-1')
+        self.client = APIClient()
+
+    def set_version(self, version):
+        override = override_settings(OPENAPI_SCHEMA_CACHE={
+            'DIR': self.directory.name,
+            'VERSION': version,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        code_version.cache_clear()
+        self.addCleanup(code_version.cache_clear)
+        schema_cache.clear()
+        self.addCleanup(schema_cache.clear)
+
+    def count_renders(self):
+        patcher = patch.object(
+            schema,
+            'render_schema',
+            wraps=schema.render_schema,
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+
+class CachedSchemaViewTests(SchemaCacheTestMixin, SimpleTestCase):
+    """Test serving the schema from the cache."""
+
+    def test_schema_matches_generated(self):
+        """Test the cached schema is the one drf-spectacular generates."""
+        request = APIRequestFactory().get(SCHEMA_URL, HTTP_ACCEPT=JSON_SCHEMA)
+        expected = SpectacularAPIView.as_view()(request).render()
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT=JSON_SCHEMA)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], expected['Content-Type'])
+        self.assertEqual(json.loads(res.content), json.loads(expected.content))
+
+    def test_schema_rendered_once(self):
+        """Test later requests, in any process, reuse the first render."""
+        renders = self.count_renders()
+
+        first = self.client.get(SCHEMA_URL)
+        second = self.client.get(SCHEMA_URL)
+        schema_cache.clear()
+        third = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(renders.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first.content, third.content)
+
+    def test_new_code_version_rerenders(self):
+        """Test a schema is rendered again for a new code version."""
+        renders = self.count_renders()
+        self.client.get(SCHEMA_URL)
+
+        self.set_version('test-2')
+        self.client.get(SCHEMA_URL)
+
+        self.assertEqual(renders.call_count, 2)
+        self.assertEqual(
+            {path.name for path in Path(self.directory.name).iterdir()},
+            {'test-1', 'test-2'},
+        )
+
+    def test_etag_not_modified(self):
+        """Test a current If-None-Match is answered with 304."""
+        res = self.client.get(SCHEMA_URL)
+
+        cached = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        weak = self.client.get(
+            SCHEMA_URL,
+            HTTP_IF_NONE_MATCH=f'W/{res["ETag"]}',
+        )
+        stale = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH='"stale"')
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['ETag'], res['ETag'])
+        self.assertEqual(weak.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_gzip(self):
+        """Test clients accepting gzip get the compressed schema."""
+        plain = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertNotIn('Content-Encoding', plain)
+
+    def test_gzip_qvalues(self):
+        """Test q=0 refuses gzip and * accepts it."""
+        for accept_encoding, gzipped in (
+            ('gzip;q=0', False),
+            ('br, gzip; q=0.0, *', False),
+            ('identity, *;q=0.5', True),
+            ('gzip;q=0.1', True),
+            ('gzipper', False),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                res = self.client.get(
+                    SCHEMA_URL,
+                    HTTP_ACCEPT_ENCODING=accept_encoding,
+                )
+
+                self.assertEqual('Content-Encoding' in res, gzipped)
+
+    def test_unknown_language_uses_default(self):
+        """Test an unknown lang is served the default schema file."""
+        renders = self.count_renders()
+        default = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, {'lang': '../../evil'})
+
+        self.assertEqual(res.content, default.content)
+        self.assertEqual(renders.call_count, 1)
+
+
+class BuildSchemaCommandTests(SchemaCacheTestMixin, SimpleTestCase):
+    """Test the build_schema command."""
+
+    def test_builds_every_format(self):
+        """Test the built schema is served without rendering again."""
+        call_command('build_schema', stdout=io.StringIO())
+        renders = self.count_renders()
+
+        for accept in ('application/vnd.oai.openapi', JSON_SCHEMA):
+            with self.subTest(accept=accept):
+                res = self.client.get(SCHEMA_URL, HTTP_ACCEPT=accept)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(renders.call_count, 0)
+        self.assertTrue(
+            (Path(self.directory.name) / 'test-1' / 'schema.json').exists(),
+        )
@@ -0,0 +1,199 @@
+"""
+Tests for the token-bucket throttles.
+"""
+import io
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import User
+from core.throttling import (
+    CacheBucketStore,
+    LocalBucketStore,
+    LocalBucketStores,
+    local_buckets,
+    parse_rate,
+)
+
+APPOINTMENTS_URL = reverse('appointment:appointment-list')
+CREATE_USER_URL = reverse('user:create')
+
+
+def throttle_rates(**rates):
+    """Return REST_FRAMEWORK settings with the given throttle rates."""
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+            **rates,
+        },
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BucketStoreTests(SimpleTestCase):
+    """Test the bucket stores."""
+
+    def assertBucketBehaviour(self, store, clock):
+        capacity, rate = parse_rate('2/s')
+
+        self.assertEqual(store.consume('a', capacity, rate), 0)
+        self.assertEqual(store.consume('a', capacity, rate), 0)
+        self.assertEqual(store.consume('a', capacity, rate), 0.5)
+        self.assertEqual(store.consume('b', capacity, rate), 0)
+
+        clock.now += 0.5
+        self.assertEqual(store.consume('a', capacity, rate), 0)
+        self.assertEqual(store.consume('a', capacity, rate), 0.5)
+
+        clock.now += 60
+        self.assertEqual(store.consume('a', capacity, rate), 0)
+        self.assertEqual(store.consume('a', capacity, rate), 0)
+
+    def test_parse_rate(self):
+        """Test rates parse to a capacity and refill per second."""
+        self.assertEqual(parse_rate('120/min'), (120, 2))
+        self.assertEqual(parse_rate('3600/hour'), (3600, 1))
+
+    def test_local_store(self):
+        """Test the in-process store refills and refuses correctly."""
+        clock = FakeClock()
+        self.assertBucketBehaviour(LocalBucketStore(100, clock), clock)
+
+    def test_cache_store(self):
+        """Test the Django cache store refills and refuses correctly."""
+        clock = FakeClock()
+        cache = caches['default']
+        cache.clear()
+        self.assertBucketBehaviour(CacheBucketStore(cache, clock), clock)
+
+    def test_local_store_prunes_full_buckets(self):
+        """Test refilled buckets are dropped once the store is full."""
+        clock = FakeClock()
+        store = LocalBucketStore(2, clock)
+        store.consume('a', 1, 1)
+        store.consume('b', 1, 1)
+        clock.now += 5
+        store.consume('c', 1, 1)
+
+        self.assertEqual(len(store), 1)
+
+    def test_local_store_evicts_least_recently_used(self):
+        """Test a store full of live buckets drops the least recent."""
+        store = LocalBucketStore(10, FakeClock())
+        capacity, rate = 1, 0.001
+        for key in range(10):
+            store.consume(key, capacity, rate)
+        store.consume(0, capacity, rate)
+        store.consume(10, capacity, rate)
+
+        self.assertEqual(len(store), 9)
+        self.assertGreater(store.consume(0, capacity, rate), 0)
+        self.assertGreater(store.consume(3, capacity, rate), 0)
+        self.assertEqual(store.consume(1, capacity, rate), 0)
+
+    def test_scopes_have_own_stores(self):
+        """Test each throttle scope keeps its buckets apart."""
+        stores = LocalBucketStores(100)
+
+        self.assertIs(stores['token'], stores['token'])
+        self.assertIsNot(stores['token'], stores['ip'])
+
+
+class ThrottleApiTests(TestCase):
+    """Test throttled API requests."""
+
+    def setUp(self):
+        local_buckets.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        local_buckets.clear()
+
+    def create_client(self, email):
+        user = User.objects.create_user(email=email, password='testpass123')
+        client = APIClient()
+        token = Token.objects.create(user=user)
+        client.force_authenticate(user, token=token)
+        return client
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(token='2/min'))
+    def test_token_throttled_with_retry_after(self):
+        """Test a token over its rate gets 429 and Retry-After."""
+        client = self.create_client('user@example.com')
+        other = self.create_client('other@example.com')
+
+        for _ in range(2):
+            res = client.get(APPOINTMENTS_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = client.get(APPOINTMENTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+        res = other.get(APPOINTMENTS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(ip='1/min'))
+    def test_ip_throttled(self):
+        """Test anonymous requests are throttled per address."""
+        payload = {
+            'email': 'new@example.com',
+            'password': 'testpass123',
+            'name': 'New User',
+        }
+
+        res = self.client.post(CREATE_USER_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '60')
+        res = self.client.post(
+            CREATE_USER_URL,
+            {**payload, 'email': 'another@example.com'},
+            REMOTE_ADDR='10.0.0.2',
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(ip='1/min'))
+    def test_ip_throttle_ignores_forwarded_for(self):
+        """Test clients cannot pick their bucket with X-Forwarded-For."""
+        for i, email in enumerate(('new@example.com', 'other@example.com')):
+            res = self.client.post(
+                CREATE_USER_URL,
+                {'email': email, 'password': 'testpass123'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{i}',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class BenchmarkThrottleCommandTests(SimpleTestCase):
+    """Test the benchmark_throttle command."""
+
+    def test_reports_timings(self):
+        """Test the command prints a timing for each store."""
+        out = io.StringIO()
+        call_command(
+            'benchmark_throttle',
+            iterations=10,
+            clients=2,
+            stdout=out,
+        )
+
+        for store in ('local', 'cache'):
+            self.assertIn(store, out.getvalue())
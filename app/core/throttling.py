@@ -0,0 +1,214 @@
+"""
+Token-bucket throttles for the API.
+
+Every client gets a bucket of `num_requests` tokens that refills evenly
+over the rate's period; a request spends one token and is refused with
+429 and a Retry-After header when the bucket is empty. Buckets live in
+this process by default, or in the Django cache named by
+THROTTLE['SHARED_CACHE'] when the limit must hold across processes.
+"""
+import itertools
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Return (capacity, tokens per second) for a rate like '100/min'."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """In-process buckets, kept as (tokens, updated, full_at) tuples.
+
+    Updates take no lock: a bucket is replaced by single dict operations,
+    which are atomic, so the worst a race between two threads can do is
+    let both spend the same token. Buckets are ordered by last use; past
+    max_size, refilled buckets are dropped, then the least recently used.
+    """
+
+    def __init__(self, max_size, clock=time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def consume(self, key, capacity, rate):
+        """Spend a token from key's bucket and return the wait, 0 if none."""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+        # Moved to the end, so the dict stays in least recently used order.
+        self._buckets.pop(key, None)
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        if len(self._buckets) > self.max_size:
+            self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as no bucket at all.
+        buckets = {
+            key: bucket
+            for key, bucket in list(self._buckets.items())
+            if bucket[2] > now
+        }
+        # Evict a tenth more than needed, so a store full of live buckets
+        # is not pruned again on the very next request.
+        excess = len(buckets) - self.max_size + self.max_size // 10
+        for key in list(itertools.islice(buckets, max(excess, 0))):
+            del buckets[key]
+        self._buckets = buckets
+
+    def clear(self):
+        """Forget every bucket."""
+        self._buckets = {}
+
+
+class CacheBucketStore:
+    """Buckets kept in a Django cache, shared by every process using it.
+
+    The read and the write are separate cache calls, so concurrent
+    requests for one client may occasionally both spend the same token.
+    """
+    key_prefix = 'throttle'
+
+    def __init__(self, cache, clock=time.time):
+        self.cache = cache
+        self.clock = clock
+
+    def consume(self, key, capacity, rate):
+        """Spend a token from key's bucket and return the wait, 0 if none."""
+        now = self.clock()
+        cache_key = f'{self.key_prefix}:{key}'
+        bucket = self.cache.get(cache_key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / rate
+        self.cache.set(
+            cache_key,
+            (tokens, now),
+            math.ceil((capacity - tokens) / rate) or 1,
+        )
+        return wait
+
+
+class LocalBucketStores:
+    """A LocalBucketStore per throttle scope, so clients of one scope
+    never evict the buckets of another.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._stores = {}
+
+    def __getitem__(self, scope):
+        store = self._stores.get(scope)
+        if store is None:
+            store = self._stores.setdefault(
+                scope,
+                LocalBucketStore(self.max_size),
+            )
+        return store
+
+    def clear(self):
+        """Forget every bucket of every scope."""
+        for store in list(self._stores.values()):
+            store.clear()
+
+
+local_buckets = LocalBucketStores(max_size=settings.THROTTLE['MAX_SIZE'])
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle clients to the rate named by `scope` in
+    DEFAULT_THROTTLE_RATES, using a token bucket per client.
+
+    Subclasses return the client's bucket key from get_ident_key, or
+    None to leave the request unthrottled.
+    """
+    scope = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            raise ImproperlyConfigured(
+                f'No default throttle rate set for {self.scope!r} scope',
+            )
+        self.capacity, self.rate = parse_rate(rate)
+        self._wait = None
+
+    @property
+    def store(self):
+        """Return the configured bucket store."""
+        alias = settings.THROTTLE['SHARED_CACHE']
+        if alias:
+            return CacheBucketStore(caches[alias])
+        return local_buckets[self.scope]
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        self._wait = self.store.consume(
+            f'{self.scope}:{ident}',
+            self.capacity,
+            self.rate,
+        )
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class TokenRateThrottle(TokenBucketThrottle):
+    """Throttle each auth token; requests without one are not counted."""
+    scope = 'token'
+
+    def get_ident_key(self, request, view):
+        return getattr(request.auth, 'key', None)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Throttle each client address, authenticated or not.
+
+    The address is REMOTE_ADDR unless NUM_PROXIES trusted proxies add
+    X-Forwarded-For, so clients cannot pick their own bucket.
+    """
+    scope = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
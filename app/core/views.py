@@ -0,0 +1,21 @@
+"""
+Views for operating the API.
+"""
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication
+from core.db_pool.base import pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """Show this process's database connection pool metrics."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Return size, usage and wait counters per database."""
+        return Response(pool_stats())
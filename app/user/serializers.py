@@ -9,8 +9,11 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.authentication import login_cache
+from core.serializers import UpdateChangedFieldsMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(UpdateChangedFieldsMixin, serializers.ModelSerializer):
     """Serializer for the user object."""
 
     class Meta:
@@ -25,14 +28,13 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update and return user."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        changed = []
 
         if password:
-            user.set_password(password)
-            user.save()
-
-        return user
+            instance.set_password(password)
+            changed.append('password')
 
+        return self.save_changed(instance, validated_data, changed)
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -47,6 +49,12 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user."""
         email = attrs.get('email')
         password = attrs.get('password')
+        token = login_cache.get(email, password)
+        if token is not None:
+            attrs['user'] = token.user
+            attrs['token'] = token
+            return attrs
+
         user = authenticate(
             request=self.context.get('request'),
             username=email,
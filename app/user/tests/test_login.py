@@ -0,0 +1,183 @@
+"""
+Tests for the token login path.
+"""
+import io
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import (
+    AsyncClient,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import login_cache
+
+TOKEN_URL = reverse('user:token')
+CREDENTIALS = {'email': 'user@example.com', 'password': 'testpass123'}
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class LoginCacheTests(TestCase):
+    """Test repeat logins skip password hashing."""
+
+    def setUp(self):
+        login_cache.clear()
+        self.client = APIClient()
+        self.user = create_user(**CREDENTIALS)
+
+    def login(self, **credentials):
+        return self.client.post(TOKEN_URL, credentials or CREDENTIALS)
+
+    def test_repeat_login_skips_hashing(self):
+        """Test a repeated login is answered without authenticate()."""
+        first = self.login()
+
+        with patch('user.serializers.authenticate') as mock_authenticate:
+            with self.assertNumQueries(1):
+                second = self.login()
+
+        mock_authenticate.assert_not_called()
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['token'], first.data['token'])
+
+    def test_wrong_password_not_cached(self):
+        """Test a different password is still checked and refused."""
+        self.login()
+
+        res = self.login(email=CREDENTIALS['email'], password='wrong')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_password_change_invalidates(self):
+        """Test the old password stops working once changed."""
+        self.login()
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deactivation_invalidates(self):
+        """Test an inactive user cannot log in from the cache."""
+        self.login()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleted_token_not_reused(self):
+        """Test a new token is issued after the cached one is deleted."""
+        first = self.login()
+        Token.objects.filter(key=first.data['token']).delete()
+
+        second = self.login()
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second.data['token'], first.data['token'])
+
+    def test_cache_keys_do_not_contain_password(self):
+        """Test the password does not appear in cache keys."""
+        self.login()
+
+        for key in login_cache.local._entries:
+            self.assertNotIn(CREDENTIALS['password'], key)
+
+
+class RehashOnLoginTests(TestCase):
+    """Test stored hashes follow the configured hasher."""
+
+    def setUp(self):
+        login_cache.clear()
+
+    @override_settings(PBKDF2_ITERATIONS=1000)
+    def test_iterations_upgraded_on_login(self):
+        """Test a login rehashes with the configured iteration count."""
+        with override_settings(PBKDF2_ITERATIONS=500):
+            user = create_user(**CREDENTIALS)
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$500$'))
+
+        res = APIClient().post(TOKEN_URL, CREDENTIALS)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(user.check_password(CREDENTIALS['password']))
+
+    @override_settings(PASSWORD_HASHERS=[
+        'core.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_old_hasher_upgraded_on_login(self):
+        """Test a hash from a deprecated hasher is replaced on login."""
+        user = create_user(email=CREDENTIALS['email'])
+        get_user_model().objects.filter(id=user.id).update(
+            password=make_password(
+                CREDENTIALS['password'],
+                hasher='md5',
+            ),
+        )
+
+        res = APIClient().post(TOKEN_URL, CREDENTIALS)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+
+class AsgiOffloadTests(TransactionTestCase):
+    """Test ASGI logins run in the password hash thread pool."""
+
+    def setUp(self):
+        login_cache.clear()
+        create_user(**CREDENTIALS)
+
+    async def test_login_runs_in_hash_pool(self):
+        """Test authenticate() runs on a password-hash thread."""
+        threads = []
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return authenticate(*args, **kwargs)
+
+        with patch('user.serializers.authenticate', record_thread):
+            res = await AsyncClient().post(
+                TOKEN_URL,
+                CREDENTIALS,
+                content_type='application/json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.json())
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('password-hash'))
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class BenchmarkLoginCommandTests(TransactionTestCase):
+    """Test the benchmark_login command."""
+
+    def test_reports_throughput(self):
+        """Test the command reports every mode and cleans up its user."""
+        out = io.StringIO()
+        call_command('benchmark_login', requests=2, concurrency=2, stdout=out)
+
+        for mode in ('wsgi, hashing', 'wsgi, login cache', 'asgi'):
+            self.assertIn(mode, out.getvalue())
+        self.assertFalse(get_user_model().objects.exists())
@@ -2,7 +2,9 @@
 Tests for the user API.
 """
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
@@ -167,4 +169,23 @@ class PrivateUserApiTests(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_user_profile_single_write(self):
+        """Test updating name and password issues a single UPDATE."""
+        payload = {
+            'name': 'Updated Name',
+            'password': 'newpassword123',
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch(ME_URL, payload)
+
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"password"', updates[0])
+        self.assertIn('"name"', updates[0])
+        self.assertNotIn('"email"', updates[0])
@@ -3,12 +3,17 @@ URL mappings for the user API.
 """
 from django.urls import path
 
+from core.hashers import offload_view
 from user import views
 
 app_name = 'user'
 
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
-    path('token/', views.CreateTokenView.as_view(), name='token'),
+    path(
+        'token/',
+        offload_view(views.CreateTokenView.as_view()),
+        name='token',
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
-]
\ No newline at end of file
+]
@@ -1,10 +1,14 @@
 """
 Views for the user API
 """
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication, login_cache
+from core.throttling import IPRateThrottle, TokenRateThrottle
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -14,21 +18,35 @@ from user.serializers import (
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    throttle_classes = [IPRateThrottle]
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    throttle_classes = [IPRateThrottle]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        token = data.get('token')
+        if token is None:
+            token, created = Token.objects.get_or_create(user=data['user'])
+            login_cache.set(data['email'], data['password'], token)
+
+        return Response({'token': token.key})
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [TokenRateThrottle, IPRateThrottle]
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
         return self.request.user
-